@@ -0,0 +1,60 @@
+"""Бенчмарк пропускной способности медленных запросов: пул потоков против асинхронного пула соединений.
+
+- threads: запрос выполняется синхронным ORM в потоке anyio, потоков - THREADS (так работают синхронные методы API);
+- async: запрос выполняется через hr.db.aio в event loop, соединений - DB_ASYNC_POOL_SIZE.
+
+Медленный запрос имитируется pg_sleep, все запросы запускаются одновременно.
+
+Запуск из директории src:
+    python -m benchmarks.async_queries [--requests 200] [--query-ms 20]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import asyncio
+import time
+
+import anyio
+import anyio.to_thread
+import click
+from django.conf import settings
+from django.db import connection
+
+from hr.db import aio
+
+
+def _sync_query(seconds: float):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_sleep(%s)', [seconds])
+
+
+async def _threads(requests: int, seconds: float):
+    limiter = anyio.CapacityLimiter(settings.THREADS)
+    async with anyio.create_task_group() as group:
+        for _ in range(requests):
+            group.start_soon(lambda: anyio.to_thread.run_sync(_sync_query, seconds, limiter=limiter))
+
+
+async def _async(requests: int, seconds: float):
+    await asyncio.gather(*[aio.execute('SELECT pg_sleep(%s)', [seconds]) for _ in range(requests)])
+
+
+@click.command()
+@click.option('--requests', default=200, help='Количество одновременных запросов')
+@click.option('--query-ms', default=20, help='Длительность запроса, мс')
+def main(requests: int, query_ms: int):
+    for name, run in [('threads', _threads), ('async', _async)]:
+        started = time.perf_counter()
+        asyncio.run(run(requests, query_ms / 1000))
+        elapsed = time.perf_counter() - started
+        click.echo(f'{name}: {elapsed:.2f} s, {requests / elapsed:.0f} req/s')
+
+    aio.close_pools()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Бенчмарк задержки запроса к БД из пула потоков: новое соединение на каждый вызов против постоянных соединений.
+
+- reconnect: соединение закрывается перед каждой задачей (поведение при CONN_MAX_AGE=0);
+- persistent: соединение потока переиспользуется, проверка только после простоя (по умолчанию);
+- checked: соединение переиспользуется и проверяется SELECT 1 перед каждым использованием.
+
+Запуск из директории src:
+    python -m benchmarks.db_connections [--requests 2000] [--threads 4]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import statistics
+import time
+
+import click
+from django.db import connection
+from django.db import connections
+
+from hr import models
+from hr.app import DjangoThreadPoolExecutor
+from hr.db.metrics import pool_metrics
+
+
+def _request(reconnect: bool) -> float:
+    started = time.perf_counter()
+    if reconnect:
+        connection.close()
+    models.Department.objects.filter(id=1).first()
+    return time.perf_counter() - started
+
+
+def _run(requests: int, threads: int, reconnect: bool, health_check_interval: float | None) -> list[float]:
+    connections.settings['default']['CONN_HEALTH_CHECK_INTERVAL'] = health_check_interval
+    executor = DjangoThreadPoolExecutor(max_workers=threads)
+    try:
+        futures = [executor.submit(_request, reconnect) for _ in range(requests)]
+        latencies = [future.result() for future in futures]
+        for future in [executor.submit(lambda: connection.close()) for _ in range(threads)]:
+            future.result()
+    finally:
+        executor.shutdown()
+
+    return latencies
+
+
+@click.command()
+@click.option('--requests', default=2000, help='Количество запросов в каждом замере')
+@click.option('--threads', default=4, help='Размер пула потоков')
+def main(requests: int, threads: int):
+    modes = {
+        'reconnect': (True, None),
+        'persistent': (False, connections.settings['default']['CONN_HEALTH_CHECK_INTERVAL']),
+        'checked': (False, 0),
+    }
+    for name, (reconnect, health_check_interval) in modes.items():
+        pool_metrics.reset()
+        latencies = sorted(_run(requests, threads, reconnect, health_check_interval))
+        metrics = pool_metrics.snapshot()
+        click.echo(
+            f'{name}: mean={statistics.mean(latencies) * 1e3:.2f} ms, '
+            f'p50={latencies[len(latencies) // 2] * 1e3:.2f} ms, '
+            f'p99={latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms, '
+            f'connects={metrics["connect"]["count"]}, '
+            f'checkout mean={metrics["checkout"]["total"] / max(metrics["checkout"]["count"], 1) * 1e6:.0f} us, '
+            f'wait max={metrics["wait"]["max"] * 1e3:.2f} ms'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""Микробенчмарк security.decode_jwt: холодное (без кэша) и теплое (из кэша) декодирование токена.
+
+Запуск из директории src:
+    python -m benchmarks.jwt_decode [--iterations 20000]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import timeit
+
+import click
+
+from hr import models
+from hr import security
+
+
+@click.command()
+@click.option('--iterations', default=20_000, help='Количество декодирований в каждом замере')
+def main(iterations: int):
+    token = security.encode_jwt(models.User(id=1, role=models.UserRole.APPLICANT))
+
+    def cold():
+        security.token_cache.clear()
+        security.decode_jwt(token)
+
+    def warm():
+        security.decode_jwt(token)
+
+    for name, func in (('cold', cold), ('warm', warm)):
+        security.token_cache.clear()
+        elapsed = timeit.timeit(func, number=iterations)
+        click.echo(f'{name}: {iterations / elapsed:,.0f} decodes/s, {elapsed / iterations * 1e6:.1f} us/decode')
+
+    click.echo(f'warm cache: hits={security.token_cache.hits}, misses={security.token_cache.misses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Бенчмарк кодирования ответа get_vacancy_responses_for_manager по размеру страницы.
+
+- stdlib: стандартный путь fastapi_jsonrpc - повторная валидация результата, jsonable_encoder и json.dumps;
+- orjson: hr.api.encoding.encode, департаменты подставляются готовыми фрагментами из справочника.
+
+Схемы собираются в памяти, БД не нужна.
+
+Запуск из директории src:
+    python -m benchmarks.response_encoding [--page-sizes 10,50,100] [--repeat 200]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import asyncio
+import datetime as dt
+import time
+
+import click
+from fastapi.routing import serialize_response
+from starlette.responses import JSONResponse
+
+from hr import models
+from hr.api import schemas
+from hr.api.departments import department_directory
+from hr.api.encoding import OrjsonResponse
+from hr.api.jsonrpc import api_v1
+from hr.api.pagination import PaginatedResponse
+
+
+def _page(size: int, departments: list[schemas.DepartmentSchema]) -> PaginatedResponse:
+    now = dt.datetime.now(dt.timezone.utc)
+    items = []
+    for index in range(size):
+        department = departments[index % len(departments)]
+        items.append(schemas.VacancyResponseSchema(
+            id=index,
+            vacancy=schemas.VacancyForApplicantSchema(
+                id=index,
+                creator_id=index,
+                creator_full_name='Иванов Иван Иванович',
+                creator_contact='manager@example.com',
+                department_id=department.id,
+                department_name=department.name,
+                position='Разработчик',
+                experience=3,
+                description='Описание вакансии ' * 10,
+                published_at=now,
+            ),
+            resume=schemas.ResumeForManagerSchema(
+                id=index,
+                applicant=schemas.ShortApplicantSchema(
+                    id=index,
+                    email=f'applicant{index}@example.com',
+                    full_name='Петров Петр Петрович',
+                    department=department,
+                ),
+                current_position='Разработчик',
+                desired_position='Ведущий разработчик',
+                skills=['python', 'django', 'postgresql'],
+                experience=5,
+                bio='О себе ' * 10,
+            ),
+            applicant_message='Сопроводительное письмо',
+        ))
+
+    return PaginatedResponse[schemas.VacancyResponseSchema](
+        items=items, has_next=True, total_size=1000, total_size_is_exact=True,
+    )
+
+
+async def _stdlib(field, page) -> bytes:
+    content = await serialize_response(field=field, response_content={'jsonrpc': '2.0', 'result': page})
+    return JSONResponse(content).body
+
+
+async def _orjson(field, page) -> bytes:
+    return OrjsonResponse({'jsonrpc': '2.0', 'result': page}).body
+
+
+async def _measure(encode, field, page, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await encode(field, page)
+    return (time.perf_counter() - started) / repeat
+
+
+@click.command()
+@click.option('--page-sizes', default='10,50,100', help='Размеры страниц через запятую')
+@click.option('--repeat', default=200, help='Количество повторов для каждого замера')
+def main(page_sizes: str, repeat: int):
+    route = next(route for route in api_v1.routes if route.name == 'get_vacancy_responses_for_manager')
+    field = route.secure_cloned_response_field
+    # Справочник департаментов заполняется без БД, схемы берутся из него, как в методах API
+    department_directory._store(
+        department_directory._build([models.Department(id=index, name=f'Департамент {index}') for index in range(10)]),
+        department_directory._generation,
+    )
+    departments = department_directory.list_schemas()
+
+    for size in map(int, page_sizes.split(',')):
+        page = _page(size, departments)
+        stdlib = asyncio.run(_measure(_stdlib, field, page, repeat))
+        fast = asyncio.run(_measure(_orjson, field, page, repeat))
+        click.echo(f'{size} items: stdlib={stdlib * 1e3:.2f} ms, orjson={fast * 1e3:.2f} ms, x{stdlib / fast:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Бенчмарк сборки схем ответа из моделей: с валидацией pydantic против BaseModel.trusted.
+
+- validated: from_model собирает схему конструктором, как до введения trusted;
+- trusted: from_model собирает схему через construct, без валидации.
+
+Модели создаются в памяти, БД не нужна.
+
+Запуск из директории src:
+    python -m benchmarks.schema_construction [--rows 10000]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import contextlib
+import time
+
+import click
+from django.utils import timezone
+
+from hr import models
+from hr.api import schemas
+from hr.api.departments import department_directory
+
+
+@contextlib.contextmanager
+def _validated():
+    trusted = schemas.BaseModel.__dict__['trusted']
+    schemas.BaseModel.trusted = classmethod(lambda cls, **values: cls(**values))
+    try:
+        yield
+    finally:
+        schemas.BaseModel.trusted = trusted
+
+
+def _rows(count: int) -> dict[type, list]:
+    department = models.Department(id=1, name='Разработка')
+    department_directory._store(department_directory._build([department]), department_directory._generation)
+    skills = [models.Skill(id=index, name=f'навык {index}') for index in range(5)]
+
+    vacancies, resumes = [], []
+    for index in range(count):
+        user = models.User(
+            id=index,
+            email=f'user{index}@example.com',
+            first_name='Иван',
+            last_name='Иванов',
+            patronymic='Иванович',
+            department=department,
+        )
+        vacancies.append(models.Vacancy(
+            id=index,
+            creator=user,
+            department=department,
+            state=models.VacancyState.PUBLISHED,
+            position='Разработчик',
+            experience=3,
+            description='Описание',
+            published_at=timezone.now(),
+        ))
+        resume = models.Resume(id=index, user=user, current_position='Разработчик', experience=5, bio='О себе')
+        # Как после prefetch_related('skills')
+        resume._prefetched_objects_cache = {'skills': skills}
+        resumes.append(resume)
+
+    return {schemas.ShortVacancyForApplicantSchema: vacancies, schemas.ResumeForManagerSchema: resumes}
+
+
+def _per_row(schema, objects) -> float:
+    started = time.perf_counter()
+    for obj in objects:
+        schema.from_model(obj)
+    return (time.perf_counter() - started) / len(objects)
+
+
+@click.command()
+@click.option('--rows', default=10000, help='Количество строк в каждом замере')
+def main(rows: int):
+    for schema, objects in _rows(rows).items():
+        with _validated():
+            validated = _per_row(schema, objects)
+        trusted = _per_row(schema, objects)
+        click.echo(
+            f'{schema.__name__}: validated={validated * 1e6:.1f} us/row, '
+            f'trusted={trusted * 1e6:.1f} us/row, x{validated / trusted:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Бенчмарк поиска подстроки в списках: icontains (UPPER(col) LIKE) против ilike_contains (ILIKE по триграммному индексу).
+
+Данные генерируются в транзакции, которая откатывается в конце, поэтому бенчмарк можно запускать на рабочей базе разработчика.
+Без расширения pg_trgm (см. миграцию 0006_trigram_indexes) индексов нет и разницы не будет.
+
+Запуск из директории src:
+    python -m benchmarks.trigram_search [--rows 200000] [--repeat 20]
+"""
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import random
+import string
+import timeit
+
+import click
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+
+from hr import models
+
+POSITIONS = ['разработчик', 'аналитик', 'тестировщик', 'дизайнер', 'менеджер', 'администратор', 'архитектор']
+
+
+def _word(rng: random.Random) -> str:
+    return ''.join(rng.choices(string.ascii_lowercase, k=10))
+
+
+def _position(rng: random.Random) -> str:
+    return f'{rng.choice(POSITIONS)} {_word(rng)}'
+
+
+def seed(rows: int, rng: random.Random):
+    now = timezone.now()
+    departments = models.Department.objects.bulk_create(
+        [models.Department(name=f'Департамент {index}') for index in range(10)],
+    )
+    users = models.User.objects.bulk_create(
+        [
+            models.User(
+                email=f'{_word(rng)}{index}@example.com',
+                first_name=_word(rng),
+                last_name=_word(rng),
+                password='',
+                department=rng.choice(departments),
+                role=models.UserRole.MANAGER if index % 10 == 0 else models.UserRole.APPLICANT,
+            )
+            for index in range(rows)
+        ],
+        batch_size=5000,
+    )
+    managers = [user for user in users if user.role == models.UserRole.MANAGER]
+    models.Resume.objects.bulk_create(
+        [
+            models.Resume(
+                user=user,
+                state=models.ResumeState.PUBLISHED,
+                current_position=_position(rng),
+                desired_position=_position(rng),
+                published_at=now,
+            )
+            for user in users
+            if user.role == models.UserRole.APPLICANT
+        ],
+        batch_size=5000,
+    )
+    models.Vacancy.objects.bulk_create(
+        [
+            models.Vacancy(
+                creator=creator,
+                department_id=creator.department_id,
+                state=models.VacancyState.PUBLISHED,
+                position=_position(rng),
+                description='',
+                published_at=now,
+            )
+            for creator in (rng.choice(managers) for _ in range(rows))
+        ],
+        batch_size=5000,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE hr_user, hr_resume, hr_vacancy')
+
+
+def scenarios():
+    manager = models.User.objects.filter(role=models.UserRole.MANAGER).first()
+    applicant_email = models.User.objects.filter(role=models.UserRole.APPLICANT).values_list('email', flat=True).first()
+    position = models.Vacancy.objects.values_list('position', flat=True).first()
+
+    # Ищем по редкой подстроке, как обычно и ищут по email/должности
+    email_term = applicant_email[2:8]
+    position_term = position.split()[-1][:6]
+
+    return [
+        (
+            'get_applicants_for_manager',
+            models.User.objects.filter(role=models.UserRole.APPLICANT).order_by('-id'),
+            'email',
+            email_term,
+        ),
+        (
+            'get_resumes_for_manager',
+            models.Resume.objects.filter(state=models.ResumeState.PUBLISHED).order_by('-published_at', '-id'),
+            'desired_position',
+            position_term,
+        ),
+        (
+            'get_vacancies_for_manager',
+            models.Vacancy.objects.filter(creator__department_id=manager.department_id).order_by('-id'),
+            'position',
+            position_term,
+        ),
+        (
+            'get_vacancies_for_applicant',
+            models.Vacancy.objects.filter(state=models.VacancyState.PUBLISHED).order_by('-id'),
+            'position',
+            position_term,
+        ),
+    ]
+
+
+@click.command()
+@click.option('--rows', default=200_000, help='Количество пользователей и вакансий')
+@click.option('--repeat', default=20, help='Количество запросов в каждом замере')
+@click.option('--seed', 'random_seed', default=0, help='Seed генератора данных')
+def main(rows: int, repeat: int, random_seed: int):
+    rng = random.Random(random_seed)
+
+    with transaction.atomic():
+        click.echo(f'seeding {rows} rows...')
+        seed(rows, rng)
+
+        for name, query, field, term in scenarios():
+            click.echo(f'{name} ({field} contains {term!r}):')
+            for lookup in ('icontains', 'ilike_contains'):
+                page = query.filter(**{f'{field}__{lookup}': term})[:20]
+                elapsed = timeit.timeit(lambda: list(page.all()), number=repeat)
+                click.echo(f'  {lookup:>15}: {elapsed / repeat * 1000:.2f} ms/query')
+
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,7 @@ class _Settings(BaseSettings):
     DEBUG: bool = True
     VERSION: str = 'unknown'
     THREADS: int = 4
+    PASSWORD_HASHING_WORKERS: int = 2
     LOG_LEVEL: str = 'DEBUG'
 
     PORT: int = 8000
@@ -32,6 +33,32 @@ class _Settings(BaseSettings):
     DB_NAME: str = 'hr_projector'
     DB_USER: str = 'hr_projector'
     DB_PASSWORD: str = 'hr_projector'
+    DB_CONN_MAX_AGE: int = 300
+    DB_CONN_HEALTH_CHECK_INTERVAL: float | None = 10
+    DB_ASYNC_POOL_SIZE: int = 20
+    # Порог медленного запроса в секундах и число одинаковых запросов за вызов метода, при которых
+    # логируется предупреждение (см. hr.db.detector); None - не проверять
+    DB_SLOW_QUERY_THRESHOLD: float | None = 0.5
+    DB_N_PLUS_ONE_THRESHOLD: int | None = 10
+
+    SESSION_CACHE_TTL: int = 60
+    SESSION_CACHE_MAX_SIZE: int = 10_000
+    SESSION_CACHE_REDIS_URL: str | None = None
+
+    JWT_CACHE_MAX_SIZE: int = 10_000
+
+    PAGINATION_COUNT_CAP: int = 1000
+
+    JSONRPC_BATCH_CONCURRENCY: int = 4
+
+    # Адреса клиентов, которым доступен /metrics
+    METRICS_ALLOWED_HOSTS: list[str] = ['127.0.0.1', '::1']
+
+    DEPARTMENT_CACHE_TTL: int = 300
+
+    MATCHING_CACHE_TTL: int = 600
+    MATCHING_CACHE_MAX_VACANCIES: int = 1000
+    RECOMMENDATION_MIN_SCORE: float = 0.35
 
     class Config:
         env_file = dotenv.find_dotenv('.env') or '.env'
@@ -105,12 +132,14 @@ WSGI_APPLICATION = 'config.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'hr.db',
         'NAME': _settings.DB_NAME,
         'USER': _settings.DB_USER,
         'PASSWORD': _settings.DB_PASSWORD,
         'HOST': _settings.DB_HOST,
         'PORT': _settings.DB_PORT,
+        'CONN_MAX_AGE': _settings.DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECK_INTERVAL': _settings.DB_CONN_HEALTH_CHECK_INTERVAL,
         'OPTIONS': {
             'application_name': _settings.DB_USER,
         }
@@ -0,0 +1,142 @@
+"""Выполнение batch-запросов JSON-RPC.
+
+Вызовы batch-запроса выполняются параллельно, но не больше JSONRPC_BATCH_CONCURRENCY одновременно,
+чтобы один batch не занял все потоки и соединения с БД.
+Одинаковые вызовы методов только для чтения (тот же метод и те же параметры) выполняются один раз,
+каждый из них получает копию ответа со своим id.
+"""
+import asyncio
+import json
+import threading
+import typing as tp
+
+import fastapi_jsonrpc
+from django.conf import settings
+from fastapi_jsonrpc import BaseError
+from fastapi_jsonrpc import MethodRoute
+from fastapi_jsonrpc import NoContent
+
+_FuncT = tp.TypeVar('_FuncT', bound=tp.Callable)
+
+
+def read_only(func: _FuncT) -> _FuncT:
+    """Отметить метод API, который ничего не меняет: его одинаковые вызовы в batch выполняются один раз"""
+    func.read_only = True
+    return func
+
+
+class BatchMetrics:
+    """Метрики batch-запросов.
+
+    - batches: количество batch-запросов;
+    - calls: всего вызовов в них;
+    - executed: сколько вызовов выполнено после удаления повторов;
+    - max_size: наибольшее число вызовов в одном batch.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.batches = 0
+            self.calls = 0
+            self.executed = 0
+            self.max_size = 0
+
+    def observe(self, calls: int, executed: int):
+        with self._lock:
+            self.batches += 1
+            self.calls += calls
+            self.executed += executed
+            self.max_size = max(self.max_size, calls)
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'calls': self.calls,
+                'executed': self.executed,
+                'max_size': self.max_size,
+            }
+
+
+batch_metrics = BatchMetrics()
+
+
+class BatchEntrypointRoute(fastapi_jsonrpc.EntrypointRoute):
+    async def handle_body(self, http_request, background_tasks, sub_response, body):
+        if not isinstance(body, list) or len(body) < 2:
+            return await super().handle_body(http_request, background_tasks, sub_response, body)
+
+        # Общие зависимости решаются один раз на весь batch, как в EntrypointRoute.handle_body
+        shared_dependencies_error = None
+        try:
+            dependency_cache = await self.solve_shared_dependencies(http_request, background_tasks, sub_response)
+        except BaseError as error:
+            shared_dependencies_error = error
+            dependency_cache = None
+
+        scheduler = await self.entrypoint.get_scheduler()
+        semaphore = asyncio.Semaphore(settings.JSONRPC_BATCH_CONCURRENCY)
+
+        async def handle(req):
+            async with semaphore:
+                return await self.handle_req_to_resp(
+                    http_request, background_tasks, sub_response, req,
+                    dependency_cache=dependency_cache,
+                    shared_dependencies_error=shared_dependencies_error,
+                )
+
+        read_only_methods = self._get_read_only_methods()
+        jobs = []
+        sources: list[tuple[int, bool]] = []  # (индекс выполняемого вызова, повтор ли это) для каждого запроса
+        executed: dict[str, int] = {}
+        for req in body:
+            key = _dedupe_key(req, read_only_methods)
+            if key is not None and key in executed:
+                sources.append((executed[key], True))
+                continue
+
+            if key is not None:
+                executed[key] = len(jobs)
+            sources.append((len(jobs), False))
+            jobs.append((await scheduler.spawn(handle(req))).wait())
+
+        batch_metrics.observe(calls=len(body), executed=len(jobs))
+        results = await asyncio.gather(*jobs)
+
+        resp_list = []
+        for req, (index, duplicate) in zip(body, sources):
+            resp = results[index]
+            if duplicate:
+                resp = {**resp, 'id': req['id']}
+
+            # Успешные уведомления остаются без ответа
+            if 'error' in resp or 'id' in resp:
+                resp_list.append(resp)
+
+        if not resp_list:
+            raise NoContent
+
+        return resp_list
+
+    def _get_read_only_methods(self) -> set[str]:
+        return {
+            route.name
+            for route in self.entrypoint.routes
+            if isinstance(route, MethodRoute) and getattr(route.func, 'read_only', False)
+        }
+
+
+def _dedupe_key(req: tp.Any, read_only_methods: set[str]) -> str | None:
+    """Ключ одинаковых вызовов; None, если вызов нужно выполнить отдельно"""
+    if not isinstance(req, dict) or 'id' not in req or req.get('method') not in read_only_methods:
+        return None
+
+    return json.dumps([req['method'], req.get('params')], sort_keys=True)
+
+
+class BatchEntrypoint(fastapi_jsonrpc.Entrypoint):
+    entrypoint_route_class = BatchEntrypointRoute
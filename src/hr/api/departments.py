@@ -0,0 +1,131 @@
+import contextvars
+import threading
+import time
+import typing as tp
+
+from django.conf import settings
+
+from hr import models
+from hr.db import aio
+from .encoding import Fragment
+from .encoding import encode
+
+if tp.TYPE_CHECKING:
+    from .schemas import DepartmentSchema
+
+
+class _Snapshot(tp.NamedTuple):
+    departments: dict[int, models.Department]
+    schemas: dict[int, 'DepartmentSchema']  #: в порядке сортировки по названию
+    encoded: bytes  #: ответ get_departments, закодированный в json
+    fragments: dict[int, Fragment]  #: json каждой схемы департамента
+    expires_at: float
+
+
+class DepartmentDirectory:
+    """Справочник департаментов в памяти процесса.
+
+    Хранит сами департаменты, готовый ответ get_departments и его json-представление.
+    Сбрасывается сигналами сохранения/удаления департамента (см. hr.signals)
+    и по TTL - на случай изменений из других процессов.
+
+    Асинхронный метод API не может читать БД синхронно, поэтому перед обращением к справочнику
+    вызывает aensure: снимок загружается через hr.db.aio и закрепляется за текущим запросом.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._snapshot: _Snapshot | None = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._pinned: contextvars.ContextVar[_Snapshot | None] = contextvars.ContextVar(
+            'department_snapshot', default=None,
+        )
+
+    def get(self, department_id: int) -> models.Department | None:
+        department = self._get_snapshot().departments.get(department_id)
+        if department is None:
+            # Департамент мог появиться в другом процессе
+            department = self._get_snapshot(reload=True).departments.get(department_id)
+
+        return department
+
+    def get_schema(self, department_id: int) -> 'DepartmentSchema':
+        schema = self._get_snapshot().schemas.get(department_id)
+        if schema is None:
+            schema = self._get_snapshot(reload=True).schemas[department_id]
+
+        return schema
+
+    def list_schemas(self) -> list['DepartmentSchema']:
+        return list(self._get_snapshot().schemas.values())
+
+    def encoded(self) -> bytes:
+        return self._get_snapshot().encoded
+
+    def get_fragment(self, schema: 'DepartmentSchema') -> Fragment | None:
+        """Готовый json схемы, если она взята из текущего снимка; БД не читает"""
+        snapshot = self._pinned.get() or self._snapshot
+        if snapshot is None or snapshot.schemas.get(schema.id) is not schema:
+            return None
+
+        return snapshot.fragments[schema.id]
+
+    async def aensure(self, department_ids: tp.Iterable[int] = ()):
+        """Подготовить справочник для асинхронного метода.
+
+        Загружает снимок, если его нет, он устарел или в нем нет каких-то из department_ids,
+        и закрепляет его до конца текущего запроса: дальнейшие обращения к справочнику не идут в БД.
+        """
+        snapshot = self._snapshot
+        if (
+            snapshot is None
+            or snapshot.expires_at <= time.monotonic()
+            or not snapshot.departments.keys() >= set(department_ids)
+        ):
+            generation = self._generation
+            snapshot = self._build(await aio.fetch(models.Department.objects.order_by('name')))
+            self._store(snapshot, generation)
+
+        self._pinned.set(snapshot)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._snapshot = None
+
+    def _get_snapshot(self, reload: bool = False) -> _Snapshot:
+        snapshot = self._pinned.get() if not reload else None
+        if snapshot is not None:
+            return snapshot
+
+        snapshot = self._snapshot
+        if snapshot is not None and not reload and snapshot.expires_at > time.monotonic():
+            return snapshot
+
+        generation = self._generation
+        snapshot = self._build(list(models.Department.objects.order_by('name')))
+        self._store(snapshot, generation)
+        return snapshot
+
+    def _store(self, snapshot: _Snapshot, generation: int):
+        with self._lock:
+            # Пока грузили, департаменты могли измениться - такой снимок не сохраняем
+            if generation == self._generation:
+                self._snapshot = snapshot
+
+    def _build(self, departments: list[models.Department]) -> _Snapshot:
+        from .schemas import DepartmentSchema
+
+        schemas = {department.id: DepartmentSchema.from_model(department) for department in departments}
+
+        return _Snapshot(
+            departments={department.id: department for department in departments},
+            schemas=schemas,
+            encoded=encode(list(schemas.values())),
+            fragments={department_id: Fragment(encode(schema)) for department_id, schema in schemas.items()},
+            expires_at=time.monotonic() + self.ttl,
+        )
+
+
+department_directory = DepartmentDirectory(ttl=settings.DEPARTMENT_CACHE_TTL)
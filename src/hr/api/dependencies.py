@@ -6,8 +6,10 @@ from starlette.requests import Request
 
 from hr import models
 from hr import security
+from hr.sessions import session_cache
 from . import errors
 from .pagination import PaginationParams, AnyPagination
+from .pagination import PaginationCursorParams
 from .pagination import PaginationInfinityScrollParams
 
 
@@ -41,8 +43,7 @@ class UserGetter:
         if self.allowed_roles is not None and token.user_role not in self.allowed_roles:
             raise errors.Forbidden
 
-        # TODO: возвращать данные сессии, а не пользователя из БД
-        user = models.User.objects.get_or_none(id=token.user_id)
+        user = session_cache.get_user(token.user_id)
 
         if user is None:
             raise errors.Forbidden
@@ -55,8 +56,12 @@ def get_mutual_exclusive_pagination(
     pagination_scroll: PaginationInfinityScrollParams | None = fastapi_jsonrpc.Body(
         None, title='Бесконечный скроллинг',
     ),
+    pagination_cursor: PaginationCursorParams | None = fastapi_jsonrpc.Body(
+        None, title='Курсорная пагинация',
+    ),
 ) -> AnyPagination:
-    if pagination is not None and pagination_scroll is not None:
+    passed = [p for p in (pagination, pagination_scroll, pagination_cursor) if p is not None]
+    if len(passed) > 1:
         raise fastapi_jsonrpc.InvalidParams
 
-    return pagination or pagination_scroll or PaginationParams()
+    return pagination or pagination_scroll or pagination_cursor or PaginationParams()
@@ -0,0 +1,169 @@
+"""Кодирование ответов JSON-RPC через orjson.
+
+Стандартный путь fastapi_jsonrpc валидирует результат метода повторно, переводит его в dict
+через jsonable_encoder и кодирует stdlib json. Здесь результат, уже собранный из схем ответа,
+кодируется напрямую: схемы pydantic разворачиваются в dict по одному уровню в default-хуке orjson.
+
+В ответ можно вставить заранее закодированный json (Fragment): например, справочник департаментов
+кодируется один раз при загрузке (см. DepartmentDirectory), а не на каждый запрос.
+Схема, у которой есть готовое представление, возвращает его из метода `json_fragment()`.
+"""
+import datetime as dt
+import decimal
+import inspect
+import re
+import secrets
+import typing as tp
+
+import fastapi_jsonrpc
+import orjson
+from fastapi.dependencies.utils import solve_dependencies
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import serialize_response
+from fastapi_jsonrpc import BaseError
+from fastapi_jsonrpc import invalid_params_from_validation_error
+from pydantic import BaseModel
+from pydantic.fields import ModelField
+from pydantic.fields import SHAPE_LIST
+from pydantic.fields import SHAPE_SINGLETON
+from starlette.responses import JSONResponse
+
+
+class Fragment:
+    """Закодированный json, который вставляется в ответ как есть"""
+
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __repr__(self):
+        return f'Fragment({self.data!r})'
+
+
+# На место фрагмента orjson пишет строку-метку, затем метка заменяется байтами фрагмента.
+# Случайная часть не дает подделать метку строкой из пользовательских данных
+_PLACEHOLDER = f'\0{secrets.token_hex(8)}:'
+_PLACEHOLDER_RE = re.compile(re.escape(orjson.dumps(_PLACEHOLDER)[:-1]) + rb'(\d+)"')
+
+
+def encode(content: tp.Any) -> bytes:
+    """Закодировать в json данные со схемами pydantic и фрагментами"""
+    fragments: list[bytes] = []
+
+    def default(obj: tp.Any) -> tp.Any:
+        if isinstance(obj, BaseModel):
+            json_fragment = getattr(obj, 'json_fragment', None)
+            fragment = json_fragment() if json_fragment is not None else None
+            if fragment is None:
+                return {field.alias: getattr(obj, name) for name, field in obj.__fields__.items()}
+            obj = fragment
+
+        if isinstance(obj, Fragment):
+            fragments.append(obj.data)
+            return f'{_PLACEHOLDER}{len(fragments) - 1}'
+
+        if isinstance(obj, (dt.date, dt.time)):
+            # Подклассы datetime (например, из freezegun) orjson сам не кодирует
+            return obj.isoformat()
+
+        if isinstance(obj, decimal.Decimal):
+            return float(obj)
+
+        if isinstance(obj, (set, frozenset)):
+            return list(obj)
+
+        raise TypeError
+
+    data = orjson.dumps(content, default=default)
+    if fragments:
+        data = _PLACEHOLDER_RE.sub(lambda match: fragments[int(match.group(1))], data)
+
+    return data
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content: tp.Any) -> bytes:
+        return encode(content)
+
+
+def _is_built(result: tp.Any, field: ModelField) -> bool:
+    """Собран ли результат метода из схем ответа - тогда повторная валидация не нужна"""
+    if isinstance(result, Fragment):
+        return True
+
+    if not inspect.isclass(field.type_) or not issubclass(field.type_, BaseModel):
+        return False
+
+    if field.shape == SHAPE_SINGLETON:
+        return isinstance(result, field.type_)
+
+    if field.shape == SHAPE_LIST:
+        return isinstance(result, list) and all(isinstance(item, field.type_) for item in result)
+
+    return False
+
+
+class EncodedMethodRoute(fastapi_jsonrpc.MethodRoute):
+    """Метод API, ответ которого кодируется через encode.
+
+    Результат, собранный из схем ответа (или Fragment), передается в ответ как есть,
+    остальные результаты проходят стандартную валидацию и jsonable_encoder.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('response_class', OrjsonResponse)
+        super().__init__(*args, **kwargs)
+        self._result_field: ModelField = self.response_model.__fields__['result']
+
+    async def handle_req(
+        self,
+        http_request,
+        background_tasks,
+        sub_response,
+        ctx,
+        dependency_cache: dict = None,
+        shared_dependencies_error: BaseError = None,
+    ):
+        # Повторяет MethodRoute.handle_req, кроме сериализации результата
+        await ctx.enter_middlewares(self.middlewares)
+
+        if shared_dependencies_error:
+            raise shared_dependencies_error
+
+        dependency_cache = dependency_cache.copy()
+
+        values, errors, background_tasks, _, _ = await solve_dependencies(
+            request=http_request,
+            dependant=self.func_dependant,
+            body=ctx.request.params,
+            background_tasks=background_tasks,
+            response=sub_response,
+            dependency_overrides_provider=self.dependency_overrides_provider,
+            dependency_cache=dependency_cache,
+        )
+
+        if errors:
+            raise invalid_params_from_validation_error(RequestValidationError(errors))
+
+        result = await self.call(values)
+        return await self.serialize(result)
+
+    async def call(self, values: dict[str, tp.Any]) -> tp.Any:
+        """Вызвать функцию метода с решенными зависимостями"""
+        # Через модуль, а не импортированное имя: тесты подменяют call_sync_async (см. tests/conftest.py)
+        return await fastapi_jsonrpc.call_sync_async(self.func, **values)
+
+    async def serialize(self, result: tp.Any) -> dict[str, tp.Any]:
+        """Собрать ответ JSON-RPC из результата метода"""
+        if _is_built(result, self._result_field):
+            return {'jsonrpc': '2.0', 'result': result}
+
+        return await serialize_response(
+            field=self.secure_cloned_response_field,
+            response_content={'jsonrpc': '2.0', 'result': result},
+            include=self.response_model_include,
+            exclude=self.response_model_exclude,
+            by_alias=self.response_model_by_alias,
+            exclude_unset=self.response_model_exclude_unset,
+        )
@@ -1,23 +1,47 @@
-from django.contrib.auth.hashers import make_password
+from asgiref.sync import sync_to_async
 from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from fastapi import Body
 from fastapi import Depends
-from fastapi_jsonrpc import Entrypoint
 
+from hr import hashers
 from hr import models
+from hr.matching import matching_engine
 from hr import security
+from hr.db import aio
 from . import errors
 from . import schemas
+from .batch import BatchEntrypoint
+from .batch import read_only
+from .departments import department_directory
+from .encoding import Fragment
+from .encoding import OrjsonResponse
 from .dependencies import UserGetter
 from .dependencies import get_mutual_exclusive_pagination
+from .metrics import InstrumentedEntrypointRoute
+from .metrics import InstrumentedMethodRoute
+from .metrics import query_budget
 from .pagination import AnyPagination
+from .pagination import RankedPaginator
 from .pagination import TypedPaginator, PaginatedResponse
+from .pagination import TypedPaginatorWithCustomParams
 
-api_v1 = Entrypoint(
+
+class _Entrypoint(BatchEntrypoint):
+    # Ответы кодируются через orjson (см. hr.api.encoding), вызовы учитываются в метриках (см. hr.api.metrics)
+    entrypoint_route_class = InstrumentedEntrypointRoute
+    method_route_class = InstrumentedMethodRoute
+
+
+api_v1 = _Entrypoint(
     '/api/v1/web/jsonrpc',
     name='web',
     summary='Web JSON_RPC entrypoint',
+    response_class=OrjsonResponse,
 )
 
 
@@ -32,28 +56,33 @@ api_v1 = Entrypoint(
         errors.DepartmentNotFound,
     ],
 )
-def register(
+async def register(
     user_data: schemas.RegistrationSchema = Body(..., title='Данные для создания пользователя'),
 ) -> schemas.UserSchema:
-    department = models.Department.objects.get_or_none(id=user_data.department_id)
+    # thread_sensitive=False: обращения к БД выполняются в пуле потоков (DjangoThreadPoolExecutor),
+    # а не в единственном общем потоке asgiref, через который прошли бы все запросы авторизации
+    department = await sync_to_async(department_directory.get, thread_sensitive=False)(user_data.department_id)
     if department is None:
         raise errors.DepartmentNotFound
 
-    user, created = models.User.objects.get_or_create(
+    password = await hashers.make_password(user_data.password)
+
+    user, created = await sync_to_async(models.User.objects.get_or_create, thread_sensitive=False)(
         email=user_data.email,
         defaults={
-            'password': make_password(user_data.password),
+            'password': password,
             'first_name': user_data.first_name,
             'last_name': user_data.last_name,
             'patronymic': user_data.patronymic,
-            'department_id': user_data.department_id,
+            'department': department,
         }
     )
 
     if not created:
         raise errors.UserAlreadyExists
 
-    return schemas.UserSchema.from_model(user)
+    # Справочник департаментов может обратиться к БД
+    return await sync_to_async(schemas.UserSchema.from_model, thread_sensitive=False)(user)
 
 
 @api_v1.method(
@@ -64,26 +93,34 @@ def register(
         errors.Forbidden
     ]
 )
-def login(
+async def login(
     credentials: schemas.LoginSchema = Body(..., ),
 ) -> schemas.LoginResponseSchema:
-    user = models.User.objects.get_or_none(email=credentials.email)
+    user = await sync_to_async(models.User.objects.get_or_none, thread_sensitive=False)(email=credentials.email)
 
     if user is None:
         raise errors.Forbidden
 
-    if not user.check_password(credentials.password):
+    if not await hashers.check_password(credentials.password, user.password):
         raise errors.Forbidden
 
+    if hashers.must_update(user.password):
+        user.password = await hashers.make_password(credentials.password)
+        await sync_to_async(user.save, thread_sensitive=False)(update_fields=('password',))
+
     token = security.encode_jwt(user)
 
-    return schemas.LoginResponseSchema(token=token, user=schemas.UserSchema.from_model(user))
+    user_schema = await sync_to_async(schemas.UserSchema.from_model, thread_sensitive=False)(user)
+
+    return schemas.LoginResponseSchema(token=token, user=user_schema)
 
 
 @api_v1.method(
     tags=['auth'],
     summary='Получить информацию об авторизованном пользователе',
 )
+@read_only
+@query_budget(2)
 def get_current_user(
     user: models.User = Depends(
         UserGetter()
@@ -95,10 +132,12 @@ def get_current_user(
 @api_v1.method(
     tags=['departments']
 )
-def get_departments() -> list[schemas.DepartmentSchema]:
-    # TODO: кэшировать!
-    departments = models.Department.objects.order_by('name').all()
-    return [schemas.DepartmentSchema.from_model(department) for department in departments]
+@read_only
+@query_budget(1)
+async def get_departments() -> list[schemas.DepartmentSchema]:
+    await department_directory.aensure()
+    # Справочник хранит готовый json ответа
+    return Fragment(department_directory.encoded())
 
 
 # МЕТОДЫ ДЛЯ СОИСКАТЕЛЯ
@@ -147,6 +186,8 @@ def create_resume(
         errors.ResumeNotFound,
     ]
 )
+@read_only
+@query_budget(3)
 def get_resume_for_applicant(
     user: models.User = Depends(
         UserGetter(
@@ -170,6 +211,8 @@ def get_resume_for_applicant(
     tags=['applicant'],
     summary='Получить список резюме',
 )
+@read_only
+@query_budget(3)
 def get_resumes_for_applicant(
     user: models.User = Depends(
         UserGetter(
@@ -187,6 +230,7 @@ def get_resumes_for_applicant(
         user_id=user.id,
         **filters
     )
+    resumes = schemas.ResumeForApplicantSchema.query_plan.apply(resumes)
 
     return [schemas.ResumeForApplicantSchema.from_model(resume) for resume in resumes]
 
@@ -337,16 +381,18 @@ def update_resume(
         errors.VacancyNotFound,
     ],
 )
-def get_vacancy_for_applicant(
+@read_only
+@query_budget(3)
+async def get_vacancy_for_applicant(
     _: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.APPLICANT]),
     ),
     vacancy_id: int = Body(..., title='ID вакансии', alias='id'),
 ) -> schemas.VacancyForApplicantSchema:
-    vacancy = (
+    vacancy = await aio.first(
         models.Vacancy.objects
-        .select_related('creator', 'creator__department')
-        .get_or_none(
+        .select_related('creator')
+        .filter(
             id=vacancy_id,
             state=models.VacancyState.PUBLISHED,
         )
@@ -355,6 +401,7 @@ def get_vacancy_for_applicant(
     if vacancy is None:
         raise errors.VacancyNotFound
 
+    await department_directory.aensure([vacancy.department_id])
     return schemas.VacancyForApplicantSchema.from_model(vacancy)
 
 
@@ -362,7 +409,9 @@ def get_vacancy_for_applicant(
     tags=['applicant'],
     summary=['Получить список вакансий для соискателя'],
 )
-def get_vacancies_for_applicant(
+@read_only
+@query_budget(4)
+async def get_vacancies_for_applicant(
     _: models.User = Depends(UserGetter()),
     any_pagination: AnyPagination = Depends(get_mutual_exclusive_pagination),
     filters: schemas.VacancyFiltersForApplicant | None = Body(
@@ -377,7 +426,6 @@ def get_vacancies_for_applicant(
 
     query = (
         models.Vacancy.objects
-        .select_related('creator', 'creator__department')
         .filter(
             state__exact=models.VacancyState.PUBLISHED,
             **filters,
@@ -386,7 +434,34 @@ def get_vacancies_for_applicant(
     )
 
     paginator = TypedPaginator(schemas.ShortVacancyForApplicantSchema, query)
-    return paginator.get_response(any_pagination)
+    return await paginator.aget_response(
+        any_pagination,
+        prepare=lambda rows: department_directory.aensure(row.department_id for row in rows),
+    )
+
+
+@api_v1.method(
+    tags=['applicant'],
+    summary='Получить ленту рекомендованных вакансий',
+)
+@read_only
+@query_budget(3)
+async def get_recommended_vacancies_for_applicant(
+    user: models.User = Depends(
+        UserGetter(allowed_roles=[models.UserRole.APPLICANT]),
+    ),
+    any_pagination: AnyPagination = Depends(get_mutual_exclusive_pagination),
+) -> PaginatedResponse[schemas.RecommendedVacancySchema]:
+    # Лента заранее посчитана (см. hr.recommendations), страница читается по индексу (user, -score, -id)
+    query = models.VacancyRecommendation.objects.filter(
+        user_id=user.id,
+    ).order_by('-score', '-id')
+
+    paginator = TypedPaginator(schemas.RecommendedVacancySchema, query)
+    return await paginator.aget_response(
+        any_pagination,
+        prepare=lambda rows: department_directory.aensure(row.vacancy__department_id for row in rows),
+    )
 
 
 @api_v1.method(
@@ -436,6 +511,11 @@ def respond_vacancy(
     if not created:
         raise errors.VacancyResponseAlreadyExists
 
+    models.Vacancy.objects.filter(id=vacancy.id).update(
+        responses_count=F('responses_count') + 1,
+        new_responses_count=F('new_responses_count') + 1,
+    )
+
     return schemas.VacancyResponseSchema.from_model(vacancy_response)
 
 
@@ -454,6 +534,7 @@ def create_vacancy(
 ) -> schemas.VacancyForManagerSchema:
     vacancy = models.Vacancy.objects.create(
         creator=user,
+        department_id=user.department_id,
         position=vacancy_data.position,
         experience=vacancy_data.experience,
         description=vacancy_data.description,
@@ -469,6 +550,8 @@ def create_vacancy(
         errors.VacancyNotFound,
     ],
 )
+@read_only
+@query_budget(4)
 def get_vacancy_for_manager(
     user: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.MANAGER]),
@@ -477,7 +560,7 @@ def get_vacancy_for_manager(
 ) -> schemas.VacancyForManagerSchema:
     vacancy = models.Vacancy.objects.get_or_none(
         id=vacancy_id,
-        creator__department_id=user.department_id,
+        department_id=user.department_id,
     )
 
     if vacancy is None:
@@ -486,10 +569,37 @@ def get_vacancy_for_manager(
     return schemas.VacancyForManagerSchema.from_model(vacancy)
 
 
+@api_v1.method(
+    tags=['manager'],
+    summary='Отметить отклики на вакансию просмотренными',
+    description='Обнуляет счетчик новых откликов вакансии',
+    errors=[
+        errors.VacancyNotFound,
+    ],
+)
+def mark_vacancy_responses_as_viewed(
+    user: models.User = Depends(
+        UserGetter(allowed_roles=[models.UserRole.MANAGER]),
+    ),
+    vacancy_id: int = Body(..., title='ID вакансии', alias='id'),
+) -> schemas.ShortVacancyForManagerSchema:
+    query = models.Vacancy.objects.filter(
+        id=vacancy_id,
+        department_id=user.department_id,
+    )
+
+    if not query.update(new_responses_count=0):
+        raise errors.VacancyNotFound
+
+    return schemas.ShortVacancyForManagerSchema.from_model(query.select_related('creator').get())
+
+
 @api_v1.method(
     tags=['manager'],
     summary='Получить список вакансий для менеджера',
 )
+@read_only
+@query_budget(4)
 def get_vacancies_for_manager(
     user: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.MANAGER]),
@@ -499,7 +609,7 @@ def get_vacancies_for_manager(
         None,
         title='Фильтры',
     ),
-) -> PaginatedResponse[schemas.ShortVacancyForManagerSchema]:
+) -> schemas.VacanciesForManagerResponse[schemas.ShortVacancyForManagerSchema]:
     if filters is None:
         filters = {}
     else:
@@ -508,16 +618,23 @@ def get_vacancies_for_manager(
     query = (
         models.Vacancy.objects
         .filter(
-            creator__department_id=user.department_id,
+            department_id=user.department_id,
             **filters,
         )
-        .select_related(
-            'creator', 'creator__department',
-        )
         .order_by('-id')
     )
 
-    paginator = TypedPaginator(schemas.ShortVacancyForManagerSchema, query)
+    paginator = TypedPaginatorWithCustomParams(
+        schemas.ShortVacancyForManagerSchema,
+        query,
+        schemas.VacanciesForManagerResponse,
+    )
+    # Суммы по счетчикам вакансий и точное количество (count_mode=EXACT) считаются одним запросом
+    paginator.set_custom_params({
+        'responses_count': Coalesce(Sum('responses_count'), 0),
+        'new_responses_count': Coalesce(Sum('new_responses_count'), 0),
+        'total_size': Count('id'),
+    })
     return paginator.get_response(any_pagination)
 
 
@@ -625,7 +742,9 @@ def hide_vacancy(
     tags=['manager'],
     summary=['Получить список соискателей'],
 )
-def get_applicants_for_manager(
+@read_only
+@query_budget(3)
+async def get_applicants_for_manager(
     _: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.MANAGER]),
     ),
@@ -644,13 +763,18 @@ def get_applicants_for_manager(
         query = filterer.filter_query(query)
 
     paginator = TypedPaginator(schemas.ShortApplicantSchema, query)
-    return paginator.get_response(any_pagination)
+    return await paginator.aget_response(
+        any_pagination,
+        prepare=lambda rows: department_directory.aensure(row.department_id for row in rows),
+    )
 
 
 @api_v1.method(
     tags=['manager'],
     summary='Получить список резюме для менеджера',
 )
+@read_only
+@query_budget(5)
 def get_resumes_for_manager(
     _: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.MANAGER]),
@@ -660,9 +784,7 @@ def get_resumes_for_manager(
 ) -> PaginatedResponse[schemas.ResumeForManagerSchema]:
     query = models.Resume.objects.filter(
         state__exact=models.ResumeState.PUBLISHED,
-    ).select_related(
-        'user',
-    ).order_by('-published_at')
+    ).order_by('-published_at', '-id')
 
     if filterer is not None:
         query = filterer.filter_query(query)
@@ -671,20 +793,66 @@ def get_resumes_for_manager(
     return paginator.get_response(any_pagination)
 
 
+@api_v1.method(
+    tags=['manager'],
+    summary='Подобрать резюме к вакансии',
+    errors=[
+        errors.VacancyNotFound,
+    ],
+)
+@read_only
+@query_budget(7)
+def get_matching_resumes_for_vacancy(
+    user: models.User = Depends(
+        UserGetter(allowed_roles=[models.UserRole.MANAGER]),
+    ),
+    vacancy_id: int = Body(..., title='ID вакансии', alias='id'),
+    any_pagination: AnyPagination = Depends(get_mutual_exclusive_pagination),
+) -> PaginatedResponse[schemas.MatchingResumeSchema]:
+    vacancy = models.Vacancy.objects.get_or_none(
+        id=vacancy_id,
+        department_id=user.department_id,
+    )
+
+    if vacancy is None:
+        raise errors.VacancyNotFound
+
+    query = models.Resume.objects.filter(
+        state__exact=models.ResumeState.PUBLISHED,
+    )
+
+    paginator = RankedPaginator(schemas.MatchingResumeSchema, query, matching_engine.get_ranking(vacancy))
+    return paginator.get_response(any_pagination)
+
+
 @api_v1.method(
     tags=['manager'],
     summary='Получить список откликов на вакансию для менеджера',
 )
+@read_only
+@query_budget(4)
 def get_vacancy_responses_for_manager(
     user: models.User = Depends(
         UserGetter(allowed_roles=[models.UserRole.MANAGER]),
     ),
     any_pagination: AnyPagination = Depends(get_mutual_exclusive_pagination),
+    filters: schemas.VacancyResponseFiltersForManager | None = Body(
+        None,
+        title='Фильтры',
+    ),
 ) -> PaginatedResponse[schemas.VacancyResponseSchema]:
-    query = models.VacancyResponse.objects.filter(
-        vacancy__creator__department_id=user.department_id,
-    ).select_related(
-        'vacancy', 'vacancy__creator', 'resume', 'resume__user',
+    if filters is None:
+        filters = {}
+    else:
+        filters = filters.dict(exclude_none=True)
+
+    query = (
+        models.VacancyResponse.objects
+        .filter(
+            vacancy__department_id=user.department_id,
+            **filters,
+        )
+        .order_by('-created_at', '-id')
     )
 
     paginator = TypedPaginator(schemas.VacancyResponseSchema, query)
@@ -0,0 +1,292 @@
+"""Метрики вызовов методов JSON-RPC.
+
+Для каждого вызова считаются запросы к БД и их время (см. hr.db.metrics.QueryStats),
+ожидание свободного потока или соединения, время сериализации ответа и общее время вызова.
+Метрики копятся по методам в method_metrics и отдаются в формате Prometheus (render_prometheus)
+вместе с метриками соединений и batch-запросов. Сводка по HTTP-запросу (по всем вызовам batch)
+возвращается в заголовке Server-Timing.
+
+По завершении вызова его запросы проверяются на N+1 и на бюджет метода (см. query_budget, hr.db.detector).
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+import typing as tp
+
+import fastapi_jsonrpc
+
+from hr.db import detector
+from hr.db.metrics import QueryStats
+from hr.db.metrics import Timing
+from hr.db.metrics import collect_query_stats
+from hr.db.metrics import observe_call_wait
+from hr.db.metrics import pool_metrics
+
+from .batch import BatchEntrypointRoute
+from .batch import batch_metrics
+from .encoding import EncodedMethodRoute
+from .encoding import Fragment
+from .encoding import encode
+
+_FuncT = tp.TypeVar('_FuncT', bound=tp.Callable)
+
+
+def query_budget(queries: int) -> tp.Callable[[_FuncT], _FuncT]:
+    """Объявить наибольшее число запросов к БД за вызов метода API, включая зависимости.
+
+    Превышение логируется, а в тестах tests/api проваливает тест (см. tests/fixtures/query_budget.py).
+    """
+    def decorator(func: _FuncT) -> _FuncT:
+        func.query_budget = queries
+        return func
+
+    return decorator
+
+
+class MethodStats:
+    """Метрики одного метода API; queries - количество запросов к БД на вызов"""
+
+    def __init__(self):
+        self.errors = 0
+        self.duration = Timing()
+        self.queries = Timing()
+        self.db = Timing()
+        self.wait = Timing()
+        self.serialize = Timing()
+
+    def as_dict(self) -> dict[str, tp.Any]:
+        return {
+            'errors': self.errors,
+            'duration': self.duration.as_dict(),
+            'queries': self.queries.as_dict(),
+            'db': self.db.as_dict(),
+            'wait': self.wait.as_dict(),
+            'serialize': self.serialize.as_dict(),
+        }
+
+
+class MethodMetrics:
+    """Метрики вызовов по методам API"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._methods: dict[str, MethodStats] = {}
+
+    def observe(self, method: str, timing: 'CallTiming'):
+        with self._lock:
+            stats = self._methods.get(method)
+            if stats is None:
+                stats = self._methods[method] = MethodStats()
+
+            stats.errors += timing.error
+            stats.duration.observe(timing.duration)
+            stats.queries.observe(timing.stats.queries)
+            stats.db.observe(timing.stats.db_time)
+            stats.wait.observe(timing.stats.wait)
+            stats.serialize.observe(timing.serialize)
+
+    def snapshot(self) -> dict[str, dict[str, tp.Any]]:
+        with self._lock:
+            return {method: stats.as_dict() for method, stats in sorted(self._methods.items())}
+
+
+method_metrics = MethodMetrics()
+
+
+class CallTiming:
+    """Замеры одного вызова метода"""
+
+    __slots__ = ('stats', 'serialize', 'duration', 'error')
+
+    def __init__(self, method: str):
+        self.stats = QueryStats(method)
+        self.serialize = 0.0
+        self.duration = 0.0
+        self.error = False
+
+
+class ServerTiming:
+    """Сводка по вызовам одного HTTP-запроса для заголовка Server-Timing"""
+
+    def __init__(self):
+        self.calls: list[CallTiming] = []
+
+    def header(self) -> str:
+        queries = sum(call.stats.queries for call in self.calls)
+        metrics = [
+            ('db', sum(call.stats.db_time for call in self.calls), f'{queries} queries'),
+            ('wait', sum(call.stats.wait for call in self.calls), None),
+            ('serialize', sum(call.serialize for call in self.calls), None),
+            ('app', sum(call.duration for call in self.calls), f'{len(self.calls)} calls'),
+        ]
+        return ', '.join(
+            f'{name};dur={seconds * 1e3:.1f}' + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in metrics
+        )
+
+
+_server_timing: contextvars.ContextVar[ServerTiming | None] = contextvars.ContextVar('server_timing', default=None)
+_call_timing: contextvars.ContextVar[CallTiming | None] = contextvars.ContextVar('call_timing', default=None)
+
+
+class InstrumentedMethodRoute(EncodedMethodRoute):
+    """Метод API, вызовы которого учитываются в method_metrics и заголовке Server-Timing"""
+
+    async def handle_req(self, *args, **kwargs):
+        timing = CallTiming(self.name)
+        token = _call_timing.set(timing)
+        started = time.monotonic()
+        try:
+            # Контекст копируется в потоки anyio, поэтому запросы зависимостей и самого метода
+            # учитываются, в каком бы потоке они ни выполнялись
+            with collect_query_stats(timing.stats):
+                return await super().handle_req(*args, **kwargs)
+        except BaseException:
+            timing.error = True
+            raise
+        finally:
+            timing.duration = time.monotonic() - started
+            _call_timing.reset(token)
+            method_metrics.observe(self.name, timing)
+            detector.check_call(
+                self.name,
+                queries=timing.stats.queries,
+                duration=timing.duration,
+                shapes=timing.stats.shapes.values(),
+                budget=getattr(self.func, 'query_budget', None),
+            )
+            server_timing = _server_timing.get()
+            if server_timing is not None:
+                server_timing.calls.append(timing)
+
+    async def call(self, values: dict[str, tp.Any]) -> tp.Any:
+        if asyncio.iscoroutinefunction(self.func):
+            return await super().call(values)
+
+        func = self.func
+        submitted_at = time.monotonic()
+
+        # Ожидание свободного потока - от вызова до начала выполнения функции в потоке
+        @functools.wraps(func)
+        def wrapper(**kwargs):
+            observe_call_wait(time.monotonic() - submitted_at)
+            return func(**kwargs)
+
+        return await fastapi_jsonrpc.call_sync_async(wrapper, **values)
+
+    async def serialize(self, result: tp.Any) -> dict[str, tp.Any]:
+        started = time.monotonic()
+        resp = await super().serialize(result)
+        if not isinstance(resp['result'], Fragment):
+            # Кодируется здесь, а не при отправке ответа, чтобы время попало в метрики этого вызова
+            resp['result'] = Fragment(encode(resp['result']))
+
+        timing = _call_timing.get()
+        if timing is not None:
+            timing.serialize = time.monotonic() - started
+
+        return resp
+
+
+class InstrumentedEntrypointRoute(BatchEntrypointRoute):
+    """Точка входа API, которая возвращает сводку по вызовам в заголовке Server-Timing"""
+
+    async def handle_body(self, http_request, background_tasks, sub_response, body):
+        server_timing = ServerTiming()
+        token = _server_timing.set(server_timing)
+        try:
+            return await super().handle_body(http_request, background_tasks, sub_response, body)
+        finally:
+            _server_timing.reset(token)
+            sub_response.headers['Server-Timing'] = server_timing.header()
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Exposition:
+    """Текстовый формат Prometheus"""
+
+    def __init__(self):
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f'# HELP {name} {help_text}')
+        self.lines.append(f'# TYPE {name} {kind}')
+
+    def sample(self, name: str, value: float, **labels: str):
+        if labels:
+            label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+            name = f'{name}{{{label_text}}}'
+        self.lines.append(f'{name} {value}')
+
+    def summary(self, name: str, help_text: str, timings: dict[tuple[tuple[str, str], ...], dict[str, float]]):
+        """Timing как summary без квантилей (count, sum) и отдельный gauge максимума"""
+        self.family(name, 'summary', help_text)
+        for labels, timing in timings.items():
+            self.sample(f'{name}_count', timing['count'], **dict(labels))
+            self.sample(f'{name}_sum', timing['total'], **dict(labels))
+
+        self.family(f'{name}_max', 'gauge', f'{help_text}, максимум')
+        for labels, timing in timings.items():
+            self.sample(f'{name}_max', timing['max'], **dict(labels))
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+_METHOD_SUMMARIES = {
+    'duration': ('hr_jsonrpc_call_seconds', 'Время вызова метода JSON-RPC'),
+    'queries': ('hr_jsonrpc_call_db_queries', 'Количество запросов к БД за вызов метода'),
+    'db': ('hr_jsonrpc_call_db_seconds', 'Время запросов к БД за вызов метода'),
+    'wait': ('hr_jsonrpc_call_wait_seconds', 'Ожидание потока или соединения с БД за вызов метода'),
+    'serialize': ('hr_jsonrpc_call_serialize_seconds', 'Сериализация ответа метода'),
+}
+
+_POOL_SUMMARIES = {
+    'wait': ('hr_db_thread_wait_seconds', 'Ожидание свободного потока в DjangoThreadPoolExecutor'),
+    'checkout': ('hr_db_checkout_seconds', 'Выдача соединения с БД перед запросом'),
+    'connect': ('hr_db_connect_seconds', 'Открытие соединения с БД'),
+    'async_checkout': ('hr_db_async_checkout_seconds', 'Ожидание и выдача соединения из асинхронного пула'),
+}
+
+
+def render_prometheus() -> str:
+    """Метрики методов API, соединений с БД и batch-запросов в текстовом формате Prometheus"""
+    exposition = _Exposition()
+
+    methods = method_metrics.snapshot()
+    for key, (name, help_text) in _METHOD_SUMMARIES.items():
+        exposition.summary(name, help_text, {(('method', method),): stats[key] for method, stats in methods.items()})
+
+    exposition.family('hr_jsonrpc_call_errors_total', 'counter', 'Вызовы метода JSON-RPC, завершившиеся ошибкой')
+    for method, stats in methods.items():
+        exposition.sample('hr_jsonrpc_call_errors_total', stats['errors'], method=method)
+
+    pool = pool_metrics.snapshot()
+    for key, (name, help_text) in _POOL_SUMMARIES.items():
+        exposition.summary(name, help_text, {(): pool[key]})
+
+    exposition.family('hr_db_health_check_failures_total', 'counter', 'Соединения с БД, не прошедшие проверку')
+    exposition.sample('hr_db_health_check_failures_total', pool['health_check_failures'])
+
+    batches = batch_metrics.snapshot()
+    for key, kind, help_text in (
+        ('batches', 'counter', 'Batch-запросы JSON-RPC'),
+        ('calls', 'counter', 'Вызовы в batch-запросах'),
+        ('executed', 'counter', 'Выполненные вызовы batch-запросов после удаления повторов'),
+    ):
+        exposition.family(f'hr_jsonrpc_batch_{key}_total', kind, help_text)
+        exposition.sample(f'hr_jsonrpc_batch_{key}_total', batches[key])
+
+    exposition.family('hr_jsonrpc_batch_max_size', 'gauge', 'Наибольшее число вызовов в одном batch-запросе')
+    exposition.sample('hr_jsonrpc_batch_max_size', batches['max_size'])
+
+    return exposition.render()
@@ -1,13 +1,52 @@
+import base64
+import enum
+import json
 import typing as tp
-
+import warnings
+
+import fastapi_jsonrpc
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.core.exceptions import ValidationError
+from django.core.paginator import UnorderedObjectListWarning
+from django.db import connections
+from django.db.models import Count
+from django.db.models import F
+from django.db.models import Field as ModelField
+from django.db.models import Func
+from django.db.models import Q
 from django.db.models import QuerySet
+from django.db.models import Value
+from django.db.models import Window
+from django.db.models.lookups import GreaterThan
+from django.db.models.lookups import LessThan
 from pydantic import Field, BaseModel
+from pydantic import validator
 from pydantic.generics import GenericModel
 from pydantic.main import ModelMetaclass
 
+from hr.db import aio
+
 _ItemsT = tp.TypeVar('_ItemsT')
 
 
+class CountMode(str, enum.Enum):
+    EXACT = 'EXACT'  #: точный COUNT(*)
+    ESTIMATE = 'ESTIMATE'  #: оценка планировщика Postgres
+    CAPPED = 'CAPPED'  #: точный подсчет, но не больше порога ("1000+")
+
+
+_COUNT_MODE_FIELD = Field(
+    CountMode.EXACT,
+    title='Способ подсчета количества объектов',
+    description=(
+        'EXACT - точное количество; '
+        'ESTIMATE - оценка по статистике планировщика, быстро на больших таблицах; '
+        'CAPPED - точное количество, но не больше порога (в ответе total_size_is_exact=false, если порог достигнут)'
+    ),
+)
+
+
 class PaginationParams(BaseModel):
     page: int = Field(1, title='Страница', ge=1)
     per_page: int = Field(10, title='Лимит объектов в списке', ge=1, le=100)
@@ -15,6 +54,7 @@ class PaginationParams(BaseModel):
         False,
         title='Подсчитать количество доступных объектов и вернуть с ответом',
     )
+    count_mode: CountMode = _COUNT_MODE_FIELD
 
 
 class PaginationInfinityScrollParams(BaseModel):
@@ -33,9 +73,54 @@ class PaginationInfinityScrollParams(BaseModel):
         False,
         title='Подсчитать количество доступных объектов и вернуть с ответом',
     )
+    count_mode: CountMode = _COUNT_MODE_FIELD
+
+
+def encode_cursor(values: list[tp.Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[tp.Any]:
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(values, list) or not values:
+        raise ValueError('cursor should contain a non empty list')
+
+    return values
+
+
+class PaginationCursorParams(BaseModel):
+    cursor: str | None = Field(
+        None,
+        title='Курсор',
+        description='Значение next_cursor из предыдущего ответа. Если не передан - вернется первая страница',
+    )
+    limit: int = Field(
+        10,
+        title='Сколько объектов вернуть (макс.)',
+        gt=0,
+        le=100,
+        example=10,
+    )
+    count: bool = Field(
+        False,
+        title='Подсчитать количество доступных объектов и вернуть с ответом',
+    )
+    count_mode: CountMode = _COUNT_MODE_FIELD
+
+    @validator('cursor')
+    def validate_cursor(cls, value):
+        if value is None:
+            return value
+
+        try:
+            decode_cursor(value)
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
 
+        return value
 
-AnyPagination = PaginationParams | PaginationInfinityScrollParams
+
+AnyPagination = PaginationParams | PaginationInfinityScrollParams | PaginationCursorParams
 
 
 class BasePaginatedResponse(GenericModel):
@@ -45,35 +130,386 @@ class BasePaginatedResponse(GenericModel):
         example=100,
         description='Может быть null или отсутствовать, если запрос был сделан с count=false',
     )
+    total_size_is_exact: bool | None = Field(
+        None,
+        title='Является ли total_size точным значением',
+        description='false - total_size это оценка (count_mode=ESTIMATE) или порог подсчета (count_mode=CAPPED)',
+    )
+    next_cursor: str | None = Field(
+        None,
+        title='Курсор следующей страницы',
+        description='Заполняется только при курсорной пагинации, если есть еще объекты',
+    )
 
 
 class PaginatedResponse(BasePaginatedResponse, tp.Generic[_ItemsT]):
     items: list[_ItemsT] = Field(..., title='Объекты')
 
 
+class QueryPlan(tp.NamedTuple):
+    """Связанные объекты, которые нужны схеме для сборки из модели.
+
+    Пагинатор применяет план к запросу, поэтому страница собирается
+    фиксированным числом запросов, независимо от ее размера.
+    """
+    select_related: tuple[str, ...] = ()
+    prefetch_related: tuple[str, ...] = ()
+
+    def nested(self, prefix: str) -> 'QueryPlan':
+        """План для схемы, вложенной в поле `prefix`"""
+        return QueryPlan(
+            select_related=(prefix, *[f'{prefix}__{name}' for name in self.select_related]),
+            prefetch_related=tuple(f'{prefix}__{name}' for name in self.prefetch_related),
+        )
+
+    def __add__(self, other: 'QueryPlan') -> 'QueryPlan':
+        return QueryPlan(
+            select_related=self.select_related + other.select_related,
+            prefetch_related=self.prefetch_related + other.prefetch_related,
+        )
+
+    def apply(self, query: QuerySet) -> QuerySet:
+        if self.select_related:
+            query = query.select_related(*self.select_related)
+        if self.prefetch_related:
+            query = query.prefetch_related(*self.prefetch_related)
+        return query
+
+
+def nested_projection(prefix: str, projection: tuple[str, ...]) -> tuple[str, ...]:
+    """Колонки projection схемы, вложенной в поле `prefix` (см. TypedPaginator)"""
+    return tuple(f'{prefix}__{column}' for column in projection)
+
+
+def apply_query_plan(schema: tp.Any, query: QuerySet) -> QuerySet:
+    plan: QueryPlan | None = getattr(schema, 'query_plan', None)
+    if plan is None:
+        return query
+
+    return plan.apply(query)
+
+
+def estimate_count(query: QuerySet) -> int:
+    """Оценить количество объектов по статистике планировщика Postgres, не выполняя запрос.
+
+    Для запроса без фильтров берем reltuples таблицы, иначе - оценку строк из EXPLAIN.
+    """
+    with connections[query.db].cursor() as cursor:
+        if not query.query.where:
+            cursor.execute(_RELTUPLES_SQL, [query.model._meta.db_table])
+            row = cursor.fetchone()
+            # -1, если по таблице еще не собиралась статистика
+            if row is not None and row[0] >= 0:
+                return row[0]
+
+        explain = _explain(query)
+        if explain is None:
+            return 0
+
+        cursor.execute(*explain)
+        return _plan_rows(cursor.fetchone()[0])
+
+
+async def aestimate_count(query: QuerySet) -> int:
+    """Асинхронный вариант estimate_count"""
+    if not query.query.where:
+        rows = await aio.execute(_RELTUPLES_SQL, [query.model._meta.db_table], using=query.db)
+        if rows and rows[0][0] >= 0:
+            return rows[0][0]
+
+    explain = _explain(query)
+    if explain is None:
+        return 0
+
+    rows = await aio.execute(*explain, using=query.db)
+    return _plan_rows(rows[0][0])
+
+
+_RELTUPLES_SQL = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+
+
+def _explain(query: QuerySet) -> tuple[str, tuple[tp.Any, ...]] | None:
+    """EXPLAIN запроса; None, если запрос заведомо пустой (например, после .none())"""
+    try:
+        sql, params = query.order_by().query.get_compiler(using=query.db).as_sql()
+    except EmptyResultSet:
+        return None
+
+    return f'EXPLAIN (FORMAT JSON) {sql}', params
+
+
+def _plan_rows(plan: list | str) -> int:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class _Row(Func):
+    """Конструктор строки `(a, b, ...)` для построчного сравнения"""
+    template = '(%(expressions)s)'
+
+
+class Keyset:
+    """Ключи сортировки запроса для курсорной (keyset) пагинации.
+
+    Курсор хранит значения ключей сортировки последнего объекта страницы,
+    следующая страница начинается с условия `WHERE (k1, k2) < (v1, v2)`,
+    которое выполняется поиском по индексу вместо пропуска OFFSET строк.
+
+    Поддерживается сортировка только по собственным полям модели и аннотациям запроса,
+    ключи сортировки не должны принимать значение NULL.
+    Если среди ключей нет первичного ключа, он добавляется последним для однозначности порядка.
+    """
+
+    def __init__(self, query: QuerySet):
+        opts = query.model._meta
+        ordering = list(query.query.order_by) or list(opts.ordering)
+
+        self.keys: list[tuple[str, ModelField, bool]] = []  # (имя, поле, сортировка по убыванию)
+        for item in ordering:
+            assert isinstance(item, str), 'Курсорная пагинация поддерживает сортировку только по полям модели'
+            name = item.lstrip('-')
+            if name in query.query.annotations:
+                field = query.query.annotations[name].output_field
+            else:
+                field = opts.pk if name == 'pk' else opts.get_field(name)
+                assert not field.is_relation, 'Курсорная пагинация не поддерживает сортировку по связанным моделям'
+                name = field.name
+            self.keys.append((name, field, item.startswith('-')))
+
+        if not any(field.primary_key for _, field, _ in self.keys):
+            descending = self.keys[-1][2] if self.keys else False
+            self.keys.append((opts.pk.name, opts.pk, descending))
+
+    def order(self, query: QuerySet) -> QuerySet:
+        return query.order_by(
+            *[f'-{name}' if descending else name for name, _, descending in self.keys]
+        )
+
+    def get_cursor(self, obj: tp.Any) -> str:
+        values = []
+        for name, field, _ in self.keys:
+            if getattr(field, 'model', None) is None:
+                # Поле аннотации не привязано к модели, значение лежит в атрибуте с именем аннотации
+                values.append(str(getattr(obj, name)))
+            else:
+                values.append(field.value_to_string(obj))
+
+        return encode_cursor(values)
+
+    def seek(self, query: QuerySet, cursor: str) -> QuerySet:
+        """Отфильтровать объекты, следующие за курсором"""
+        raw_values = decode_cursor(cursor)
+        if len(raw_values) != len(self.keys):
+            raise fastapi_jsonrpc.InvalidParams
+
+        try:
+            values = [field.to_python(value) for (_, field, _), value in zip(self.keys, raw_values)]
+        except ValidationError:
+            raise fastapi_jsonrpc.InvalidParams
+
+        directions = {descending for _, _, descending in self.keys}
+        if len(directions) == 1:
+            lookup = LessThan if directions.pop() else GreaterThan
+            return query.filter(
+                lookup(
+                    _Row(*[F(name) for name, _, _ in self.keys], output_field=ModelField()),
+                    _Row(
+                        *[Value(value, output_field=field) for (_, field, _), value in zip(self.keys, values)],
+                        output_field=ModelField(),
+                    ),
+                ),
+            )
+
+        # Построчное сравнение невозможно при разных направлениях сортировки, раскрываем его через OR
+        condition = Q()
+        for index, (name, _, descending) in enumerate(self.keys):
+            step = Q(**{f'{name}__{"lt" if descending else "gt"}': values[index]})
+            for (prev_name, _, _), prev_value in zip(self.keys[:index], values):
+                step &= Q(**{prev_name: prev_value})
+            condition |= step
+
+        return query.filter(condition)
+
+
 _ST = tp.TypeVar('_ST')  # Schema Type
 
+# Без подчеркивания в начале: имя становится полем namedtuple строки в режиме projection
+_TOTAL_SIZE_ANNOTATION = 'window_total_size'
+
+
+class _Page(tp.NamedTuple):
+    objects: list[tp.Any]
+    has_next: bool
+    next_cursor: str | None = None
+    total_size: int | None = None
+    total_size_is_exact: bool | None = None
+
+
+class _Fetch(tp.NamedTuple):
+    """Вычитать объекты запроса"""
+    query: QuerySet
+
+
+class _Count(tp.NamedTuple):
+    """Посчитать объекты запроса"""
+    query: QuerySet
+
+
+class _Estimate(tp.NamedTuple):
+    """Оценить количество объектов запроса (см. estimate_count)"""
+    query: QuerySet
+
+
+#: Шаг сборки страницы: генератор отдает шаг, а получает обратно его результат.
+#: Так одна и та же логика пагинации выполняется и синхронным ORM, и асинхронно через hr.db.aio
+_Step = _Fetch | _Count | _Estimate
+_Steps = tp.Generator[_Step, tp.Any, _Page]
+
+
+def _run(steps: _Steps) -> _Page:
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+        if isinstance(step, _Fetch):
+            result = list(step.query)
+        elif isinstance(step, _Count):
+            result = step.query.count()
+        else:
+            result = estimate_count(step.query)
+
+
+async def _arun(steps: _Steps) -> _Page:
+    result = None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as stop:
+            return stop.value
+
+        if isinstance(step, _Fetch):
+            result = await aio.fetch(step.query)
+        elif isinstance(step, _Count):
+            result = await aio.count(step.query)
+        else:
+            result = await aestimate_count(step.query)
+
 
 class TypedPaginator(tp.Generic[_ST]):
-    def __init__(self, schema: tp.Type[_ST], query: QuerySet):
+    """Пагинация запроса со сборкой объектов страницы в схемы.
+
+    Если у схемы есть `projection` - кортеж колонок в формате values_list, страница вычитывается
+    через values_list без создания моделей, и схема собирается методом `.from_row(row)`, где row -
+    кортеж значений в порядке projection. Иначе вычитываются модели по плану запроса схемы
+    (см. QueryPlan), и схема собирается методом `.from_model`.
+    """
+
+    def __init__(self, schema: tp.Type[_ST], query: QuerySet, *, window_count: bool = True):
+        """
+        :param schema: схема объектов ответа
+        :param query: упорядоченный запрос
+        :param window_count: при count=true считать общее количество объектов
+            оконной функцией `COUNT(*) OVER ()` в том же запросе, что и страницу
+        """
         self.schema = schema
-        self.query = query
+        self.projection: tuple[str, ...] | None = getattr(schema, 'projection', None)
+        self.query = query if self.projection is not None else apply_query_plan(schema, query)
+        self.window_count = window_count
         self._check_query_is_ordered()
 
     def get_response(
         self,
-        pagination: PaginationParams | PaginationInfinityScrollParams,
+        pagination: AnyPagination,
         *model_args: tp.Iterable[tp.Any],
         **model_kwargs: tp.Any,
     ) -> PaginatedResponse[_ST]:
         """Получить ответ в соответствии с переданной навигацией
 
         :param pagination: правила пагинации
-        :param model_args: доп. аргументы для метода `.from_model`
-        :param model_kwargs: доп. аргументы для метода `.from_model`
+        :param model_args: доп. аргументы для метода `.from_model` (`.from_row`)
+        :param model_kwargs: доп. аргументы для метода `.from_model` (`.from_row`)
         :return: ответ с постраничной навигацией
         """
-        total_size = None
+        page = self._get_page(pagination, count_mode=pagination.count_mode if pagination.count else None)
+        items = self._build_items(page.objects, *model_args, **model_kwargs)
+
+        return PaginatedResponse[self.schema](
+            items=items,
+            has_next=page.has_next,
+            total_size=page.total_size,
+            total_size_is_exact=page.total_size_is_exact,
+            next_cursor=page.next_cursor,
+        )
+
+    async def aget_response(
+        self,
+        pagination: AnyPagination,
+        *model_args: tp.Iterable[tp.Any],
+        prepare: tp.Callable[[list[tp.Any]], tp.Awaitable[tp.Any]] | None = None,
+        **model_kwargs: tp.Any,
+    ) -> PaginatedResponse[_ST]:
+        """Асинхронный вариант get_response: запросы выполняются через hr.db.aio, без потоков.
+
+        План запроса схемы не должен содержать prefetch_related.
+
+        :param prepare: корутина, которая получает объекты страницы (модели или строки projection)
+            до сборки схем, например чтобы подготовить справочники, к которым обращается схема
+        """
+        count_mode = pagination.count_mode if pagination.count else None
+        page = await _arun(self._page_steps(pagination, count_mode))
+        if prepare is not None:
+            await prepare(page.objects)
+        items = self._build_items(page.objects, *model_args, **model_kwargs)
+
+        return PaginatedResponse[self.schema](
+            items=items,
+            has_next=page.has_next,
+            total_size=page.total_size,
+            total_size_is_exact=page.total_size_is_exact,
+            next_cursor=page.next_cursor,
+        )
+
+    def _build_items(self, objects: list[tp.Any], *model_args: tp.Any, **model_kwargs: tp.Any) -> list[_ST]:
+        if self.projection is None:
+            return [self.schema.from_model(o, *model_args, **model_kwargs) for o in objects]
+
+        # Служебные колонки пагинатора (ключи курсора, количество) идут после колонок схемы
+        size = len(self.projection)
+        return [self.schema.from_row(row[:size], *model_args, **model_kwargs) for row in objects]
+
+    def _project(self, query: QuerySet, *extra: str) -> QuerySet:
+        """Запрос строк страницы в режиме projection
+
+        :param extra: колонки, нужные самому пагинатору
+        """
+        if self.projection is None:
+            return query
+
+        extra = tuple(column for column in dict.fromkeys(extra) if column not in self.projection)
+        return query.values_list(*self.projection, *extra, named=True)
+
+    def _get_page(self, pagination: AnyPagination, count_mode: CountMode | None) -> _Page:
+        """Вычитать объекты страницы и, если требуется, общее количество объектов"""
+        return _run(self._page_steps(pagination, count_mode))
+
+    def _page_steps(self, pagination: AnyPagination, count_mode: CountMode | None) -> _Steps:
+        if isinstance(pagination, PaginationCursorParams):
+            page = yield from self._cursor_page_steps(pagination)
+            if count_mode is None:
+                return page
+
+            if pagination.cursor is None and not page.has_next:
+                total_size, is_exact = len(page.objects), True
+            else:
+                # Оконная функция после seek-условия посчитала бы только оставшиеся объекты
+                total_size, is_exact = yield from self._count_steps(count_mode)
+
+            return page._replace(total_size=total_size, total_size_is_exact=is_exact)
 
         if isinstance(pagination, PaginationParams):
             bottom = (pagination.page - 1) * pagination.per_page
@@ -83,26 +519,78 @@ class TypedPaginator(tp.Generic[_ST]):
             bottom = pagination.offset
             top = pagination.offset + pagination.limit
 
+        query = self.query
+        window_count = count_mode == CountMode.EXACT and self.window_count
+        if window_count:
+            query = query.annotate(**{_TOTAL_SIZE_ANNOTATION: Window(Count('*'))})
+
         orphans = 1
-        items = [self.schema.from_model(o, *model_args, **model_kwargs) for o in self.query[bottom : top + orphans]]
+        if window_count:
+            query = self._project(query, _TOTAL_SIZE_ANNOTATION)
+        else:
+            query = self._project(query)
+        objects = yield _Fetch(query[bottom : top + orphans])
 
-        has_next = len(items) > (top - bottom)
+        has_next = len(objects) > (top - bottom)
         if has_next:
             # Удаляем вычитанные orphans объекты
-            items = items[:-orphans]
+            objects = objects[:-orphans]
 
-        if pagination.count:
-            total_size = self.query.count()
+        if count_mode is None:
+            return _Page(objects, has_next)
 
-        return PaginatedResponse[self.schema](
-            items=items,
-            has_next=has_next,
-            total_size=total_size,
-        )
+        if window_count and objects:
+            total_size, is_exact = getattr(objects[0], _TOTAL_SIZE_ANNOTATION), True
+        elif not has_next and (objects or bottom == 0):
+            # Последняя страница: количество известно без подсчета
+            total_size, is_exact = bottom + len(objects), True
+        else:
+            total_size, is_exact = yield from self._count_steps(count_mode)
 
-    def _check_query_is_ordered(self):
+        return _Page(objects, has_next, total_size=total_size, total_size_is_exact=is_exact)
+
+    def _count_steps(self, count_mode: CountMode) -> tp.Generator[_Step, tp.Any, tuple[int, bool]]:
+        """Посчитать общее количество объектов отдельным запросом
+
+        :return: количество, является ли оно точным
         """
-        Warn if self.query is unordered (typically a QuerySet).
+        if count_mode == CountMode.ESTIMATE:
+            return (yield _Estimate(self.query)), False
+
+        if count_mode == CountMode.CAPPED:
+            count_cap = settings.PAGINATION_COUNT_CAP
+            total_size = yield _Count(self.query.order_by()[: count_cap + 1])
+            if total_size > count_cap:
+                return count_cap, False
+
+            return total_size, True
+
+        return (yield _Count(self.query)), True
+
+    def _cursor_page_steps(self, pagination: PaginationCursorParams) -> _Steps:
+        keyset = Keyset(self.query)
+        query = keyset.order(self.query)
+        if pagination.cursor is not None:
+            query = keyset.seek(query, pagination.cursor)
+
+        orphans = 1
+        query = self._project(query, *[name for name, _, _ in keyset.keys])
+        objects = yield _Fetch(query[: pagination.limit + orphans])
+
+        next_cursor = None
+        has_next = len(objects) > pagination.limit
+        if has_next:
+            # Удаляем вычитанные orphans объекты
+            objects = objects[:-orphans]
+            next_cursor = keyset.get_cursor(objects[-1])
+
+        return _Page(objects, has_next, next_cursor=next_cursor)
+
+    def _check_query_is_ordered(self):
+        """Предупредить, если self.query не упорядочен.
+
+        Страницы неупорядоченного запроса могут повторять и пропускать объекты.
+        В тестах предупреждение превращается в ошибку (см. filterwarnings в setup.cfg).
         """
         ordered = getattr(self.query, 'ordered', None)
         if ordered is not None and not ordered:
@@ -111,21 +599,34 @@ class TypedPaginator(tp.Generic[_ST]):
                 if hasattr(self.query, 'model')
                 else '{!r}'.format(self.query)
             )
+            warnings.warn(
+                f'Pagination may yield inconsistent results with an unordered object_list: {obj_list_repr}.',
+                UnorderedObjectListWarning,
+                stacklevel=3,
+            )
 
 
 class TypedPaginatorWithCustomParams(TypedPaginator):
-    def __init__(self, schema: tp.Type[_ST], query: QuerySet, paginated_response: tp.Any):
+    def __init__(
+        self,
+        schema: tp.Type[_ST],
+        query: QuerySet,
+        paginated_response: tp.Any,
+        *,
+        window_count: bool = True,
+    ):
         assert isinstance(
             paginated_response, ModelMetaclass
         ), 'paginated_response должен наследоваться от pydantic.generics.GenericModel'
-        super().__init__(schema, query)
+        super().__init__(schema, query, window_count=window_count)
         self._custom_params = {}
         self._paginated_response = paginated_response
 
     def set_custom_params(self, custom_params: dict[str, tp.Any]):
         """Параметры для добавления к основным.
 
-        **custom_params подставляются в query.aggregate
+        **custom_params подставляются в query.aggregate. Агрегат total_size считается точно,
+        поэтому используется только при count_mode=EXACT, в остальных режимах количество считает пагинатор
         """
         assert isinstance(custom_params, dict)
         for param in custom_params.keys():
@@ -134,23 +635,79 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
             ), 'custom_params должны соответствовать paginated_response'
         self._custom_params = custom_params
 
-    def _get_custom_params(self) -> dict[str, tp.Any]:
-        return self.query.aggregate(**self._custom_params)
+    def _get_custom_params(self, count_mode: CountMode | None) -> dict[str, tp.Any]:
+        custom_params = self._custom_params
+        if count_mode != CountMode.EXACT:
+            custom_params = {name: value for name, value in custom_params.items() if name != 'total_size'}
+
+        if not custom_params:
+            return {}
+
+        return self.query.aggregate(**custom_params)
 
     def get_response(
         self,
-        pagination: PaginationParams | PaginationInfinityScrollParams,
+        pagination: AnyPagination,
         *model_args: tp.Iterable[tp.Any],
     ) -> tp.Any:
         """Получить ответ в соответствии с переданной навигацией
 
         :param pagination: правила пагинации
-        :param model_args: доп. аргументы для метода `.from_model`
+        :param model_args: доп. аргументы для метода `.from_model` (`.from_row`)
         :return: ответ с постраничной навигацией
         """
-        total_size = None
+        count_mode = pagination.count_mode if pagination.count else None
+        custom_params = self._get_custom_params(count_mode)
+        if 'total_size' in custom_params:
+            count_mode = None
 
-        if isinstance(pagination, PaginationParams):
+        page = self._get_page(pagination, count_mode=count_mode)
+        items = self._build_items(page.objects, *model_args)
+
+        if 'total_size' in custom_params:
+            total_size, total_size_is_exact = custom_params.pop('total_size'), True
+        else:
+            total_size, total_size_is_exact = page.total_size, page.total_size_is_exact
+
+        return self._paginated_response[self.schema](
+            items=items,
+            has_next=page.has_next,
+            total_size=total_size,
+            total_size_is_exact=total_size_is_exact,
+            next_cursor=page.next_cursor,
+            **custom_params,
+        )
+
+
+class RankedPaginator(tp.Generic[_ST]):
+    """Пагинация по ранжированию, посчитанному в памяти (например, hr.matching.Ranking).
+
+    Порядок и общее количество объектов берутся из ранжирования,
+    из БД вычитываются только объекты страницы.
+    """
+
+    def __init__(self, schema: tp.Type[_ST], query: QuerySet, ranking: tp.Any):
+        """
+        :param schema: схема объектов ответа, собирается методом `.from_model(obj, score)`
+        :param query: запрос, из которого вычитываются объекты страницы по ID
+        :param ranking: массивы `ids` и `scores`, упорядоченные по убыванию оценки,
+            и метод `index_after(score, id)` для курсорной пагинации
+        """
+        self.schema = schema
+        self.query = apply_query_plan(schema, query)
+        self.ranking = ranking
+
+    def get_response(self, pagination: AnyPagination) -> PaginatedResponse[_ST]:
+        if isinstance(pagination, PaginationCursorParams):
+            bottom = 0
+            if pagination.cursor is not None:
+                try:
+                    score, object_id = decode_cursor(pagination.cursor)
+                    bottom = self.ranking.index_after(float(score), int(object_id))
+                except (ValueError, TypeError):
+                    raise fastapi_jsonrpc.InvalidParams
+            top = bottom + pagination.limit
+        elif isinstance(pagination, PaginationParams):
             bottom = (pagination.page - 1) * pagination.per_page
             top = bottom + pagination.per_page
         else:
@@ -158,27 +715,30 @@ class TypedPaginatorWithCustomParams(TypedPaginator):
             bottom = pagination.offset
             top = pagination.offset + pagination.limit
 
-        if self._custom_params:
-            custom_params = self._get_custom_params()
-        else:
-            custom_params = self._custom_params
+        ids = self.ranking.ids[bottom:top].tolist()
+        scores = self.ranking.scores[bottom:top].tolist()
+        has_next = len(self.ranking.ids) > top
 
-        orphans = 1
-        items = [self.schema.from_model(o, *model_args) for o in self.query[bottom : top + orphans]]
+        next_cursor = None
+        if has_next and isinstance(pagination, PaginationCursorParams):
+            next_cursor = encode_cursor([scores[-1], ids[-1]])
 
-        has_next = len(items) > (top - bottom)
-        if has_next:
-            # Удаляем вычитанные orphans объекты
-            items = items[:-orphans]
+        # Объекты, пропавшие из БД после ранжирования, пропускаем
+        objects = self.query.in_bulk(ids)
+        items = [
+            self.schema.from_model(objects[object_id], score)
+            for object_id, score in zip(ids, scores)
+            if object_id in objects
+        ]
 
-        if 'total_size' in custom_params:
-            total_size = custom_params.pop('total_size')
-        elif pagination.count:
-            total_size = self.query.count()
+        total_size = None
+        if pagination.count:
+            total_size = len(self.ranking.ids)
 
-        return self._paginated_response[self.schema](
+        return PaginatedResponse[self.schema](
             items=items,
             has_next=has_next,
             total_size=total_size,
-            **custom_params,
+            total_size_is_exact=True if pagination.count else None,
+            next_cursor=next_cursor,
         )
@@ -1,7 +1,10 @@
 import datetime as dt
+import typing as tp
 
 import pydantic
-from django.contrib.postgres.search import SearchVector
+from django.contrib.postgres.fields import ArrayField
+from django.db.models import BigIntegerField
+from django.db.models import Value
 from pydantic import BaseModel as PydanticBaseModel, constr
 from pydantic import EmailStr
 from pydantic import Field
@@ -9,12 +12,30 @@ from pydantic import conlist
 from pydantic import conint
 
 from hr import models
+from hr.lookups import ArrayIntersectionSize
+from .departments import department_directory
+from .pagination import PaginatedResponse
+from .pagination import QueryPlan
+from .pagination import nested_projection
+
+
+_ItemsT = tp.TypeVar('_ItemsT')
 
 
 class BaseModel(PydanticBaseModel):
     class Config:
         allow_population_by_field_name = True
 
+    @classmethod
+    def trusted(cls, **values):
+        """Собрать схему из данных нашей БД без валидации.
+
+        Для from_model: значения уже прошли проверки при записи, а повторная валидация
+        (EmailStr, перечисления, даты) - основная стоимость сборки страницы списка.
+        Входные параметры методов по-прежнему валидируются конструктором.
+        """
+        return cls.construct(**values)
+
 
 class DepartmentSchema(BaseModel):
     id: int = Field(..., title='ID департамента')
@@ -22,11 +43,20 @@ class DepartmentSchema(BaseModel):
 
     @classmethod
     def from_model(cls, department: models.Department):
-        return cls(
+        return cls.trusted(
             id=department.id,
             name=department.name,
         )
 
+    @classmethod
+    def from_id(cls, department_id: int):
+        """Схема департамента из справочника, без обращения к БД"""
+        return department_directory.get_schema(department_id)
+
+    def json_fragment(self):
+        """Готовый json для encoding.encode, если схема взята из справочника"""
+        return department_directory.get_fragment(self)
+
 
 class RegistrationSchema(BaseModel):
     email: EmailStr = Field(..., title='Email')
@@ -67,13 +97,13 @@ class UserSchema(BaseModel):
 
     @classmethod
     def from_model(cls, user: models.User):
-        return cls(
+        return cls.trusted(
             id=user.id,
             email=user.email,
             first_name=user.first_name,
             last_name=user.last_name,
             patronymic=user.patronymic,
-            department=DepartmentSchema.from_model(user.department),
+            department=DepartmentSchema.from_id(user.department_id),
             role=user.role,
         )
 
@@ -89,6 +119,8 @@ class LoginResponseSchema(BaseModel):
 
 
 class ShortApplicantSchema(BaseModel):
+    projection: tp.ClassVar[tuple[str, ...]] = ('id', 'email', 'last_name', 'first_name', 'patronymic', 'department_id')
+
     id: int = Field(..., title='Идентификатор пользователя')
     email: EmailStr = Field(..., title='Email')
     full_name: str = Field(..., title='ФИО')
@@ -97,23 +129,32 @@ class ShortApplicantSchema(BaseModel):
     @classmethod
     def from_model(cls, user: models.User):
 
-        return cls(
+        return cls.trusted(
             id=user.id,
             email=user.email,
             full_name=user.full_name,
-            department=DepartmentSchema.from_model(user.department),
+            department=DepartmentSchema.from_id(user.department_id),
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        user_id, email, last_name, first_name, patronymic, department_id = row
+        return cls.trusted(
+            id=user_id,
+            email=email,
+            full_name=models.User.format_full_name(last_name, first_name, patronymic),
+            department=DepartmentSchema.from_id(department_id),
         )
 
 
 class ApplicantFilters(BaseModel):
-    email__icontains: constr(min_length=1) | None = Field(
+    email__ilike_contains: constr(min_length=1) | None = Field(
         None,
         title='Поиск по email',
         description='Вернет всех соискателей, email которых содержит переданную строчку',
         alias='email',
     )
-    # TODO: повестить индекс!
-    full_name_search: constr(min_length=1) | None = Field(
+    full_name_vector: constr(min_length=1) | None = Field(
         None,
         title='Поиск по ФИО',
         description='Вернет всех соискателей, ФИО которых содержит переданную строку',
@@ -127,14 +168,8 @@ class ApplicantFilters(BaseModel):
     )
 
     def filter_query(self, query: models.QuerySet):
-        return (
-            query
-            .annotate(
-                full_name_search=SearchVector('first_name', 'last_name', 'patronymic'),
-            )
-            .filter(
-                **self.dict(exclude_none=True),
-            )
+        return query.filter(
+            **self.dict(exclude_none=True),
         )
 
 
@@ -155,6 +190,8 @@ class UpdateResumeSchema(BaseModel):
 
 
 class ResumeForApplicantSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(prefetch_related=('skills',))
+
     id: int = Field(..., title='ID')
     state: models.ResumeState = Field(..., title='Состояние')
     current_position: str = Field(..., title='Текущая должность')
@@ -170,7 +207,7 @@ class ResumeForApplicantSchema(BaseModel):
 
     @classmethod
     def from_model(cls, resume: models.Resume):
-        return cls(
+        return cls.trusted(
             id=resume.id,
             state=resume.state,
             current_position=resume.current_position,
@@ -199,6 +236,8 @@ class ResumeFiltersForApplicant(BaseModel):
 
 
 class ResumeForManagerSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(select_related=('user',), prefetch_related=('skills',))
+
     id: int = Field(..., title='ID резюме')
     applicant: ShortApplicantSchema = Field(..., title='Соискатель')
     current_position: str = Field(..., title='Текущаяя должность')
@@ -210,7 +249,7 @@ class ResumeForManagerSchema(BaseModel):
     @classmethod
     def from_model(cls, resume: models.Resume):
         skills = [skill.name for skill in resume.skills.all()]
-        return cls(
+        return cls.trusted(
             id=resume.id,
             applicant=ShortApplicantSchema.from_model(resume.user),
             current_position=resume.current_position,
@@ -222,14 +261,13 @@ class ResumeForManagerSchema(BaseModel):
 
 
 class ResumeFiltersForManager(BaseModel):
-    user__email__icontains: constr(min_length=1) | None = Field(
+    user__email__ilike_contains: constr(min_length=1) | None = Field(
         None,
         title='Поиск по email соискателя',
         description='Вернет резюме всех соискателей, email которых содержит переданную строчку',
         alias='email',
     )
-    # TODO: повестить индекс!
-    full_name_search: constr(min_length=1) | None = Field(
+    user__full_name_vector: constr(min_length=1) | None = Field(
         None,
         title='Поиск по ФИО соискателя',
         description='Вернет резюме всех соискателей, ФИО которых содержит переданную строку',
@@ -241,12 +279,12 @@ class ResumeFiltersForManager(BaseModel):
         description='Вернет резюме всех соискателей, департамент которых соответствует одному их переданных',
         alias='department_ids',
     )
-    current_position__icontains: str | None = Field(
+    current_position__ilike_contains: str | None = Field(
         None,
         title='Поиск по текущей должности',
         alias='current_position',
     )
-    desired_position__icontains: str | None = Field(
+    desired_position__ilike_contains: str | None = Field(
         None,
         title='Поиск по желаемой должности',
         alias='desired_position',
@@ -257,22 +295,70 @@ class ResumeFiltersForManager(BaseModel):
         description='Вернет все резюме, указанный опыт в которых больше или равен переданному значению',
         alias='experience_gte',
     )
-    # TODO: добавить фильтрацию по ключевым навыкам
+    skills_all: conlist(str, min_items=1) | None = Field(
+        None,
+        title='Фильтрация по всем навыкам',
+        description='Вернет резюме, в которых указаны все переданные навыки',
+    )
+    skills_any: conlist(str, min_items=1) | None = Field(
+        None,
+        title='Фильтрация по любому из навыков',
+        description='Вернет резюме, в которых указан хотя бы один из переданных навыков',
+    )
+    rank_by_skills: bool = Field(
+        False,
+        title='Сортировка по совпадению навыков',
+        description='Резюме с большим количеством совпавших навыков из skills_all/skills_any будут первыми',
+    )
 
-    @staticmethod
-    def _annotate_query(query: models.QuerySet):
-        return query.annotate(
-            full_name_search=SearchVector(
-                'user__first_name',
-                'user__last_name',
-                'user__patronymic'
-            ),
+    def filter_query(self, query: models.QuerySet):
+        query = query.filter(
+            **self.dict(exclude_none=True, exclude={'skills_all', 'skills_any', 'rank_by_skills'}),
         )
 
-    def filter_query(self, query: models.QuerySet):
-        query = self._annotate_query(query)
-        return query.filter(
-            **self.dict(exclude_none=True),
+        # Резюме ищутся по GIN индексу на Resume.skill_ids, навыки заранее переводим в ID
+        skill_names = {*(self.skills_all or ()), *(self.skills_any or ())}
+        if not skill_names:
+            return query
+
+        skill_ids = dict(models.Skill.objects.filter(name__in=skill_names).values_list('name', 'id'))
+
+        if self.skills_all is not None:
+            if not set(self.skills_all) <= skill_ids.keys():
+                return query.none()
+            query = query.filter(skill_ids__contains=[skill_ids[name] for name in self.skills_all])
+
+        if self.skills_any is not None:
+            query = query.filter(
+                skill_ids__overlap=[skill_ids[name] for name in self.skills_any if name in skill_ids],
+            )
+
+        if self.rank_by_skills:
+            query = (
+                query
+                .annotate(
+                    skills_overlap=ArrayIntersectionSize(
+                        'skill_ids',
+                        Value(list(skill_ids.values()), output_field=ArrayField(BigIntegerField())),
+                    ),
+                )
+                .order_by('-skills_overlap', *query.query.order_by)
+            )
+
+        return query
+
+
+class MatchingResumeSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = ResumeForManagerSchema.query_plan
+
+    score: float = Field(..., title='Оценка соответствия вакансии', description='От 0 до 1, чем больше - тем лучше')
+    resume: ResumeForManagerSchema = Field(..., title='Резюме')
+
+    @classmethod
+    def from_model(cls, resume: models.Resume, score: float):
+        return cls.trusted(
+            score=round(score, 4),
+            resume=ResumeForManagerSchema.from_model(resume),
         )
 
 
@@ -289,6 +375,12 @@ class UpdateVacancySchema(BaseModel):
 
 
 class ShortVacancyForManagerSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(select_related=('creator',))
+    projection: tp.ClassVar[tuple[str, ...]] = (
+        'id', 'state', 'creator_id', 'creator__last_name', 'creator__first_name', 'creator__patronymic',
+        'position', 'experience', 'published_at', 'responses_count', 'new_responses_count',
+    )
+
     id: int = Field(..., title='ID вакансии')
     state: models.VacancyState = Field(..., title='Состояние')
     creator_id: int = Field(..., title='ID создателя')
@@ -296,10 +388,12 @@ class ShortVacancyForManagerSchema(BaseModel):
     position: str = Field(..., title='Требуемая должность')
     experience: int | None = Field(..., title='Требуемый опыт работы')
     published_at: dt.datetime | None = Field(None, title='Дата/Время публикации')
+    responses_count: int = Field(..., title='Количество откликов')
+    new_responses_count: int = Field(..., title='Количество новых откликов', description='С момента последнего просмотра')
 
     @classmethod
     def from_model(cls, vacancy: models.Vacancy):
-        return cls(
+        return cls.trusted(
             id=vacancy.id,
             state=vacancy.state,
             creator_id=vacancy.creator.id,
@@ -307,10 +401,45 @@ class ShortVacancyForManagerSchema(BaseModel):
             position=vacancy.position,
             experience=vacancy.experience,
             published_at=vacancy.published_at,
+            responses_count=vacancy.responses_count,
+            new_responses_count=vacancy.new_responses_count,
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        (
+            vacancy_id, state, creator_id, last_name, first_name, patronymic,
+            position, experience, published_at, responses_count, new_responses_count,
+        ) = row
+        return cls.trusted(
+            id=vacancy_id,
+            state=state,
+            creator_id=creator_id,
+            creator_full_name=models.User.format_full_name(last_name, first_name, patronymic),
+            position=position,
+            experience=experience,
+            published_at=published_at,
+            responses_count=responses_count,
+            new_responses_count=new_responses_count,
         )
 
 
+class VacanciesForManagerResponse(PaginatedResponse[_ItemsT], tp.Generic[_ItemsT]):
+    responses_count: int = Field(
+        ...,
+        title='Всего откликов на вакансии',
+        description='С учетом фильтров, по всем страницам',
+    )
+    new_responses_count: int = Field(
+        ...,
+        title='Всего новых откликов на вакансии',
+        description='С учетом фильтров, по всем страницам',
+    )
+
+
 class VacancyForManagerSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(select_related=('creator',))
+
     id: int = Field(..., title='ID вакансии')
     state: models.VacancyState = Field(..., title='Состояние')
     creator: UserSchema = Field(..., title='Создатель вакансии')
@@ -321,7 +450,7 @@ class VacancyForManagerSchema(BaseModel):
 
     @classmethod
     def from_model(cls, vacancy: models.Vacancy):
-        return cls(
+        return cls.trusted(
             id=vacancy.id,
             state=vacancy.state,
             creator=UserSchema.from_model(vacancy.creator),
@@ -339,7 +468,7 @@ class VacancyFiltersForManager(BaseModel):
         description='Вернутся только те вакансии, состояние которых соответствует одному их переданных',
         alias='states',
     )
-    position__icontains: constr(min_length=3) | None = Field(
+    position__ilike_contains: constr(min_length=3) | None = Field(
         None,
         title='Поиск по должности',
         description='Вернутся только те вакансии, требуемая должность которых содержит переданную строку',
@@ -373,6 +502,12 @@ class VacancyFiltersForManager(BaseModel):
 
 
 class ShortVacancyForApplicantSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(select_related=('creator',))
+    projection: tp.ClassVar[tuple[str, ...]] = (
+        'id', 'creator_id', 'creator__last_name', 'creator__first_name', 'creator__patronymic',
+        'department_id', 'position', 'experience', 'published_at',
+    )
+
     id: int = Field(..., title='ID вакансии')
     creator_id: int = Field(..., title='ID создателя')
     creator_full_name: str = Field(..., title='ФИО создателя')
@@ -384,19 +519,60 @@ class ShortVacancyForApplicantSchema(BaseModel):
 
     @classmethod
     def from_model(cls, vacancy: models.Vacancy):
-        return cls(
+        return cls.trusted(
             id=vacancy.id,
             creator_id=vacancy.creator.id,
             creator_full_name=vacancy.creator.full_name,
-            department_id=vacancy.creator.department.id,
-            department_name=vacancy.creator.department.name,
+            department_id=vacancy.department_id,
+            department_name=DepartmentSchema.from_id(vacancy.department_id).name,
             position=vacancy.position,
             experience=vacancy.experience,
             published_at=vacancy.published_at,
         )
 
+    @classmethod
+    def from_row(cls, row: tuple):
+        vacancy_id, creator_id, last_name, first_name, patronymic, department_id, position, experience, published_at = row
+        return cls.trusted(
+            id=vacancy_id,
+            creator_id=creator_id,
+            creator_full_name=models.User.format_full_name(last_name, first_name, patronymic),
+            department_id=department_id,
+            department_name=DepartmentSchema.from_id(department_id).name,
+            position=position,
+            experience=experience,
+            published_at=published_at,
+        )
+
+
+class RecommendedVacancySchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = ShortVacancyForApplicantSchema.query_plan.nested('vacancy')
+    projection: tp.ClassVar[tuple[str, ...]] = (
+        'score', *nested_projection('vacancy', ShortVacancyForApplicantSchema.projection),
+    )
+
+    score: float = Field(..., title='Оценка соответствия резюме соискателя', description='От 0 до 1')
+    vacancy: ShortVacancyForApplicantSchema = Field(..., title='Вакансия')
+
+    @classmethod
+    def from_model(cls, recommendation: models.VacancyRecommendation):
+        return cls.trusted(
+            score=round(recommendation.score, 4),
+            vacancy=ShortVacancyForApplicantSchema.from_model(recommendation.vacancy),
+        )
+
+    @classmethod
+    def from_row(cls, row: tuple):
+        score, *vacancy = row
+        return cls.trusted(
+            score=round(score, 4),
+            vacancy=ShortVacancyForApplicantSchema.from_row(vacancy),
+        )
+
 
 class VacancyForApplicantSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = QueryPlan(select_related=('creator',))
+
     id: int = Field(..., title='ID вакансии')
     creator_id: int = Field(..., title='ID менеджера, создавшего вакансию')
     creator_full_name: str = Field(..., title='ФИО менеджера, создавшего вакансию')
@@ -410,13 +586,13 @@ class VacancyForApplicantSchema(BaseModel):
 
     @classmethod
     def from_model(cls, vacancy: models.Vacancy):
-        return cls(
+        return cls.trusted(
             id=vacancy.id,
             creator_id=vacancy.creator.id,
             creator_full_name=vacancy.creator.full_name,
             creator_contact=vacancy.creator.email,
-            department_id=vacancy.creator.department.id,
-            department_name=vacancy.creator.department.name,
+            department_id=vacancy.department_id,
+            department_name=DepartmentSchema.from_id(vacancy.department_id).name,
             position=vacancy.position,
             experience=vacancy.experience,
             description=vacancy.description,
@@ -425,13 +601,13 @@ class VacancyForApplicantSchema(BaseModel):
 
 
 class VacancyFiltersForApplicant(BaseModel):
-    creator__department_id__in: conlist(int, min_items=1) | None = Field(
+    department_id__in: conlist(int, min_items=1) | None = Field(
         None,
         title='Фильтрация по департаменту',
         description='Вернет только те вакансии, департамент которых соответствует одному из переданных',
         alias='department_ids',
     )
-    position__icontains: constr(min_length=3) | None = Field(
+    position__ilike_contains: constr(min_length=3) | None = Field(
         None,
         title='Поиск по должности',
         description='Вернутся только те вакансии, требуемая должность которых содержит переданную строку',
@@ -464,7 +640,34 @@ class VacancyFiltersForApplicant(BaseModel):
     )
 
 
+class VacancyResponseFiltersForManager(BaseModel):
+    vacancy_id: int | None = Field(
+        None,
+        title='Фильтрация по вакансии',
+        description='Вернутся только отклики на вакансию с переданным ID',
+    )
+    created_at__gte: dt.datetime | None = Field(
+        None,
+        title='Создано после ...',
+        description='Вернутся только те отклики, которые были созданы начиная с переданного момента',
+        example='2022-05-10T00:00:00+00:00',
+        alias='created_gte',
+    )
+    created_at__lt: dt.datetime | None = Field(
+        None,
+        title='Создано до ...',
+        description='Вернутся только те отклики, которые были созданы до переданного момента',
+        example='2022-05-11T00:00:00+00:00',
+        alias='created_lt',
+    )
+
+
 class VacancyResponseSchema(BaseModel):
+    query_plan: tp.ClassVar[QueryPlan] = (
+        VacancyForApplicantSchema.query_plan.nested('vacancy')
+        + ResumeForManagerSchema.query_plan.nested('resume')
+    )
+
     id: int = Field(..., title='ID отклика на вакансию')
     vacancy: VacancyForApplicantSchema = Field(..., title='Вакансия')
     resume: ResumeForManagerSchema = Field(..., title='Резюме')
@@ -472,7 +675,7 @@ class VacancyResponseSchema(BaseModel):
 
     @classmethod
     def from_model(cls, vacancy_response: models.VacancyResponse):
-        return cls(
+        return cls.trusted(
             id=vacancy_response.id,
             vacancy=VacancyForApplicantSchema.from_model(vacancy_response.vacancy),
             resume=ResumeForManagerSchema.from_model(vacancy_response.resume),
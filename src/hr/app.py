@@ -1,7 +1,9 @@
 import asyncio
 import logging
+import time
 from concurrent.futures import ThreadPoolExecutor
 
+import anyio.to_thread
 import django.db
 import fastapi_jsonrpc
 from asgiref.sync import sync_to_async
@@ -11,17 +13,26 @@ from django.core.signals import request_started, request_finished
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from starlette.requests import Request
+from starlette.responses import PlainTextResponse
 from starlette.responses import RedirectResponse
 
+from hr import hashers
+from hr.db import aio
 from hr.api.jsonrpc import api_v1 as jsonrpc_api_v1
+from hr.api.metrics import render_prometheus
+from hr.db.metrics import pool_metrics
 
 logger = logging.getLogger(__name__)
 
 
 class DjangoThreadPoolExecutor(ThreadPoolExecutor):
     def submit(self, fn, *args, **kwargs):
+        submitted_at = time.monotonic()
+
         def func():
+            pool_metrics.observe_wait(time.monotonic() - submitted_at)
             django.db.reset_queries()
+            # Закрывает только соединения старше CONN_MAX_AGE или сломанные, остальные переиспользуются
             django.db.close_old_connections()
             return fn(*args, **kwargs)
 
@@ -54,6 +65,14 @@ async def on_startup():
     loop = asyncio.get_running_loop()
     logger.info('Setup ThreadPoolExecutor: max_workers=%s', settings.THREADS)
     loop.set_default_executor(default_executor)
+    # Синхронные методы API выполняются в потоках anyio, у каждого потока свое соединение с БД
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREADS
+
+
+@app.on_event('shutdown')
+async def on_shutdown():
+    hashers.shutdown_executor()
+    aio.close_pools()
 
 
 @app.middleware('http')
@@ -76,6 +95,15 @@ app.mount(
 )
 
 
+@app.get('/metrics', include_in_schema=False)
+def metrics(request: Request) -> PlainTextResponse:
+    # Метрики отдаются только локально, например агенту Prometheus на том же хосте
+    if request.client is None or request.client.host not in settings.METRICS_ALLOWED_HOSTS:
+        return PlainTextResponse('Not Found', status_code=404)
+
+    return PlainTextResponse(render_prometheus(), media_type='text/plain; version=0.0.4')
+
+
 @app.get('/', include_in_schema=False)
 def redirect_to_docs() -> RedirectResponse:
     return RedirectResponse('/docs')
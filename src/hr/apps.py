@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class HrConfig(AppConfig):
+    name = 'hr'
+
+    def ready(self):
+        from . import lookups  # noqa: F401
+        from . import signals  # noqa: F401
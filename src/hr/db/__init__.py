@@ -0,0 +1,10 @@
+"""Бэкенд PostgreSQL с постоянными соединениями (ENGINE = 'hr.db').
+
+Соединение живет в потоке, который его открыл, до CONN_MAX_AGE. Перед повторным
+использованием после простоя (CONN_HEALTH_CHECK_INTERVAL) или после ошибки запроса оно проверяется
+запросом SELECT 1, так что разорванное сервером соединение незаметно переоткрывается, а не роняет запрос.
+Потоки anyio завершаются примерно через 10 секунд простоя и закрывают свои соединения, поэтому
+соединения переиспользуются только под постоянной нагрузкой.
+Число потоков, выполняющих синхронные методы API, ограничено THREADS (см. hr.app),
+поэтому соединений с БД у процесса не больше, чем потоков.
+"""
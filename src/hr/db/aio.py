@@ -0,0 +1,285 @@
+"""Выполнение запросов ORM без потоков - через асинхронный режим psycopg2.
+
+SQL собирается компилятором Django и выполняется на соединении из пула AsyncConnectionPool,
+ожидание ответа сервера идет в event loop (add_reader/add_writer на сокете соединения).
+Модели собираются из строк так же, как это делает ModelIterable, с select_related и аннотациями;
+поддерживаются и строки values_list(named=True).
+prefetch_related не поддерживается: его запросы Django выполняет синхронно.
+
+Синхронный доступ к БД из event loop Django запрещает (SynchronousOnlyOperation),
+поэтому все, что нужно асинхронному методу, должно читаться через этот модуль.
+"""
+import asyncio
+import contextlib
+import datetime as dt
+import operator
+import time
+import typing as tp
+import weakref
+
+import psycopg2
+import psycopg2.extensions
+from django.conf import settings
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.query import ModelIterable
+from django.db.models.query import NamedValuesListIterable
+from django.db.models.query import get_related_populators
+from django.db.models.utils import create_namedtuple_class
+
+from .metrics import observe_call_wait
+from .metrics import observe_query
+from .metrics import pool_metrics
+
+# Ошибки запроса, после которых соединение в режиме autocommit остается исправным
+_QUERY_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError, psycopg2.ProgrammingError)
+
+
+class _Connection(psycopg2.extensions.connection):
+    last_used_at: float = 0.0
+
+
+async def _wait(connection: _Connection):
+    """Дождаться завершения операции на асинхронном соединении"""
+    loop = asyncio.get_running_loop()
+    fileno = connection.fileno()
+    while True:
+        state = connection.poll()
+        if state == psycopg2.extensions.POLL_OK:
+            return
+
+        if state == psycopg2.extensions.POLL_READ:
+            add, remove = loop.add_reader, loop.remove_reader
+        elif state == psycopg2.extensions.POLL_WRITE:
+            add, remove = loop.add_writer, loop.remove_writer
+        else:
+            raise psycopg2.OperationalError(f'Unexpected poll() state: {state}')
+
+        ready = loop.create_future()
+        add(fileno, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            remove(fileno)
+
+
+class AsyncConnectionPool:
+    """Ограниченный пул асинхронных соединений psycopg2.
+
+    Одновременно выполняется не больше max_size запросов, остальные ждут в очереди без потоков.
+    Соединение, простоявшее дольше CONN_HEALTH_CHECK_INTERVAL, перед выдачей проверяется SELECT 1.
+    """
+
+    def __init__(self, alias: str, max_size: int):
+        self.alias = alias
+        self.max_size = max_size
+        self._idle: list[_Connection] = []
+        # Примитивы asyncio привязаны к event loop, а тестовый клиент запускает свой loop на каждый запрос
+        self._semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @contextlib.asynccontextmanager
+    async def connection(self) -> tp.AsyncIterator[_Connection]:
+        started = time.monotonic()
+        async with self._get_semaphore():
+            connection = await self._checkout()
+            checkout = time.monotonic() - started
+            pool_metrics.observe_async_checkout(checkout)
+            observe_call_wait(checkout)
+            try:
+                yield connection
+            except _QUERY_ERRORS:
+                self._release(connection)
+                raise
+            except BaseException:
+                # В том числе отмена задачи посреди запроса: состояние соединения неизвестно
+                connection.close()
+                raise
+            else:
+                self._release(connection)
+
+    def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_size)
+
+        return semaphore
+
+    async def _checkout(self) -> _Connection:
+        interval = connections[self.alias].settings_dict.get('CONN_HEALTH_CHECK_INTERVAL')
+        while self._idle:
+            connection = self._idle.pop()
+            if interval is None or time.monotonic() - connection.last_used_at < interval:
+                return connection
+
+            try:
+                await _execute(connection, 'SELECT 1')
+            except psycopg2.Error:
+                pool_metrics.health_check_failed()
+                connection.close()
+            else:
+                return connection
+
+        return await self._connect()
+
+    async def _connect(self) -> _Connection:
+        started = time.monotonic()
+        wrapper = connections[self.alias]
+        params = wrapper.get_connection_params()
+        params['client_encoding'] = 'UTF8'
+        if wrapper.timezone_name:
+            params['options'] = f'{params.get("options", "")} -c TimeZone={wrapper.timezone_name}'.strip()
+
+        connection = psycopg2.connect(**params, async_=True, connection_factory=_Connection)
+        await _wait(connection)
+        pool_metrics.observe_connect(time.monotonic() - started)
+        return connection
+
+    def _release(self, connection: _Connection):
+        if connection.closed or len(self._idle) >= self.max_size:
+            connection.close()
+            return
+
+        connection.last_used_at = time.monotonic()
+        self._idle.append(connection)
+
+
+class _Result(tp.NamedTuple):
+    rows: list[tuple]
+    query: bytes  #: выполненный запрос с подставленными параметрами
+
+
+async def _execute(
+    connection: _Connection,
+    sql: str,
+    params: tp.Sequence[tp.Any] = (),
+    tzinfo: dt.tzinfo | None = None,
+) -> _Result:
+    cursor = connection.cursor()
+    try:
+        if tzinfo is not None:
+            cursor.tzinfo_factory = lambda offset: tzinfo
+        cursor.execute(sql, params)
+        await _wait(connection)
+        return _Result(cursor.fetchall() if cursor.description is not None else [], cursor.query)
+    finally:
+        cursor.close()
+
+
+_pools: dict[str, AsyncConnectionPool] = {}
+
+
+def get_pool(alias: str = 'default') -> AsyncConnectionPool:
+    pool = _pools.get(alias)
+    if pool is None:
+        pool = _pools[alias] = AsyncConnectionPool(alias, max_size=settings.DB_ASYNC_POOL_SIZE)
+
+    return pool
+
+
+def close_pools():
+    for pool in _pools.values():
+        pool.close()
+
+
+async def execute(sql: str, params: tp.Sequence[tp.Any] = (), *, using: str = 'default') -> list[tuple]:
+    """Выполнить SQL и вернуть строки результата"""
+    wrapper = connections[using]
+    async with get_pool(using).connection() as connection:
+        started = time.monotonic()
+        try:
+            result = await _execute(connection, sql, params, tzinfo=wrapper.timezone if settings.USE_TZ else None)
+        finally:
+            duration = time.monotonic() - started
+            observe_query(sql, duration)
+
+    if wrapper.queries_logged:
+        # Как debug-курсор Django: запросы видны в connection.queries и CaptureQueriesContext
+        wrapper.queries_log.append({'sql': result.query.decode(), 'time': f'{duration:.3f}'})
+
+    return result.rows
+
+
+async def fetch(query: QuerySet) -> list[tp.Any]:
+    """Асинхронный аналог list(query) для запроса моделей или values_list(named=True)"""
+    assert query._iterable_class in (ModelIterable, NamedValuesListIterable), 'Неподдерживаемый тип запроса'
+    assert not query._prefetch_related_lookups, 'prefetch_related не поддерживается'
+    assert not query._known_related_objects, 'Запросы связанных менеджеров не поддерживаются'
+
+    compiler = query.query.get_compiler(using=query.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return []
+
+    rows = await execute(sql, params, using=query.db)
+    if not rows:
+        return []
+
+    if query._iterable_class is NamedValuesListIterable:
+        return _build_named_rows(query, compiler, rows)
+
+    return _build_models(query, compiler, rows)
+
+
+def _build_models(query: QuerySet, compiler, rows: list[tuple]) -> list[tp.Any]:
+    # Повторяет ModelIterable.__iter__
+    select, klass_info, annotation_col_map = compiler.select, compiler.klass_info, compiler.annotation_col_map
+    model_cls = klass_info['model']
+    select_fields = klass_info['select_fields']
+    model_fields_start, model_fields_end = select_fields[0], select_fields[-1] + 1
+    init_list = [field[0].target.attname for field in select[model_fields_start:model_fields_end]]
+    related_populators = get_related_populators(klass_info, select, query.db)
+
+    objects = []
+    for row in compiler.results_iter(results=[rows]):
+        obj = model_cls.from_db(query.db, init_list, row[model_fields_start:model_fields_end])
+        for populator in related_populators:
+            populator.populate(row, obj)
+        for attr_name, col_pos in annotation_col_map.items():
+            setattr(obj, attr_name, row[col_pos])
+        objects.append(obj)
+
+    return objects
+
+
+def _build_named_rows(query: QuerySet, compiler, rows: list[tuple]) -> list[tuple]:
+    # Повторяет ValuesListIterable.__iter__ и NamedValuesListIterable.__iter__
+    names = [*query.query.extra_select, *query.query.values_select, *query.query.annotation_select]
+    results = compiler.results_iter(results=[rows], tuple_expected=True)
+    if query._fields:
+        fields = [*query._fields, *(f for f in query.query.annotation_select if f not in query._fields)]
+        if fields != names:
+            index_map = {name: index for index, name in enumerate(names)}
+            results = map(operator.itemgetter(*[index_map[f] for f in fields]), results)
+        names = query._fields
+
+    tuple_class = create_namedtuple_class(*names)
+    new = tuple.__new__
+    return [new(tuple_class, row) for row in results]
+
+
+async def first(query: QuerySet) -> tp.Any | None:
+    objects = await fetch(query[:1])
+    return objects[0] if objects else None
+
+
+async def count(query: QuerySet) -> int:
+    """Асинхронный аналог query.count(), в том числе для запроса со срезом"""
+    if not query.query.is_sliced:
+        query = query.order_by()
+
+    try:
+        sql, params = query.values('pk').query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    rows = await execute(f'SELECT COUNT(*) FROM ({sql}) AS subquery', params, using=query.db)
+    return rows[0][0]
@@ -0,0 +1,105 @@
+import threading
+import time
+import weakref
+
+from django.db.backends.postgresql import base
+
+from .metrics import observe_query
+from .metrics import pool_metrics
+
+
+def _observe_query(execute, sql, params, many, context):
+    """Обертка выполнения запросов: время запроса учитывается в метриках вызова метода API,
+    медленные запросы логируются (см. hr.db.detector)"""
+    started = time.monotonic()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        observe_query(sql, time.monotonic() - started)
+
+
+def _close_all(connections: list):
+    for connection in connections:
+        connection.close()
+
+
+class _ThreadConnections:
+    """Соединения psycopg2, открытые потоком.
+
+    Объект хранится в threading.local и удаляется вместе с данными потока, когда поток завершается:
+    потоки anyio выходят после простоя, и их соединения иначе остались бы открытыми до сборки мусора.
+    """
+
+    def __init__(self):
+        self.connections: list = []
+        weakref.finalize(self, _close_all, self.connections)
+
+    def add(self, connection):
+        self.connections[:] = [c for c in self.connections if not c.closed]
+        self.connections.append(connection)
+
+
+_thread_local = threading.local()
+
+
+def _close_on_thread_exit(connection):
+    thread_connections = getattr(_thread_local, 'connections', None)
+    if thread_connections is None:
+        thread_connections = _thread_local.connections = _ThreadConnections()
+
+    thread_connections.add(connection)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_used_at = 0.0
+        self._connecting = False
+        # Постоянная внешняя обертка: execute_wrapper() добавляет свои после нее
+        self.execute_wrappers.append(_observe_query)
+
+    @property
+    def health_check_interval(self) -> float | None:
+        """Простой в секундах, после которого соединение проверяется перед использованием; None - не проверять"""
+        return self.settings_dict.get('CONN_HEALTH_CHECK_INTERVAL')
+
+    def connect(self):
+        started = time.monotonic()
+        # Пока соединение настраивается внутри connect(), проверять его не нужно
+        self._connecting = True
+        try:
+            super().connect()
+        finally:
+            self._connecting = False
+        _close_on_thread_exit(self.connection)
+        pool_metrics.observe_connect(time.monotonic() - started)
+
+    def ensure_connection(self):
+        started = time.monotonic()
+        # Вне autocommit соединение внутри транзакции: SELECT 1 открыл бы ее раньше времени
+        if self.connection is not None and self.autocommit and not self.in_atomic_block and self._needs_check(started):
+            # Потоки anyio, в которых выполняются методы API, не вызывают close_old_connections,
+            # поэтому возраст и исправность соединения проверяются здесь
+            if self.close_at is not None and started >= self.close_at:
+                self.close()
+            elif not self.is_usable():
+                pool_metrics.health_check_failed()
+                self.close()
+            else:
+                self.errors_occurred = False
+
+        super().ensure_connection()
+
+        self.last_used_at = time.monotonic()
+        pool_metrics.observe_checkout(self.last_used_at - started)
+
+    def _needs_check(self, now: float) -> bool:
+        """Проверять ли соединение перед использованием: после ошибки запроса или после простоя"""
+        if self._connecting:
+            return False
+
+        if self.errors_occurred:
+            return True
+
+        interval = self.health_check_interval
+        return interval is not None and now - self.last_used_at >= interval
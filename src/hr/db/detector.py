@@ -0,0 +1,118 @@
+"""Обнаружение медленных запросов и N+1.
+
+Запросы сравниваются по отпечатку: SQL без значений параметров и литералов, списки IN (...)
+любой длины сводятся к одному виду. Запрос дольше DB_SLOW_QUERY_THRESHOLD секунд логируется сразу,
+а по завершении вызова метода API (см. hr.api.metrics) проверяются:
+
+- n_plus_one: один и тот же отпечаток выполнен не меньше DB_N_PLUS_ONE_THRESHOLD раз;
+- query_budget: запросов больше, чем объявлено для метода через hr.api.metrics.query_budget.
+
+Записи лога структурные: в extra передаются method, fingerprint, sql, count и duration.
+Нарушения, кроме лога, получают подписчики add_listener, например плагин тестов (см. tests/fixtures/query_budget.py).
+"""
+import functools
+import hashlib
+import logging
+import re
+import threading
+import typing as tp
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_NORMALIZATION = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'%s|\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),
+    (re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+'), '(?)'),
+    (re.compile(r'\s+'), ' '),
+]
+
+
+@functools.lru_cache(maxsize=4096)
+def normalize(sql: str) -> str:
+    """SQL без значений: одинаковые по форме запросы дают одну строку"""
+    for pattern, replacement in _NORMALIZATION:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def fingerprint(sql: str) -> str:
+    return hashlib.blake2b(normalize(sql).encode(), digest_size=8).hexdigest()
+
+
+class QueryShape:
+    """Запросы одного отпечатка в рамках вызова метода"""
+
+    __slots__ = ('sql', 'count', 'duration')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.duration = 0.0
+
+
+class Violation(tp.NamedTuple):
+    kind: str  #: slow_query, n_plus_one или query_budget
+    method: str | None
+    fingerprint: str | None
+    sql: str | None
+    count: int
+    duration: float
+
+    def as_extra(self) -> dict[str, tp.Any]:
+        return {
+            'method': self.method,
+            'fingerprint': self.fingerprint,
+            'sql': self.sql,
+            'count': self.count,
+            'duration': self.duration,
+        }
+
+
+_listeners: list[tp.Callable[[Violation], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(listener: tp.Callable[[Violation], None]):
+    with _listeners_lock:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: tp.Callable[[Violation], None]):
+    with _listeners_lock:
+        _listeners.remove(listener)
+
+
+def _report(violation: Violation, message: str, *args: tp.Any):
+    logger.warning(message, *args, extra=violation.as_extra())
+    for listener in list(_listeners):
+        listener(violation)
+
+
+def check_query(sql: str, seconds: float, method: str | None):
+    """Залогировать запрос, если он выполнялся дольше DB_SLOW_QUERY_THRESHOLD"""
+    threshold = settings.DB_SLOW_QUERY_THRESHOLD
+    if threshold is None or seconds < threshold:
+        return
+
+    violation = Violation('slow_query', method, fingerprint(sql), normalize(sql), 1, seconds)
+    _report(violation, 'Slow query in %s (%.3f s): %s', method, seconds, violation.sql)
+
+
+def check_call(method: str, queries: int, duration: float, shapes: tp.Iterable[QueryShape], budget: int | None):
+    """Проверить запросы завершенного вызова метода на N+1 и превышение бюджета"""
+    threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+    if threshold is not None:
+        for shape in shapes:
+            if shape.count >= threshold:
+                violation = Violation(
+                    'n_plus_one', method, fingerprint(shape.sql), normalize(shape.sql), shape.count, shape.duration,
+                )
+                _report(violation, 'Possible N+1 in %s: %s queries of %s', method, shape.count, violation.sql)
+
+    if budget is not None and queries > budget:
+        violation = Violation('query_budget', method, None, None, queries, duration)
+        _report(violation, 'Query budget exceeded in %s: %s queries, budget %s', method, queries, budget)
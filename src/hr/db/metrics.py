@@ -0,0 +1,137 @@
+import contextlib
+import contextvars
+import threading
+import typing as tp
+
+from . import detector
+
+
+class Timing:
+    """Количество, сумма и максимум замеров (обычно в секундах)"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict[str, float]:
+        return {'count': self.count, 'total': self.total, 'max': self.max}
+
+
+class PoolMetrics:
+    """Метрики соединений с БД и очереди потоков.
+
+    - wait: сколько задача ждала свободный поток в DjangoThreadPoolExecutor;
+    - checkout: сколько занимала выдача соединения (проверка, переоткрытие) перед запросом;
+    - connect: открытие новых соединений;
+    - async_checkout: ожидание и выдача соединения из асинхронного пула (см. hr.db.aio).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.wait = Timing()
+            self.checkout = Timing()
+            self.connect = Timing()
+            self.async_checkout = Timing()
+            self.health_check_failures = 0
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self.wait.observe(seconds)
+
+    def observe_checkout(self, seconds: float):
+        with self._lock:
+            self.checkout.observe(seconds)
+
+    def observe_connect(self, seconds: float):
+        with self._lock:
+            self.connect.observe(seconds)
+
+    def observe_async_checkout(self, seconds: float):
+        with self._lock:
+            self.async_checkout.observe(seconds)
+
+    def health_check_failed(self):
+        with self._lock:
+            self.health_check_failures += 1
+
+    def snapshot(self) -> dict[str, dict[str, float] | int]:
+        with self._lock:
+            return {
+                'wait': self.wait.as_dict(),
+                'checkout': self.checkout.as_dict(),
+                'connect': self.connect.as_dict(),
+                'async_checkout': self.async_checkout.as_dict(),
+                'health_check_failures': self.health_check_failures,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class QueryStats:
+    """Запросы к БД и ожидание ресурсов в рамках одного вызова метода API.
+
+    - queries, db_time: количество и суммарное время запросов;
+    - shapes: те же запросы по отпечаткам SQL (см. hr.db.detector);
+    - wait: ожидание свободного потока или соединения из асинхронного пула.
+    """
+
+    __slots__ = ('method', 'queries', 'db_time', 'shapes', 'wait')
+
+    def __init__(self, method: str | None = None):
+        self.method = method
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes: dict[str, detector.QueryShape] = {}
+        self.wait = 0.0
+
+    def observe_query(self, sql: str, seconds: float):
+        self.queries += 1
+        self.db_time += seconds
+        # Отпечатки кэшируются по тексту запроса, повторный запрос не нормализуется заново
+        fingerprint = detector.fingerprint(sql)
+        shape = self.shapes.get(fingerprint)
+        if shape is None:
+            shape = self.shapes[fingerprint] = detector.QueryShape(sql)
+        shape.count += 1
+        shape.duration += seconds
+
+
+_query_stats: contextvars.ContextVar[QueryStats | None] = contextvars.ContextVar('query_stats', default=None)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+@contextlib.contextmanager
+def collect_query_stats(stats: QueryStats) -> tp.Iterator[QueryStats]:
+    """Учитывать в stats запросы текущего контекста (потока или задачи asyncio)"""
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def observe_query(sql: str, seconds: float):
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.observe_query(sql, seconds)
+    detector.check_query(sql, seconds, method=stats.method if stats is not None else None)
+
+
+def observe_call_wait(seconds: float):
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.wait += seconds
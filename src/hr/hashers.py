@@ -0,0 +1,63 @@
+"""Хэширование и проверка паролей в отдельном пуле процессов.
+
+PBKDF2 нагружает CPU и держит GIL, поэтому в общем пуле потоков пачка логинов
+занимала все потоки и блокировала остальные JSON-RPC методы.
+Модуль не импортирует модели, так как загружается в дочерних процессах до настройки Django.
+"""
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASHING_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        )
+
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+
+    if _executor is not None:
+        _executor.shutdown()
+        _executor = None
+
+
+async def make_password(raw_password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), hashers.make_password, raw_password)
+
+
+async def check_password(raw_password: str, encoded: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), hashers.check_password, raw_password, encoded)
+
+
+def must_update(encoded: str) -> bool:
+    """Нужно ли перехэшировать пароль: сменился основной хэшер или его параметры (как в User.check_password)"""
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    preferred = hashers.get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
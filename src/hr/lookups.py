@@ -0,0 +1,37 @@
+from django.db import models
+
+
+@models.CharField.register_lookup
+class ILikeContains(models.Lookup):
+    """Регистронезависимый поиск подстроки через ILIKE.
+
+    Стандартный icontains в PostgreSQL компилируется в UPPER(col) LIKE UPPER('%x%'),
+    и индекс по колонке не используется. ILIKE по самой колонке обслуживается
+    триграммным GIN индексом (gin_trgm_ops).
+    """
+
+    lookup_name = 'ilike_contains'
+    prepare_rhs = False
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [f'%{connection.ops.prep_for_like_query(value)}%']
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', [*lhs_params, *rhs_params]
+
+
+class ArrayIntersectionSize(models.Func):
+    """Количество общих элементов двух массивов"""
+
+    arity = 2
+    output_field = models.IntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        lhs, lhs_params = compiler.compile(self.source_expressions[0])
+        rhs, rhs_params = compiler.compile(self.source_expressions[1])
+        return (
+            f'cardinality(ARRAY(SELECT unnest({lhs}) INTERSECT SELECT unnest({rhs})))',
+            [*lhs_params, *rhs_params],
+        )
@@ -0,0 +1,342 @@
+"""Подбор опубликованных резюме к вакансии.
+
+Оценка резюме - взвешенная сумма трех составляющих, каждая в диапазоне [0, 1]:
+- похожесть должности: косинусная близость триграмм должности вакансии и текущей/желаемой должности резюме
+  (берется лучшая из двух);
+- соответствие опыту: 1, если опыт не меньше требуемого, иначе доля от требуемого;
+- совпадение навыков: доля навыков вакансии, указанных в резюме.
+  Отдельного списка навыков у вакансии нет, навыками вакансии считаются известные навыки,
+  упомянутые в ее должности или описании: без учета регистра, составные ("Machine Learning", "Node.js") -
+  той же последовательностью слов.
+
+Оценки считаются сразу для матрицы "вакансии x резюме" векторными операциями numpy
+и кэшируются на вакансию. Публикация и скрытие резюме обновляют кэш точечно (см. hr.signals),
+изменения из других процессов подтягиваются по TTL.
+"""
+import re
+import threading
+import time
+import typing as tp
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from . import models
+
+#: размерность хэшированного пространства триграмм
+TRIGRAM_DIMENSIONS = 128
+
+POSITION_WEIGHT = 0.5
+EXPERIENCE_WEIGHT = 0.2
+SKILLS_WEIGHT = 0.3
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _words(text: str) -> tuple[str, ...]:
+    return tuple(_WORD_RE.findall(text.lower()))
+
+
+def _trigrams(text: str) -> set[str]:
+    # Как в pg_trgm: слова в нижнем регистре, дополненные двумя пробелами слева и одним справа
+    trigrams = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f'  {word} '
+        trigrams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+
+    return trigrams
+
+
+def position_vectors(texts: tp.Sequence[str | None]) -> np.ndarray:
+    """Нормированные векторы триграмм строк, матрица (len(texts), TRIGRAM_DIMENSIONS)"""
+    vectors = np.zeros((len(texts), TRIGRAM_DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for trigram in _trigrams(text or ''):
+            # crc32, а не hash(): векторы должны совпадать во всех процессах
+            vectors[row, zlib.crc32(trigram.encode()) % TRIGRAM_DIMENSIONS] = 1
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+class ResumeFeatures:
+    """Признаки опубликованных резюме в виде массивов, строки упорядочены по ID резюме"""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        user_ids: np.ndarray,
+        current_positions: np.ndarray,
+        desired_positions: np.ndarray,
+        experience: np.ndarray,
+        skill_resume_ids: np.ndarray,
+        skill_ids: np.ndarray,
+    ):
+        self.ids = ids
+        self.user_ids = user_ids
+        self.current_positions = current_positions
+        self.desired_positions = desired_positions
+        self.experience = experience  #: NaN, если опыт не указан
+        # Пары (резюме, навык): по ним совпадения навыков считаются через bincount без циклов
+        self.skill_resume_ids = skill_resume_ids
+        self.skill_ids = skill_ids
+
+    @classmethod
+    def from_rows(cls, rows: tp.Iterable[tuple[int, int, str, str | None, int | None, list[int]]]) -> 'ResumeFeatures':
+        """:param rows: (id, user_id, current_position, desired_position, experience, skill_ids)"""
+        rows = sorted(rows, key=lambda row: row[0])
+        return cls(
+            ids=np.array([row[0] for row in rows], dtype=np.int64),
+            user_ids=np.array([row[1] for row in rows], dtype=np.int64),
+            current_positions=position_vectors([row[2] for row in rows]),
+            desired_positions=position_vectors([row[3] for row in rows]),
+            experience=np.array([np.nan if row[4] is None else row[4] for row in rows], dtype=np.float64),
+            skill_resume_ids=np.array([row[0] for row in rows for _ in row[5]], dtype=np.int64),
+            skill_ids=np.array([skill_id for row in rows for skill_id in row[5]], dtype=np.int64),
+        )
+
+    @classmethod
+    def from_models(cls, resumes: tp.Iterable[models.Resume]) -> 'ResumeFeatures':
+        return cls.from_rows(
+            (resume.id, resume.user_id, resume.current_position, resume.desired_position, resume.experience, resume.skill_ids)
+            for resume in resumes
+        )
+
+    @classmethod
+    def load(cls, query: models.QuerySet | None = None) -> 'ResumeFeatures':
+        """:param query: резюме, по умолчанию - все опубликованные"""
+        if query is None:
+            query = models.Resume.objects.filter(state=models.ResumeState.PUBLISHED)
+
+        return cls.from_rows(
+            query.values_list('id', 'user_id', 'current_position', 'desired_position', 'experience', 'skill_ids')
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, resume_id: int):
+        index = np.searchsorted(self.ids, resume_id)
+        return index < len(self.ids) and self.ids[index] == resume_id
+
+    def insert(self, other: 'ResumeFeatures') -> 'ResumeFeatures':
+        """Новые признаки с добавленными резюме из other"""
+        indexes = np.searchsorted(self.ids, other.ids)
+        return ResumeFeatures(
+            ids=np.insert(self.ids, indexes, other.ids),
+            user_ids=np.insert(self.user_ids, indexes, other.user_ids),
+            current_positions=np.insert(self.current_positions, indexes, other.current_positions, axis=0),
+            desired_positions=np.insert(self.desired_positions, indexes, other.desired_positions, axis=0),
+            experience=np.insert(self.experience, indexes, other.experience),
+            skill_resume_ids=np.concatenate([self.skill_resume_ids, other.skill_resume_ids]),
+            skill_ids=np.concatenate([self.skill_ids, other.skill_ids]),
+        )
+
+    def without(self, resume_id: int) -> 'ResumeFeatures':
+        """Новые признаки без резюме resume_id"""
+        keep = self.ids != resume_id
+        keep_skills = self.skill_resume_ids != resume_id
+        return ResumeFeatures(
+            ids=self.ids[keep],
+            user_ids=self.user_ids[keep],
+            current_positions=self.current_positions[keep],
+            desired_positions=self.desired_positions[keep],
+            experience=self.experience[keep],
+            skill_resume_ids=self.skill_resume_ids[keep_skills],
+            skill_ids=self.skill_ids[keep_skills],
+        )
+
+
+class VacancyProfiles(tp.NamedTuple):
+    """Признаки вакансий в виде массивов, строки идут в порядке переданных вакансий"""
+
+    ids: np.ndarray
+    positions: np.ndarray  #: векторы триграмм должностей
+    experience: np.ndarray  #: требуемый опыт, NaN - не требуется
+    skill_vacancy_indexes: np.ndarray  #: пары (строка вакансии, навык)
+    skill_ids: np.ndarray
+
+    @classmethod
+    def from_models(cls, vacancies: tp.Iterable[models.Vacancy]) -> 'VacancyProfiles':
+        vacancies = list(vacancies)
+        texts = [_words(f'{vacancy.position} {vacancy.description}') for vacancy in vacancies]
+        # Навыки всех вакансий ищем одним запросом: из однословных - только упомянутые,
+        # составные (с пробелом или другим разделителем в названии) проверяем все, их немного
+        candidates = (
+            models.Skill.objects.annotate(lower_name=Lower('name'))
+            .filter(Q(lower_name__in=set().union(*texts)) | Q(name__regex=r'\W'))
+            .values_list('id', 'name')
+        )
+        skills = [(skill_id, _words(name)) for skill_id, name in candidates]
+        skills = [(skill_id, words) for skill_id, words in skills if words]
+        lengths = {len(words) for _, words in skills}
+
+        pairs = []
+        for index, text in enumerate(texts):
+            ngrams = {text[start:start + length] for length in lengths for start in range(len(text) - length + 1)}
+            pairs.extend((index, skill_id) for skill_id, words in skills if words in ngrams)
+
+        return cls(
+            ids=np.array([vacancy.id for vacancy in vacancies], dtype=np.int64),
+            positions=position_vectors([vacancy.position for vacancy in vacancies]),
+            experience=np.array([vacancy.experience or np.nan for vacancy in vacancies], dtype=np.float64),
+            skill_vacancy_indexes=np.array([index for index, _ in pairs], dtype=np.int64),
+            skill_ids=np.array([skill_id for _, skill_id in pairs], dtype=np.int64),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def score(vacancies: VacancyProfiles, features: ResumeFeatures) -> np.ndarray:
+    """Матрица оценок соответствия (вакансия, резюме)"""
+    position = np.maximum(
+        vacancies.positions @ features.current_positions.T,
+        vacancies.positions @ features.desired_positions.T,
+    )
+
+    required = vacancies.experience[:, np.newaxis]
+    experience = np.where(
+        np.isnan(required),
+        1.0,
+        np.nan_to_num(np.minimum(features.experience[np.newaxis, :] / required, 1), nan=0),
+    )
+
+    # Совпадения навыков - произведение матриц инцидентности по навыкам, общим для вакансий и резюме
+    common = np.intersect1d(vacancies.skill_ids, features.skill_ids)
+    vacancy_skills = np.zeros((len(vacancies), len(common)))
+    mask = np.isin(vacancies.skill_ids, common)
+    vacancy_skills[vacancies.skill_vacancy_indexes[mask], np.searchsorted(common, vacancies.skill_ids[mask])] = 1
+    resume_skills = np.zeros((len(features), len(common)))
+    mask = np.isin(features.skill_ids, common)
+    resume_skills[
+        np.searchsorted(features.ids, features.skill_resume_ids[mask]),
+        np.searchsorted(common, features.skill_ids[mask]),
+    ] = 1
+
+    vacancy_skill_counts = np.bincount(vacancies.skill_vacancy_indexes, minlength=len(vacancies))[:, np.newaxis]
+    skills = np.divide(
+        vacancy_skills @ resume_skills.T,
+        vacancy_skill_counts,
+        out=np.zeros((len(vacancies), len(features))),
+        where=vacancy_skill_counts > 0,
+    )
+
+    return POSITION_WEIGHT * position + EXPERIENCE_WEIGHT * experience + SKILLS_WEIGHT * skills
+
+
+class Ranking(tp.NamedTuple):
+    """Резюме, упорядоченные по убыванию оценки (при равенстве - по возрастанию ID)"""
+
+    ids: np.ndarray
+    scores: np.ndarray
+
+    @classmethod
+    def build(cls, ids: np.ndarray, scores: np.ndarray) -> 'Ranking':
+        order = np.lexsort((ids, -scores))
+        return cls(ids[order], scores[order])
+
+    def index_after(self, score_value: float, resume_id: int) -> int:
+        """Позиция первого резюме, идущего после (score_value, resume_id)"""
+        return int(np.count_nonzero(
+            (self.scores > score_value) | ((self.scores == score_value) & (self.ids <= resume_id))
+        ))
+
+    def insert(self, resume_id: int, score_value: float) -> 'Ranking':
+        index = np.count_nonzero((self.scores > score_value) | ((self.scores == score_value) & (self.ids < resume_id)))
+        return Ranking(np.insert(self.ids, index, resume_id), np.insert(self.scores, index, score_value))
+
+    def without(self, resume_id: int) -> 'Ranking':
+        keep = self.ids != resume_id
+        return Ranking(self.ids[keep], self.scores[keep])
+
+
+class _VacancyEntry(tp.NamedTuple):
+    profile: VacancyProfiles
+    ranking: Ranking
+    expires_at: float
+
+
+class MatchingEngine:
+    """Оценки резюме, закэшированные на вакансию (LRU + TTL)"""
+
+    def __init__(self, ttl: float, max_vacancies: int):
+        self.ttl = ttl
+        self.max_vacancies = max_vacancies
+        self._features: ResumeFeatures | None = None
+        self._features_expires_at = 0.0
+        self._vacancies: OrderedDict[int, _VacancyEntry] = OrderedDict()
+        self._lock = threading.RLock()
+
+    def get_ranking(self, vacancy: models.Vacancy) -> Ranking:
+        with self._lock:
+            entry = self._vacancies.get(vacancy.id)
+            if entry is not None and entry.expires_at > time.monotonic() and self._features is not None:
+                self._vacancies.move_to_end(vacancy.id)
+                return entry.ranking
+
+            features = self._get_features()
+            profile = VacancyProfiles.from_models([vacancy])
+            ranking = Ranking.build(features.ids, score(profile, features)[0])
+
+            self._vacancies[vacancy.id] = _VacancyEntry(profile, ranking, time.monotonic() + self.ttl)
+            self._vacancies.move_to_end(vacancy.id)
+            while len(self._vacancies) > self.max_vacancies:
+                self._vacancies.popitem(last=False)
+
+            return ranking
+
+    def add_resume(self, resume: models.Resume):
+        """Резюме опубликовано: досчитать его оценку для закэшированных вакансий"""
+        new = ResumeFeatures.from_models([resume])
+
+        with self._lock:
+            self.remove_resume(resume.id)
+            if self._features is None:
+                return
+
+            self._features = self._features.insert(new)
+            for vacancy_id, entry in self._vacancies.items():
+                ranking = entry.ranking.insert(resume.id, score(entry.profile, new)[0, 0])
+                self._vacancies[vacancy_id] = entry._replace(ranking=ranking)
+
+    def remove_resume(self, resume_id: int):
+        """Резюме скрыто или удалено: убрать его из кэша"""
+        with self._lock:
+            if self._features is None or resume_id not in self._features:
+                return
+
+            self._features = self._features.without(resume_id)
+            for vacancy_id, entry in self._vacancies.items():
+                self._vacancies[vacancy_id] = entry._replace(ranking=entry.ranking.without(resume_id))
+
+    def invalidate_vacancy(self, vacancy_id: int):
+        with self._lock:
+            self._vacancies.pop(vacancy_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._features = None
+            self._vacancies.clear()
+
+    def get_features(self) -> ResumeFeatures:
+        """Признаки всех опубликованных резюме"""
+        with self._lock:
+            return self._get_features()
+
+    def _get_features(self) -> ResumeFeatures:
+        if self._features is None or self._features_expires_at <= time.monotonic():
+            # Оценки вакансий посчитаны по старым признакам, пересчитаем их по мере обращения
+            self._vacancies.clear()
+            self._features = ResumeFeatures.load()
+            self._features_expires_at = time.monotonic() + self.ttl
+
+        return self._features
+
+
+matching_engine = MatchingEngine(ttl=settings.MATCHING_CACHE_TTL, max_vacancies=settings.MATCHING_CACHE_MAX_VACANCIES)
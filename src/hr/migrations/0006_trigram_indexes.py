@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Индексы не входят в состояние моделей: без pg_trgm миграция их пропускает,
+# и состояние не должно описывать индексы, которых может не быть в БД
+TRIGRAM_INDEXES = [
+    ('hr_resume', 'current_position', 'hr_resume_cur_position_trgm'),
+    ('hr_resume', 'desired_position', 'hr_resume_des_position_trgm'),
+    ('hr_user', 'email', 'hr_user_email_trgm'),
+    ('hr_vacancy', 'position', 'hr_vacancy_position_trgm'),
+]
+
+
+def _trigram_available(schema_editor) -> bool:
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm входит в contrib и есть в образе postgres, но в урезанных сборках его может не быть:
+    # поиск через ILIKE работает и без индекса, поэтому миграцию в таком случае не роняем
+    if not _trigram_available(schema_editor):
+        return
+
+    quote = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column, name in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} USING gin ({quote(column)} gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    for _, _, name in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0005_vacancyresponse'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
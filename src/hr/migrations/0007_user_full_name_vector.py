@@ -0,0 +1,48 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Вектор строится так же, как SearchVector('first_name', 'last_name', 'patronymic'),
+# чтобы результаты поиска по ФИО не поменялись
+CREATE_TRIGGER = """
+CREATE FUNCTION hr_user_full_name_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.full_name_vector := to_tsvector(
+        COALESCE(NEW.first_name, '') || ' ' || COALESCE(NEW.last_name, '') || ' ' || COALESCE(NEW.patronymic, '')
+    );
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+-- Только при изменении ФИО: сохранения last_login и пароля вектор не пересчитывают
+CREATE TRIGGER hr_user_full_name_vector_update
+    BEFORE INSERT OR UPDATE OF first_name, last_name, patronymic ON hr_user
+    FOR EACH ROW EXECUTE FUNCTION hr_user_full_name_vector_update();
+
+UPDATE hr_user SET first_name = first_name;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER hr_user_full_name_vector_update ON hr_user;
+DROP FUNCTION hr_user_full_name_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0006_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='full_name_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор ФИО'),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='user',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['full_name_vector'], name='hr_user_full_name_vector'),
+        ),
+    ]
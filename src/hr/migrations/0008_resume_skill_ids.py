@@ -0,0 +1,36 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import migrations, models
+
+
+def fill_skill_ids(apps, schema_editor):
+    Resume = apps.get_model('hr', 'Resume')
+    Resume.objects.update(
+        skill_ids=ArraySubquery(
+            Resume.skills.through.objects
+            .filter(resume_id=models.OuterRef('id'))
+            .order_by('skill_id')
+            .values('skill_id'),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0007_user_full_name_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='skill_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='ID навыков'),
+        ),
+        migrations.RunPython(fill_skill_ids, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='resume',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['skill_ids'], name='hr_resume_skill_ids'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.0.2 on 2026-10-17 19:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0008_resume_skill_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VacancyRecommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка соответствия')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hr.user')),
+                ('vacancy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='hr.vacancy')),
+            ],
+            options={
+                'verbose_name': 'рекомендованная вакансия',
+                'verbose_name_plural': 'рекомендованные вакансии',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='vacancyrecommendation',
+            index=models.Index(fields=['user', '-score', '-id'], name='hr_vacancy_recommendation_feed'),
+        ),
+        migrations.AddConstraint(
+            model_name='vacancyrecommendation',
+            constraint=models.UniqueConstraint(fields=('user', 'vacancy'), name='hr_vacancy_recommendation_unique'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в таблицы
+    atomic = False
+
+    dependencies = [
+        ('hr', '0009_vacancyrecommendation'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='resume',
+            index=models.Index(condition=models.Q(('state', 'PUBLISHED')), fields=['-published_at', '-id'], name='hr_resume_published'),
+        ),
+        AddIndexConcurrently(
+            model_name='user',
+            index=models.Index(condition=models.Q(('role', 'APPLICANT')), fields=['-id'], name='hr_user_applicants'),
+        ),
+        AddIndexConcurrently(
+            model_name='vacancy',
+            index=models.Index(condition=models.Q(('state', 'PUBLISHED')), fields=['-id'], name='hr_vacancy_published'),
+        ),
+        AddIndexConcurrently(
+            model_name='vacancy',
+            index=models.Index(fields=['creator', '-id'], name='hr_vacancy_creator'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_department(apps, schema_editor):
+    Vacancy = apps.get_model('hr', 'Vacancy')
+    User = apps.get_model('hr', 'User')
+    Vacancy.objects.update(
+        department_id=models.Subquery(
+            User.objects.filter(id=models.OuterRef('creator_id')).values('department_id'),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0010_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Департамент создателя на момент создания вакансии, заполняется автоматически', null=True, on_delete=django.db.models.deletion.PROTECT, to='hr.department', verbose_name='Департамент'),
+        ),
+        migrations.RunPython(fill_department, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='vacancy',
+            name='department',
+            field=models.ForeignKey(db_index=False, editable=False, help_text='Департамент создателя на момент создания вакансии, заполняется автоматически', on_delete=django.db.models.deletion.PROTECT, to='hr.department', verbose_name='Департамент'),
+        ),
+        migrations.RemoveIndex(
+            model_name='vacancy',
+            name='hr_vacancy_creator',
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['department', '-id'], name='hr_vacancy_department'),
+        ),
+    ]
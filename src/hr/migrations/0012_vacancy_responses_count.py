@@ -0,0 +1,43 @@
+# Generated by Django 4.0.2 on 2026-10-17 19:54
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_responses_count(apps, schema_editor):
+    Vacancy = apps.get_model('hr', 'Vacancy')
+    VacancyResponse = apps.get_model('hr', 'VacancyResponse')
+    responses_count = models.Subquery(
+        VacancyResponse.objects
+        .filter(vacancy_id=models.OuterRef('id'))
+        .order_by()
+        .values('vacancy_id')
+        .annotate(count=models.Count('id'))
+        .values('count'),
+    )
+    # Менеджеры еще не просматривали отклики, поэтому все они новые
+    Vacancy.objects.update(
+        responses_count=Coalesce(responses_count, 0),
+        new_responses_count=Coalesce(responses_count, 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hr', '0011_vacancy_department'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='new_responses_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='С момента последнего просмотра откликов менеджером', verbose_name='Новых откликов'),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='responses_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Откликов'),
+        ),
+        migrations.RunPython(fill_responses_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся без блокировки записи в таблицу
+    atomic = False
+
+    dependencies = [
+        ('hr', '0012_vacancy_responses_count'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='vacancyresponse',
+            index=models.Index(fields=['-created_at', '-id'], name='hr_vacancy_response_created'),
+        ),
+        AddIndexConcurrently(
+            model_name='vacancyresponse',
+            index=models.Index(fields=['vacancy', '-created_at', '-id'], name='hr_vacancy_response_vacancy'),
+        ),
+    ]
@@ -1,4 +1,7 @@
 from django.contrib.auth.models import AbstractBaseUser
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
 
@@ -39,12 +42,20 @@ class User(AbstractBaseUser):
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            # Триграммные индексы для поиска через ILIKE создаются миграцией 0006_trigram_indexes
+            GinIndex(fields=['full_name_vector'], name='hr_user_full_name_vector'),
+            # get_applicants_for_manager
+            models.Index(fields=['-id'], name='hr_user_applicants', condition=models.Q(role='APPLICANT')),
+        ]
 
     email = models.EmailField('Адрес электронной почты', unique=True)
 
     first_name = models.CharField('Имя', max_length=255)
     last_name = models.CharField('Фамилия', max_length=255)
     patronymic = models.CharField('Отчество', max_length=255, null=True, blank=True)
+    # Заполняется триггером в БД (см. миграцию 0007_user_full_name_vector)
+    full_name_vector = SearchVectorField('Поисковый вектор ФИО', null=True, editable=False)
 
     department = models.ForeignKey(Department, verbose_name='Департамент', on_delete=models.PROTECT)
     role = models.CharField(
@@ -58,7 +69,11 @@ class User(AbstractBaseUser):
 
     @property
     def full_name(self):
-        return f'{self.last_name} {self.first_name} {self.patronymic or ""}'.strip()
+        return self.format_full_name(self.last_name, self.first_name, self.patronymic)
+
+    @staticmethod
+    def format_full_name(last_name: str, first_name: str, patronymic: str | None) -> str:
+        return f'{last_name} {first_name} {patronymic or ""}'.strip()
 
     def __str__(self):
         return f'{self.full_name} ({self.email})'
@@ -82,6 +97,16 @@ class Resume(BaseModel):
     class Meta:
         verbose_name = 'Резюме'
         verbose_name_plural = 'Резюме'
+        indexes = [
+            # Триграммные индексы для поиска через ILIKE создаются миграцией 0006_trigram_indexes
+            GinIndex(fields=['skill_ids'], name='hr_resume_skill_ids'),
+            # get_resumes_for_manager
+            models.Index(
+                fields=['-published_at', '-id'],
+                name='hr_resume_published',
+                condition=models.Q(state='PUBLISHED'),
+            ),
+        ]
 
     State = ResumeState
 
@@ -100,6 +125,8 @@ class Resume(BaseModel):
         blank=True,
     )
     skills = models.ManyToManyField(Skill, verbose_name='Навыки')
+    # Копия skills для поиска по навыкам через GIN индекс, поддерживается сигналом m2m_changed (см. hr.signals)
+    skill_ids = ArrayField(models.BigIntegerField(), verbose_name='ID навыков', default=list, blank=True, editable=False)
     experience = models.PositiveIntegerField('Опыт работы', null=True, blank=True)
     bio = models.TextField('Информация о себе', null=True, blank=True)
     created_at = models.DateTimeField('Дата/Время создания', auto_now_add=True)
@@ -116,6 +143,13 @@ class Vacancy(BaseModel):
     class Meta:
         verbose_name = 'Вакансия'
         verbose_name_plural = 'Вакансии'
+        indexes = [
+            # Триграммные индексы для поиска через ILIKE создаются миграцией 0006_trigram_indexes
+            # get_vacancies_for_applicant
+            models.Index(fields=['-id'], name='hr_vacancy_published', condition=models.Q(state='PUBLISHED')),
+            # get_vacancies_for_manager
+            models.Index(fields=['department', '-id'], name='hr_vacancy_department'),
+        ]
 
     State = VacancyState
 
@@ -124,6 +158,14 @@ class Vacancy(BaseModel):
         on_delete=models.CASCADE,
         help_text='Менеджер, разместивший вакансию',
     )
+    department = models.ForeignKey(
+        Department,
+        on_delete=models.PROTECT,
+        editable=False,
+        db_index=False,
+        verbose_name='Департамент',
+        help_text='Департамент создателя на момент создания вакансии, заполняется автоматически',
+    )
 
     state = models.CharField(
         'Состояние',
@@ -144,14 +186,46 @@ class Vacancy(BaseModel):
     created_at = models.DateTimeField('Дата/Время создания', auto_now=True)
     published_at = models.DateTimeField('Дата/Время публикации', null=True, blank=True)
 
+    # Счетчики обновляются атомарным UPDATE в respond_vacancy, списки не считают отклики по строкам
+    responses_count = models.PositiveIntegerField('Откликов', default=0, editable=False)
+    new_responses_count = models.PositiveIntegerField(
+        'Новых откликов',
+        default=0,
+        editable=False,
+        help_text='С момента последнего просмотра откликов менеджером',
+    )
+
 
 class VacancyResponse(BaseModel):
     class Meta:
         verbose_name = 'отклик на вакансию'
         verbose_name_plural = 'отклики на вакансию'
+        indexes = [
+            # get_vacancy_responses_for_manager: лента департамента и отклики на одну вакансию
+            models.Index(fields=['-created_at', '-id'], name='hr_vacancy_response_created'),
+            models.Index(fields=['vacancy', '-created_at', '-id'], name='hr_vacancy_response_vacancy'),
+        ]
 
     vacancy = models.ForeignKey(Vacancy, on_delete=models.RESTRICT)
     resume = models.ForeignKey(Resume, on_delete=models.RESTRICT)
     applicant_message = models.TextField('Сопроводительное письмо', null=True, blank=True,)
     created_at = models.DateTimeField('Создано', auto_now_add=True)
 
+
+class VacancyRecommendation(BaseModel):
+    """Вакансия в ленте рекомендаций соискателя (см. hr.recommendations)"""
+
+    class Meta:
+        verbose_name = 'рекомендованная вакансия'
+        verbose_name_plural = 'рекомендованные вакансии'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'vacancy'], name='hr_vacancy_recommendation_unique'),
+        ]
+        indexes = [
+            # Страница ленты - один проход по индексу, в том числе с курсором
+            models.Index(fields=['user', '-score', '-id'], name='hr_vacancy_recommendation_feed'),
+        ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE)
+    score = models.FloatField('Оценка соответствия')
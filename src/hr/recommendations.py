@@ -0,0 +1,78 @@
+"""Лента рекомендованных вакансий соискателя.
+
+Лента хранится в таблице VacancyRecommendation: вакансия попадает в ленту соискателя,
+если лучшая из оценок его опубликованных резюме (см. hr.matching) не ниже RECOMMENDATION_MIN_SCORE.
+Лента не пересчитывается при чтении, а обновляется точечно (см. hr.signals):
+- публикация/скрытие вакансии пересчитывает ее строки во всех лентах;
+- публикация/скрытие резюме пересчитывает ленту его владельца.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from . import models
+from .matching import ResumeFeatures
+from .matching import VacancyProfiles
+from .matching import matching_engine
+from .matching import score
+
+
+def _best_per_user(user_ids: np.ndarray, scores: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Лучшая оценка каждого пользователя среди оценок его резюме"""
+    order = np.argsort(user_ids, kind='stable')
+    user_ids, scores = user_ids[order], scores[order]
+    starts = np.flatnonzero(np.r_[True, user_ids[1:] != user_ids[:-1]])
+    return user_ids[starts], np.maximum.reduceat(scores, starts)
+
+
+def _save(pairs: list[tuple[int, int, float]]):
+    """:param pairs: (user_id, vacancy_id, score)"""
+    # Пересчеты вакансии и ленты соискателя запускаются после коммита и могут идти одновременно:
+    # пару, которую уже записал параллельный пересчет, пропускаем, а не роняем запрос на уникальности
+    models.VacancyRecommendation.objects.bulk_create(
+        [
+            models.VacancyRecommendation(user_id=user_id, vacancy_id=vacancy_id, score=score_value)
+            for user_id, vacancy_id, score_value in pairs
+            if score_value >= settings.RECOMMENDATION_MIN_SCORE
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def refresh_vacancy(vacancy: models.Vacancy):
+    """Пересчитать вакансию во всех лентах"""
+    models.VacancyRecommendation.objects.filter(vacancy_id=vacancy.id).delete()
+    if vacancy.state != models.VacancyState.PUBLISHED:
+        return
+
+    features = matching_engine.get_features()
+    if not len(features):
+        return
+
+    user_ids, scores = _best_per_user(features.user_ids, score(VacancyProfiles.from_models([vacancy]), features)[0])
+    _save([(user_id, vacancy.id, score_value) for user_id, score_value in zip(user_ids.tolist(), scores.tolist())])
+
+
+@transaction.atomic
+def refresh_user(user_id: int):
+    """Пересчитать ленту соискателя"""
+    models.VacancyRecommendation.objects.filter(user_id=user_id).delete()
+
+    features = ResumeFeatures.load(
+        models.Resume.objects.filter(user_id=user_id, state=models.ResumeState.PUBLISHED),
+    )
+    if not len(features):
+        return
+
+    vacancies = VacancyProfiles.from_models(
+        models.Vacancy.objects
+        .filter(state=models.VacancyState.PUBLISHED)
+        .only('id', 'position', 'description', 'experience')
+    )
+    if not len(vacancies):
+        return
+
+    scores = score(vacancies, features).max(axis=1)
+    _save([(user_id, vacancy_id, score_value) for vacancy_id, score_value in zip(vacancies.ids.tolist(), scores.tolist())])
@@ -1,4 +1,7 @@
 import datetime as dt
+import hashlib
+import threading
+from collections import OrderedDict
 
 from django.conf import settings
 from jose import jwt
@@ -21,6 +24,56 @@ class TokenExpiredError(Exception):
     ...
 
 
+class TokenCache:
+    """Ограниченный по размеру кэш уже проверенных токенов.
+
+    Ключ - хэш токена вместе с секретом, значение - разобранный UserToken.
+    Запись живет до истечения срока действия токена.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[bytes, UserToken] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_key(token: str) -> bytes:
+        return hashlib.sha256(f'{settings.SECRET_KEY}:{token}'.encode()).digest()
+
+    def get(self, key: bytes) -> UserToken | None:
+        with self._lock:
+            user_token = self._data.get(key)
+            if user_token is not None and user_token.expired_at <= dt.datetime.now(dt.timezone.utc):
+                del self._data[key]
+                user_token = None
+
+            if user_token is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._data.move_to_end(key)
+            return user_token
+
+    def set(self, key: bytes, user_token: UserToken):
+        with self._lock:
+            self._data[key] = user_token
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+token_cache = TokenCache(max_size=settings.JWT_CACHE_MAX_SIZE)
+
+
 def encode_jwt(user: models.User) -> str:
     expired_at = dt.datetime.now() + settings.JWT_EXPIRATION_INTERVAL
     token = UserToken(
@@ -32,9 +85,16 @@ def encode_jwt(user: models.User) -> str:
 
 
 def decode_jwt(token: str) -> UserToken:
+    cache_key = token_cache.get_key(token)
+    user_token = token_cache.get(cache_key)
+    if user_token is not None:
+        return user_token
+
     try:
         token_dict = jwt.decode(token, settings.SECRET_KEY)
     except jwt.ExpiredSignatureError:
         raise TokenExpiredError
 
-    return UserToken(**token_dict)
+    user_token = UserToken(**token_dict)
+    token_cache.set(cache_key, user_token)
+    return user_token
@@ -0,0 +1,173 @@
+import json
+import threading
+import time
+import typing as tp
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import models
+
+# Хэш пароля и поисковый вектор не кладем в сессию: при обращении к ним поле догрузится из БД
+_USER_FIELDS = tuple(
+    field for field in models.User._meta.concrete_fields if field.attname not in ('password', 'full_name_vector')
+)
+_DEPARTMENT_FIELDS = tuple(models.Department._meta.concrete_fields)
+
+SessionData = dict[str, dict[str, tp.Any]]
+
+
+class LocalSessionTier:
+    """Хранилище сессий в памяти процесса с TTL и вытеснением давно не использованных записей (LRU)"""
+
+    def __init__(self, ttl: float, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._data: OrderedDict[int, tuple[float, SessionData]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> SessionData | None:
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None:
+                return None
+
+            expires_at, data = entry
+            if expires_at < time.monotonic():
+                del self._data[user_id]
+                return None
+
+            self._data.move_to_end(user_id)
+            return data
+
+    def set(self, user_id: int, data: SessionData):
+        with self._lock:
+            self._data[user_id] = (time.monotonic() + self.ttl, data)
+            self._data.move_to_end(user_id)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, user_id: int):
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisSessionTier:
+    """Общее для всех процессов хранилище сессий в Redis"""
+
+    key_prefix = 'hr:session:user:'
+
+    def __init__(self, client: tp.Any, ttl: float):
+        self.client = client
+        self.ttl = ttl
+
+    def _key(self, user_id: int) -> str:
+        return f'{self.key_prefix}{user_id}'
+
+    def get(self, user_id: int) -> SessionData | None:
+        raw = self.client.get(self._key(user_id))
+        if raw is None:
+            return None
+
+        return json.loads(raw)
+
+    def set(self, user_id: int, data: SessionData):
+        self.client.set(self._key(user_id), json.dumps(data, cls=DjangoJSONEncoder), ex=int(self.ttl))
+
+    def delete(self, user_id: int):
+        self.client.delete(self._key(user_id))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f'{self.key_prefix}*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class SessionCache:
+    """Кэш сессий пользователей: строка пользователя вместе с департаментом.
+
+    Сначала ищем в памяти процесса, затем в Redis (если настроен), и только потом идем в БД.
+    Записи инвалидируются сигналами сохранения/удаления пользователя и департамента,
+    локальные записи других процессов живут не дольше TTL.
+    """
+
+    def __init__(self, local: LocalSessionTier, remote: RedisSessionTier | None = None):
+        self.local = local
+        self.remote = remote
+
+    def get_user(self, user_id: int) -> models.User | None:
+        data = self.local.get(user_id)
+
+        if data is None and self.remote is not None:
+            data = self.remote.get(user_id)
+            if data is not None:
+                self.local.set(user_id, data)
+
+        if data is None:
+            user = models.User.objects.select_related('department').get_or_none(id=user_id)
+            if user is None:
+                return None
+
+            data = _dump_user(user)
+            self.local.set(user_id, data)
+            if self.remote is not None:
+                self.remote.set(user_id, data)
+
+        # Каждый раз собираем новый экземпляр, чтобы изменения в одном запросе не протекали в другие
+        return _load_user(data)
+
+    def invalidate(self, user_id: int):
+        self.local.delete(user_id)
+        if self.remote is not None:
+            self.remote.delete(user_id)
+
+    def clear(self):
+        self.local.clear()
+        if self.remote is not None:
+            self.remote.clear()
+
+
+def _dump_user(user: models.User) -> SessionData:
+    return {
+        'user': {field.attname: field.value_from_object(user) for field in _USER_FIELDS},
+        'department': {field.attname: field.value_from_object(user.department) for field in _DEPARTMENT_FIELDS},
+    }
+
+
+def _load_user(data: SessionData) -> models.User:
+    # Значения из Redis приходят после json, поэтому приводим их к python-типам полей
+    user = models.User.from_db(
+        'default',
+        [field.attname for field in _USER_FIELDS],
+        [field.to_python(data['user'][field.attname]) for field in _USER_FIELDS],
+    )
+    user.department = models.Department.from_db(
+        'default',
+        [field.attname for field in _DEPARTMENT_FIELDS],
+        [field.to_python(data['department'][field.attname]) for field in _DEPARTMENT_FIELDS],
+    )
+    return user
+
+
+def _create_session_cache() -> SessionCache:
+    remote = None
+    if settings.SESSION_CACHE_REDIS_URL:
+        import redis
+
+        remote = RedisSessionTier(
+            redis.Redis.from_url(settings.SESSION_CACHE_REDIS_URL),
+            ttl=settings.SESSION_CACHE_TTL,
+        )
+
+    return SessionCache(
+        LocalSessionTier(ttl=settings.SESSION_CACHE_TTL, max_size=settings.SESSION_CACHE_MAX_SIZE),
+        remote,
+    )
+
+
+session_cache = _create_session_cache()
@@ -0,0 +1,102 @@
+from django.contrib.postgres.expressions import ArraySubquery
+from django.db import transaction
+from django.db.models import OuterRef
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from . import models
+from . import recommendations
+from .api.departments import department_directory
+from .matching import matching_engine
+from .sessions import session_cache
+
+
+@receiver(post_save, sender=models.User)
+@receiver(post_delete, sender=models.User)
+def invalidate_user_session(instance: models.User, **_):
+    session_cache.invalidate(instance.id)
+
+
+@receiver(post_save, sender=models.Department)
+@receiver(post_delete, sender=models.Department)
+def invalidate_departments(**_):
+    department_directory.invalidate()
+    # Департаменты меняются редко (через админку), проще сбросить все сессии
+    session_cache.clear()
+
+
+@receiver(pre_save, sender=models.Vacancy)
+def fill_vacancy_department(instance: models.Vacancy, **_):
+    # Вакансии из админки и фабрик создаются без департамента, берем его у создателя
+    if instance.department_id is None:
+        instance.department_id = instance.creator.department_id
+
+
+@receiver(m2m_changed, sender=models.Resume.skills.through)
+def refresh_resume_skill_ids(instance, action: str, reverse: bool, pk_set: set[int] | None, **_):
+    if reverse and action == 'pre_clear':
+        # После очистки навыка затронутые резюме уже не найти
+        instance._cleared_resume_ids = list(instance.resume_set.values_list('id', flat=True))
+        return
+
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        resume_ids = [instance.id]
+    elif action == 'post_clear':
+        resume_ids = instance.__dict__.pop('_cleared_resume_ids', [])
+    else:
+        resume_ids = pk_set
+
+    models.Resume.objects.filter(id__in=resume_ids).update(
+        skill_ids=ArraySubquery(
+            models.Resume.skills.through.objects
+            .filter(resume_id=OuterRef('id'))
+            .order_by('skill_id')
+            .values('skill_id'),
+        ),
+    )
+
+    if not reverse:
+        # Иначе последующий resume.save() перезапишет skill_ids устаревшим значением
+        instance.refresh_from_db(fields=['skill_ids'])
+        if instance.state == models.ResumeState.PUBLISHED:
+            transaction.on_commit(lambda: matching_engine.add_resume(instance))
+            transaction.on_commit(lambda: recommendations.refresh_user(instance.user_id))
+
+
+@receiver(post_save, sender=models.Resume)
+def refresh_resume_matching(instance: models.Resume, **_):
+    # Редактируются только черновики, поэтому опубликованное резюме достаточно добавить при публикации
+    if instance.state == models.ResumeState.PUBLISHED:
+        transaction.on_commit(lambda: matching_engine.add_resume(instance))
+    else:
+        transaction.on_commit(lambda: matching_engine.remove_resume(instance.id))
+
+
+@receiver(post_delete, sender=models.Resume)
+def remove_resume_matching(instance: models.Resume, **_):
+    transaction.on_commit(lambda: matching_engine.remove_resume(instance.id))
+
+
+@receiver(post_save, sender=models.Vacancy)
+@receiver(post_delete, sender=models.Vacancy)
+def invalidate_vacancy_matching(instance: models.Vacancy, **_):
+    transaction.on_commit(lambda: matching_engine.invalidate_vacancy(instance.id))
+
+
+@receiver(post_save, sender=models.Resume)
+@receiver(post_delete, sender=models.Resume)
+def refresh_resume_recommendations(instance: models.Resume, **_):
+    # Черновики в подборе не участвуют, а из опубликованного резюме в черновик не вернуться
+    if instance.state != models.ResumeState.DRAFT:
+        transaction.on_commit(lambda: recommendations.refresh_user(instance.user_id))
+
+
+@receiver(post_save, sender=models.Vacancy)
+def refresh_vacancy_recommendations(instance: models.Vacancy, **_):
+    transaction.on_commit(lambda: recommendations.refresh_vacancy(instance))
@@ -0,0 +1,119 @@
+import pytest
+from dirty_equals import IsPartialDict
+
+from hr import factories
+from hr import models
+from hr.api import schemas
+from hr.api.departments import department_directory
+from hr.api.pagination import PaginationCursorParams
+from hr.api.pagination import TypedPaginator
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def resume(user):
+    resume = factories.ResumeFactory.create(
+        user=user,
+        published=True,
+        current_position='Python разработчик',
+        experience=3,
+    )
+    resume.skills.set([factories.SkillFactory.create(name='django')])
+    return resume
+
+
+def _get_feed(jsonrpc_request, pagination=None):
+    resp = jsonrpc_request(
+        'get_recommended_vacancies_for_applicant',
+        {
+            'pagination': pagination or {'count': True},
+        },
+    )
+    assert 'result' in resp, resp.get('error')
+    return resp['result']
+
+
+def test_ok(user, jsonrpc_request, resume):
+    best = factories.VacancyFactory.create(published=True, position='Python разработчик', description='Пишем на django')
+    good = factories.VacancyFactory.create(published=True, position='Разработчик', experience=5, description='Бэкенд')
+    factories.VacancyFactory.create(published=True, position='Повар', experience=10, description='Кухня')  # не подходит
+    factories.VacancyFactory.create(position='Python разработчик', description='django')  # черновик
+    factories.VacancyFactory.create(hidden=True, position='Python разработчик', description='django')
+
+    feed = _get_feed(jsonrpc_request)
+
+    assert feed == IsPartialDict({'has_next': False, 'total_size': 2})
+    assert [item['vacancy']['id'] for item in feed['items']] == [best.id, good.id]
+    assert feed['items'][0] == {
+        'score': pytest.approx(1.0),
+        'vacancy': IsPartialDict(
+            {
+                'id': best.id,
+                'position': best.position,
+                'department_id': best.creator.department_id,
+            },
+        ),
+    }
+    assert feed['items'][0]['score'] > feed['items'][1]['score']
+
+
+def test_feed_is_refreshed_incrementally(user, jsonrpc_request, resume):
+    vacancy = factories.VacancyFactory.create(position='Python разработчик', description='django')
+    assert _get_feed(jsonrpc_request)['items'] == []
+
+    vacancy.state = models.VacancyState.PUBLISHED
+    vacancy.save()
+    assert [item['vacancy']['id'] for item in _get_feed(jsonrpc_request)['items']] == [vacancy.id]
+
+    vacancy.state = models.VacancyState.HIDDEN
+    vacancy.save()
+    assert _get_feed(jsonrpc_request)['items'] == []
+
+    vacancy.state = models.VacancyState.PUBLISHED
+    vacancy.save()
+    resume.state = models.ResumeState.HIDDEN
+    resume.save()
+    assert _get_feed(jsonrpc_request)['items'] == []
+
+    # Новое резюме пересчитывает ленту по уже опубликованным вакансиям
+    factories.ResumeFactory.create(user=user, published=True, current_position='Разработчик python')
+    assert [item['vacancy']['id'] for item in _get_feed(jsonrpc_request)['items']] == [vacancy.id]
+
+
+def test_cursor_pagination(user, jsonrpc_request, resume):
+    vacancies = [
+        factories.VacancyFactory.create(published=True, position='Python разработчик', description='django')
+        for _ in range(3)
+    ]
+
+    first_page = jsonrpc_request(
+        'get_recommended_vacancies_for_applicant',
+        {'pagination_cursor': {'limit': 2}},
+    )['result']
+    second_page = jsonrpc_request(
+        'get_recommended_vacancies_for_applicant',
+        {'pagination_cursor': {'limit': 2, 'cursor': first_page['next_cursor']}},
+    )['result']
+
+    assert second_page['next_cursor'] is None
+    # При равной оценке сначала более новые вакансии
+    assert [item['vacancy']['id'] for item in first_page['items'] + second_page['items']] == [
+        vacancy.id for vacancy in reversed(vacancies)
+    ]
+
+
+def test_page_is_read_in_one_query(user, resume, django_assert_num_queries):
+    factories.VacancyFactory.create_batch(5, published=True, position='Python разработчик', description='django')
+    department_directory.list_schemas()
+
+    query = models.VacancyRecommendation.objects.filter(user_id=user.id).order_by('-score', '-id')
+    paginator = TypedPaginator(schemas.RecommendedVacancySchema, query)
+    first_page = paginator.get_response(PaginationCursorParams(limit=2))
+
+    with django_assert_num_queries(1):
+        response = paginator.get_response(PaginationCursorParams(limit=2, cursor=first_page.next_cursor))
+
+    assert len(response.items) == 2
@@ -1,4 +1,5 @@
 import pytest
+from django.db import connection
 from dirty_equals import IsListOrTuple
 from dirty_equals import IsPartialDict
 
@@ -26,6 +27,8 @@ def test_ok(jsonrpc_request):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 3,
         'items': IsListOrTuple(
             *[
@@ -70,6 +73,8 @@ def test_filter_by_department(jsonrpc_request):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': [
             IsPartialDict(
                 {
@@ -118,6 +123,8 @@ def test_filter_by_position(jsonrpc_request, position_param):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': [
             IsPartialDict(
                 {
@@ -154,6 +161,8 @@ def test_filter_by_experience(jsonrpc_request):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 IsPartialDict(
@@ -201,6 +210,8 @@ def test_filter_by_published_at(jsonrpc_request, freezer):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 IsPartialDict(
@@ -215,3 +226,152 @@ def test_filter_by_published_at(jsonrpc_request, freezer):
         ),
         'total_size': 3,
     }, resp.get('error')
+
+
+def test_cursor_pagination(jsonrpc_request):
+    vacancies = factories.VacancyFactory.create_batch(5, published=True)
+    expected_ids = sorted((vacancy.id for vacancy in vacancies), reverse=True)
+
+    received_ids = []
+    cursor = None
+    while True:
+        resp = jsonrpc_request(
+            'get_vacancies_for_applicant',
+            {
+                'pagination_cursor': {
+                    'cursor': cursor,
+                    'limit': 2,
+                },
+            },
+        )
+
+        result = resp.get('result')
+        assert result is not None, resp.get('error')
+
+        received_ids.extend(item['id'] for item in result['items'])
+        cursor = result['next_cursor']
+        assert result['has_next'] is (cursor is not None)
+
+        if cursor is None:
+            break
+
+    assert received_ids == expected_ids
+
+
+@pytest.mark.parametrize(
+    'cursor',
+    [
+        'not a cursor',
+        'WyJhYmMiXQ==',  # ["abc"]
+        'WzEsIDJd',  # [1, 2]
+    ],
+)
+def test_cursor_pagination_invalid_cursor(jsonrpc_request, cursor):
+    factories.VacancyFactory.create(published=True)
+
+    resp = jsonrpc_request(
+        'get_vacancies_for_applicant',
+        {
+            'pagination_cursor': {
+                'cursor': cursor,
+            },
+        },
+    )
+
+    assert resp.get('error') == IsPartialDict({'code': -32602}), resp.get('result')
+
+
+def test_mutual_exclusive_pagination(jsonrpc_request):
+    resp = jsonrpc_request(
+        'get_vacancies_for_applicant',
+        {
+            'pagination': {},
+            'pagination_cursor': {},
+        },
+    )
+
+    assert resp.get('error') == IsPartialDict({'code': -32602}), resp.get('result')
+
+
+@pytest.mark.parametrize(
+    'page, expected_ids_slice, expected_has_next',
+    [
+        (1, slice(0, 2), True),
+        (2, slice(2, 3), False),
+        (3, slice(0, 0), False),  # пустая страница - количество считается отдельным запросом
+    ],
+)
+def test_total_size(jsonrpc_request, page, expected_ids_slice, expected_has_next):
+    vacancies = factories.VacancyFactory.create_batch(3, published=True)
+    expected_ids = sorted((vacancy.id for vacancy in vacancies), reverse=True)
+
+    resp = jsonrpc_request(
+        'get_vacancies_for_applicant',
+        {
+            'pagination': {
+                'page': page,
+                'per_page': 2,
+                'count': True,
+            },
+        },
+    )
+
+    result = resp.get('result')
+    assert result == IsPartialDict({'has_next': expected_has_next, 'total_size': 3}), resp.get('error')
+    assert [item['id'] for item in result['items']] == expected_ids[expected_ids_slice]
+
+
+def test_estimated_total_size(jsonrpc_request):
+    factories.VacancyFactory.create_batch(30, published=True)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE hr_vacancy')
+
+    resp = jsonrpc_request(
+        'get_vacancies_for_applicant',
+        {
+            'pagination': {
+                'per_page': 10,
+                'count': True,
+                'count_mode': 'ESTIMATE',
+            },
+        },
+    )
+
+    assert resp.get('result') == IsPartialDict(
+        {
+            'has_next': True,
+            'total_size': 30,
+            'total_size_is_exact': False,
+        },
+    ), resp.get('error')
+
+
+@pytest.mark.parametrize(
+    'vacancies_count, expected_total_size, expected_is_exact',
+    [
+        (4, 4, True),
+        (6, 5, False),
+    ],
+)
+def test_capped_total_size(jsonrpc_request, settings, vacancies_count, expected_total_size, expected_is_exact):
+    settings.PAGINATION_COUNT_CAP = 5
+    factories.VacancyFactory.create_batch(vacancies_count, published=True)
+
+    resp = jsonrpc_request(
+        'get_vacancies_for_applicant',
+        {
+            'pagination': {
+                'per_page': 2,
+                'count': True,
+                'count_mode': 'CAPPED',
+            },
+        },
+    )
+
+    assert resp.get('result') == IsPartialDict(
+        {
+            'has_next': True,
+            'total_size': expected_total_size,
+            'total_size_is_exact': expected_is_exact,
+        },
+    ), resp.get('error')
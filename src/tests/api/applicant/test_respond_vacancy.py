@@ -56,6 +56,10 @@ def test_ok(jsonrpc_request, user, freezer):
         'applicant_message': 'test_message',
     }
 
+    vacancy.refresh_from_db()
+    assert vacancy.responses_count == 1
+    assert vacancy.new_responses_count == 1
+
 
 def test_vacancy_does_not_exists_error(jsonrpc_request, user):
     resume = factories.ResumeFactory.create(published=True, user=user)
@@ -149,3 +153,6 @@ def test_already_created_error(jsonrpc_request, user):
     )
 
     assert resp.get('error') == {'code': 5003, 'message': 'Vacancy response already exists'}
+
+    vacancy.refresh_from_db()
+    assert vacancy.responses_count == 0
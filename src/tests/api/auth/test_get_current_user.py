@@ -1,5 +1,7 @@
 import pytest
 
+from hr import models
+
 
 pytestmark = [
     pytest.mark.django_db(transaction=True),
@@ -26,3 +28,29 @@ def test_ok(jsonrpc_request, user):
 def test_not_authorized__forbidden(jsonrpc_request):
     resp = jsonrpc_request('get_current_user', use_auth=False)
     assert resp.get('error') == {'code': 403, 'message': 'forbidden'}
+
+
+def test_session_is_cached(jsonrpc_request, user):
+    resp = jsonrpc_request('get_current_user')
+    assert resp.get('result', {}).get('first_name') == user.first_name, resp.get('error')
+
+    # update() не отправляет сигналов, поэтому сессия остается в кэше
+    models.User.objects.filter(id=user.id).update(first_name='Закэшированный')
+    resp = jsonrpc_request('get_current_user')
+    assert resp.get('result', {}).get('first_name') == user.first_name, resp.get('error')
+
+    user.first_name = 'Обновленный'
+    user.save()
+
+    resp = jsonrpc_request('get_current_user')
+    assert resp.get('result', {}).get('first_name') == 'Обновленный', resp.get('error')
+
+
+def test_deleted_user__forbidden(jsonrpc_request, user):
+    resp = jsonrpc_request('get_current_user')
+    assert resp.get('error') is None
+
+    user.delete()
+
+    resp = jsonrpc_request('get_current_user')
+    assert resp.get('error') == {'code': 403, 'message': 'forbidden'}
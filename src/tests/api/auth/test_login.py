@@ -1,6 +1,13 @@
+import asyncio
 import datetime as dt
+import threading
+
 import pytest
 from hr import factories
+from hr import models
+from hr.api import errors
+from hr.api import schemas
+from hr.api.jsonrpc import login
 from hr import security
 from dirty_equals import IsStr
 
@@ -87,3 +94,19 @@ def test_ok(jsonrpc_request, freezer, settings):
     actual_token = security.decode_jwt(token)
     assert actual_token.user_id == user.id
     # TODO: проверять время жизни токена
+
+
+def test_concurrent_logins_overlap(monkeypatch):
+    # Поиск пользователя в обоих вызовах должен выполняться одновременно, иначе барьер не пройти
+    barrier = threading.Barrier(2, timeout=5)
+
+    def get_or_none(**_):
+        barrier.wait()
+
+    monkeypatch.setattr(models.User.objects, 'get_or_none', get_or_none)
+    credentials = schemas.LoginSchema(email='user@example.com', password='password')
+
+    async def login_twice():
+        return await asyncio.gather(login(credentials), login(credentials), return_exceptions=True)
+
+    assert [type(result) for result in asyncio.run(login_twice())] == [errors.Forbidden, errors.Forbidden]
@@ -33,6 +33,7 @@ def test_ok(
     vacancy = models.Vacancy.objects.last()
 
     assert vacancy.creator == user
+    assert vacancy.department_id == user.department_id
     assert vacancy.state == models.VacancyState.DRAFT
     assert vacancy.position == 'developer'
     assert vacancy.experience == experience
@@ -28,6 +28,8 @@ def test_ok(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 {
@@ -90,6 +92,8 @@ def test_search_by_full_name(jsonrpc_request, user, search_param):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict(
@@ -136,6 +140,8 @@ def test_search_by_email(jsonrpc_request, user, search_param):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict(
@@ -173,6 +179,8 @@ def test_search_by_department(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict(
@@ -0,0 +1,145 @@
+import pytest
+from dirty_equals import IsPartialDict
+
+from hr import factories
+from hr import matching
+from hr import models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True),
+]
+
+
+@pytest.fixture()
+def vacancy(user):
+    factories.SkillFactory.create(name='django')
+    factories.SkillFactory.create(name='sql')
+    return factories.VacancyFactory.create(
+        creator__department=user.department,
+        position='Python разработчик',
+        experience=3,
+        description='Нужен опыт с django и sql',
+    )
+
+
+@pytest.fixture()
+def resumes():
+    django, sql = models.Skill.objects.get(name='django'), models.Skill.objects.get(name='sql')
+
+    best = factories.ResumeFactory.create(
+        published=True,
+        current_position='Разработчик',
+        desired_position='Python разработчик',
+        experience=5,
+    )
+    best.skills.set([django, sql])
+
+    middle = factories.ResumeFactory.create(published=True, current_position='Разработчик', experience=1)
+    middle.skills.set([sql])
+
+    worst = factories.ResumeFactory.create(published=True, current_position='Повар', desired_position='Шеф-повар')
+
+    factories.ResumeFactory.create(current_position='Python разработчик')  # черновик не подбирается
+
+    return best, middle, worst
+
+
+def _get_ids(jsonrpc_request, vacancy, pagination=None):
+    resp = jsonrpc_request(
+        'get_matching_resumes_for_vacancy',
+        {
+            'id': vacancy.id,
+            'pagination': pagination or {'count': True},
+        },
+    )
+    assert 'result' in resp, resp.get('error')
+    return [item['resume']['id'] for item in resp['result']['items']]
+
+
+def test_ok(user, jsonrpc_request, vacancy, resumes):
+    best, middle, worst = resumes
+
+    resp = jsonrpc_request(
+        'get_matching_resumes_for_vacancy',
+        {
+            'id': vacancy.id,
+            'pagination': {
+                'count': True,
+            },
+        },
+    )
+
+    assert resp.get('result') == IsPartialDict({'has_next': False, 'total_size': 3}), resp.get('error')
+    items = resp['result']['items']
+    assert [item['resume']['id'] for item in items] == [best.id, middle.id, worst.id]
+    assert items[0]['resume'] == IsPartialDict({'skills': ['django', 'sql'], 'experience': 5})
+    assert 1 >= items[0]['score'] > items[1]['score'] > items[2]['score'] >= 0
+
+
+def test_cursor_pagination(user, jsonrpc_request, vacancy, resumes):
+    first_page = jsonrpc_request(
+        'get_matching_resumes_for_vacancy',
+        {
+            'id': vacancy.id,
+            'pagination_cursor': {
+                'limit': 2,
+            },
+        },
+    ).get('result')
+
+    assert first_page == IsPartialDict({'has_next': True}), first_page
+
+    second_page = jsonrpc_request(
+        'get_matching_resumes_for_vacancy',
+        {
+            'id': vacancy.id,
+            'pagination_cursor': {
+                'cursor': first_page['next_cursor'],
+                'limit': 2,
+            },
+        },
+    ).get('result')
+
+    assert second_page == IsPartialDict({'has_next': False, 'next_cursor': None}), second_page
+    assert [item['resume']['id'] for item in first_page['items'] + second_page['items']] == [
+        resume.id for resume in resumes
+    ]
+
+
+def test_cache_is_refreshed_incrementally(user, jsonrpc_request, vacancy, resumes, monkeypatch):
+    best, middle, worst = resumes
+    assert _get_ids(jsonrpc_request, vacancy) == [best.id, middle.id, worst.id]
+
+    load = matching.ResumeFeatures.load
+
+    def load_without_full_reload(query=None):
+        assert query is not None, 'Признаки резюме должны обновляться без полной перезагрузки'
+        return load(query)
+
+    monkeypatch.setattr(matching.ResumeFeatures, 'load', load_without_full_reload)
+
+    new = factories.ResumeFactory.create(current_position='Python разработчик', experience=3)
+    new.skills.set(models.Skill.objects.filter(name__in=['django', 'sql']))
+    assert _get_ids(jsonrpc_request, vacancy) == [best.id, middle.id, worst.id]
+
+    new.state = models.ResumeState.PUBLISHED
+    new.save()
+    assert _get_ids(jsonrpc_request, vacancy) == sorted([best.id, new.id]) + [middle.id, worst.id]
+
+    best.state = models.ResumeState.HIDDEN
+    best.save()
+    assert _get_ids(jsonrpc_request, vacancy) == [new.id, middle.id, worst.id]
+
+
+def test_vacancy_from_other_department(user, jsonrpc_request):
+    vacancy = factories.VacancyFactory.create()
+
+    resp = jsonrpc_request(
+        'get_matching_resumes_for_vacancy',
+        {
+            'id': vacancy.id,
+        },
+    )
+
+    assert resp.get('error') == IsPartialDict({'code': 4001}), resp
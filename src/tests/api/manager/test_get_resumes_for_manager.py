@@ -4,6 +4,10 @@ from dirty_equals import IsPartialDict
 
 from hr import factories
 from hr import models
+from hr.api import schemas
+from hr.api.departments import department_directory
+from hr.api.pagination import PaginationParams
+from hr.api.pagination import TypedPaginator
 
 pytestmark = [
     pytest.mark.django_db(transaction=True),
@@ -57,6 +61,8 @@ def test_ok(
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': [
             {
                 'applicant': {
@@ -107,6 +113,8 @@ def test_filter_by_applicant_email(user, jsonrpc_request, published_resume_facto
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict(
@@ -158,6 +166,8 @@ def test_filter_by_applicant_full_name(user, jsonrpc_request, published_resume_f
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict(
@@ -213,8 +223,168 @@ def test_other_filters(jsonrpc_request, published_resume_factory, filter_key, fi
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 1,
         'items': [
             IsPartialDict({'id': expected_resume.id}),
         ],
     }, resp.get('error')
+
+
+def test_cursor_pagination(user, jsonrpc_request, published_resume_factory, freezer):
+    freezer.move_to('2022-05-08')
+    resumes = [published_resume_factory() for _ in range(2)]
+
+    freezer.move_to('2022-05-09')
+    resumes += [published_resume_factory() for _ in range(3)]
+
+    expected_ids = [
+        resume.id
+        for resume in sorted(resumes, key=lambda r: (r.published_at, r.id), reverse=True)
+    ]
+
+    first_page = jsonrpc_request(
+        'get_resumes_for_manager',
+        {
+            'pagination_cursor': {
+                'limit': 3,
+                'count': True,
+            },
+        },
+    ).get('result')
+
+    assert first_page == IsPartialDict({'has_next': True, 'total_size': 5}), first_page
+
+    second_page = jsonrpc_request(
+        'get_resumes_for_manager',
+        {
+            'pagination_cursor': {
+                'cursor': first_page['next_cursor'],
+                'limit': 3,
+            },
+        },
+    ).get('result')
+
+    assert second_page == IsPartialDict({'has_next': False, 'next_cursor': None}), second_page
+    assert [item['id'] for item in first_page['items'] + second_page['items']] == expected_ids
+
+
+@pytest.mark.parametrize('per_page', [5, 50])
+def test_page_query_count_does_not_depend_on_size(user, django_assert_num_queries, published_resume_factory, per_page):
+    skills = factories.SkillFactory.create_batch(3)
+    for resume in [published_resume_factory() for _ in range(per_page)]:
+        resume.skills.set(skills)
+
+    query = models.Resume.objects.filter(state=models.ResumeState.PUBLISHED).order_by('-published_at', '-id')
+    paginator = TypedPaginator(schemas.ResumeForManagerSchema, query)
+
+    department_directory.list_schemas()
+
+    # Страница (вместе с соискателями и общим количеством) + навыки, департаменты берутся из справочника
+    with django_assert_num_queries(2):
+        response = paginator.get_response(PaginationParams(per_page=per_page, count=True))
+
+    assert len(response.items) == per_page
+    assert all(len(item.skills) == 3 for item in response.items)
+
+
+@pytest.fixture()
+def resumes_with_skills(published_resume_factory):
+    python, django, sql = (factories.SkillFactory.create(name=name) for name in ('python', 'django', 'sql'))
+
+    full = published_resume_factory()
+    full.skills.set([python, django, sql])
+
+    partial = published_resume_factory()
+    partial.skills.set([python, sql])
+
+    single = published_resume_factory()
+    single.skills.set([sql])
+
+    published_resume_factory()  # без навыков
+
+    return full, partial, single
+
+
+@pytest.mark.parametrize(
+    'filters, expected',
+    [
+        ({'skills_all': ['python', 'sql']}, ['full', 'partial']),
+        ({'skills_all': ['python', 'unknown']}, []),
+        ({'skills_any': ['django', 'sql']}, ['full', 'partial', 'single']),
+        ({'skills_any': ['django', 'unknown']}, ['full']),
+        ({'skills_all': ['sql'], 'skills_any': ['django', 'python']}, ['full', 'partial']),
+    ]
+)
+def test_filter_by_skills(user, jsonrpc_request, resumes_with_skills, filters, expected):
+    resumes = dict(zip(('full', 'partial', 'single'), resumes_with_skills))
+
+    resp = jsonrpc_request(
+        'get_resumes_for_manager',
+        {
+            'pagination': {
+                'count': True,
+            },
+            'filters': filters,
+        },
+    )
+
+    assert resp.get('result') == IsPartialDict({'total_size': len(expected)}), resp.get('error')
+    assert sorted(item['id'] for item in resp['result']['items']) == sorted(resumes[name].id for name in expected)
+
+
+def test_estimated_total_size_of_empty_filter(user, jsonrpc_request, resumes_with_skills):
+    resp = jsonrpc_request(
+        'get_resumes_for_manager',
+        {
+            'pagination': {
+                'page': 2,
+                'count': True,
+                'count_mode': 'ESTIMATE',
+            },
+            'filters': {
+                'skills_all': ['unknown'],
+            },
+        },
+    )
+
+    assert resp.get('result') == IsPartialDict({'items': [], 'has_next': False, 'total_size': 0}), resp.get('error')
+
+
+def test_rank_by_skills_with_cursor(user, jsonrpc_request, resumes_with_skills):
+    full, partial, single = resumes_with_skills
+
+    items = []
+    cursor = None
+    for _ in range(3):
+        resp = jsonrpc_request(
+            'get_resumes_for_manager',
+            {
+                'pagination_cursor': {
+                    'cursor': cursor,
+                    'limit': 1,
+                },
+                'filters': {
+                    'skills_any': ['python', 'django', 'sql'],
+                    'rank_by_skills': True,
+                },
+            },
+        )
+        items += resp['result']['items']
+        cursor = resp['result']['next_cursor']
+
+    assert cursor is None
+    assert [item['id'] for item in items] == [full.id, partial.id, single.id]
+
+
+def test_skill_ids_follow_skills(user, published_resume):
+    skill = factories.SkillFactory.create()
+    published_resume.skills.add(skill)
+    assert skill.id in models.Resume.objects.get(id=published_resume.id).skill_ids
+
+    skill.resume_set.clear()
+    assert skill.id not in models.Resume.objects.get(id=published_resume.id).skill_ids
+
+    published_resume.skills.clear()
+    assert models.Resume.objects.get(id=published_resume.id).skill_ids == []
@@ -26,6 +26,8 @@ def test_ok(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 {
@@ -36,15 +38,78 @@ def test_ok(jsonrpc_request, user):
                     'experience': vacancy.experience,
                     'published_at': None,
                     'state': vacancy.state.value,
+                    'responses_count': 0,
+                    'new_responses_count': 0,
                 }
                 for vacancy in vacancies
             ],
             check_order=False,
         ),
         'total_size': 3,
+        'responses_count': 0,
+        'new_responses_count': 0,
     }, resp.get('error')
 
 
+@pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True)
+def test_responses_count(jsonrpc_request, user):
+    vacancies = factories.VacancyFactory.create_batch(3, creator=user, published=True)
+    factories.VacancyFactory.create(published=True, responses_count=10)  # unexpected
+    for vacancy, responses_count, new_responses_count in zip(vacancies, (3, 2, 0), (1, 2, 0)):
+        models.Vacancy.objects.filter(id=vacancy.id).update(
+            responses_count=responses_count,
+            new_responses_count=new_responses_count,
+        )
+
+    resp = jsonrpc_request('get_vacancies_for_manager', {'pagination': {'per_page': 2, 'count': True}})
+
+    assert resp.get('result') == IsPartialDict(
+        total_size=3,
+        total_size_is_exact=True,
+        responses_count=5,
+        new_responses_count=3,
+        items=[
+            IsPartialDict(id=vacancies[2].id, responses_count=0, new_responses_count=0),
+            IsPartialDict(id=vacancies[1].id, responses_count=2, new_responses_count=2),
+        ],
+    ), resp.get('error')
+
+
+@pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True)
+def test_inexact_count_modes(jsonrpc_request, user, settings):
+    settings.PAGINATION_COUNT_CAP = 2
+    vacancies = factories.VacancyFactory.create_batch(3, creator=user, published=True)
+    models.Vacancy.objects.filter(id__in=[vacancy.id for vacancy in vacancies]).update(responses_count=1)
+
+    capped = jsonrpc_request(
+        'get_vacancies_for_manager',
+        {'pagination': {'per_page': 1, 'count': True, 'count_mode': 'CAPPED'}},
+    )
+    estimated = jsonrpc_request(
+        'get_vacancies_for_manager',
+        {'pagination': {'per_page': 1, 'count': True, 'count_mode': 'ESTIMATE'}},
+    )
+
+    assert capped.get('result') == IsPartialDict(
+        total_size=2,
+        total_size_is_exact=False,
+        responses_count=3,
+    ), capped.get('error')
+    assert estimated.get('result') == IsPartialDict(total_size_is_exact=False, responses_count=3), estimated.get('error')
+
+
+@pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True)
+def test_department_is_kept_after_creator_moves(jsonrpc_request, user):
+    colleague = factories.UserFactory.create(role=models.UserRole.MANAGER, department=user.department)
+    vacancy = factories.VacancyFactory.create(creator=colleague)
+    colleague.department = factories.DepartmentFactory.create()
+    colleague.save()
+
+    resp = jsonrpc_request('get_vacancies_for_manager', {})
+
+    assert resp.get('result', {}).get('items') == [IsPartialDict(id=vacancy.id)], resp.get('error')
+
+
 @pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True)
 def test_filter_by_state(jsonrpc_request, user):
     draft = factories.VacancyFactory.create(creator=user)
@@ -65,6 +130,8 @@ def test_filter_by_state(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 IsPartialDict(
@@ -78,6 +145,8 @@ def test_filter_by_state(jsonrpc_request, user):
             check_order=False,
         ),
         'total_size': 2,
+        'responses_count': 0,
+        'new_responses_count': 0,
     }, resp.get('error')
 
 
@@ -112,6 +181,8 @@ def test_filter_by_position(jsonrpc_request, user, position_param):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': [
             IsPartialDict(
                 {
@@ -121,6 +192,8 @@ def test_filter_by_position(jsonrpc_request, user, position_param):
             )
         ],
         'total_size': 1,
+        'responses_count': 0,
+        'new_responses_count': 0,
     }, resp.get('error')
 
 
@@ -149,6 +222,8 @@ def test_filter_by_experience(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 IsPartialDict(
@@ -162,6 +237,8 @@ def test_filter_by_experience(jsonrpc_request, user):
             check_order=False,
         ),
         'total_size': 3,
+        'responses_count': 0,
+        'new_responses_count': 0,
     }, resp.get('error')
 
 
@@ -197,6 +274,8 @@ def test_filter_by_published_at(jsonrpc_request, user, freezer):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'items': IsListOrTuple(
             *[
                 IsPartialDict(
@@ -210,5 +289,7 @@ def test_filter_by_published_at(jsonrpc_request, user, freezer):
             check_order=False,
         ),
         'total_size': 3,
+        'responses_count': 0,
+        'new_responses_count': 0,
     }, resp.get('error')
 
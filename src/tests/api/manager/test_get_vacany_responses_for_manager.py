@@ -1,4 +1,7 @@
+import datetime as dt
+
 import pytest
+from dirty_equals import IsPartialDict
 
 from hr import factories
 from hr import models
@@ -24,6 +27,8 @@ def test_ok(jsonrpc_request, user):
 
     assert resp.get('result') == {
         'has_next': False,
+        'next_cursor': None,
+        'total_size_is_exact': True,
         'total_size': 3,
         'items': [
             {
@@ -59,7 +64,67 @@ def test_ok(jsonrpc_request, user):
                 },
                 'applicant_message': vacancy_response.applicant_message,
             }
-            for vacancy_response in expected_responses
+            for vacancy_response in reversed(expected_responses)
         ]
     }, resp.get('error')
 
+
+def test_filter_by_vacancy(jsonrpc_request, user):
+    vacancy = factories.VacancyFactory.create(creator=user, published=True)
+    expected_response = factories.VacancyResponseFactory.create(vacancy=vacancy)
+    factories.VacancyResponseFactory.create(vacancy__creator=user)  # unexpected
+
+    resp = jsonrpc_request(
+        'get_vacancy_responses_for_manager',
+        {
+            'filters': {
+                'vacancy_id': vacancy.id,
+            },
+        },
+    )
+
+    assert resp.get('result', {}).get('items') == [IsPartialDict(id=expected_response.id)], resp.get('error')
+
+
+def test_filter_by_created_at(jsonrpc_request, user, freezer):
+    freezer.move_to('2022-05-07T12:00:00+00:00')
+    factories.VacancyResponseFactory.create(vacancy__creator=user)  # too_old
+
+    freezer.move_to('2022-05-08T00:00:00+00:00')
+    lower_bound = factories.VacancyResponseFactory.create(vacancy__creator=user)
+
+    freezer.move_to('2022-05-09T12:00:00+00:00')
+    between_bounds = factories.VacancyResponseFactory.create(vacancy__creator=user)
+
+    freezer.move_to('2022-05-10T00:00:00+00:00')
+    factories.VacancyResponseFactory.create(vacancy__creator=user)  # too_young
+
+    resp = jsonrpc_request(
+        'get_vacancy_responses_for_manager',
+        {
+            'filters': {
+                'created_gte': '2022-05-08T00:00:00+00:00',
+                'created_lt': '2022-05-10T00:00:00+00:00',
+            },
+        },
+    )
+
+    assert resp.get('result', {}).get('items') == [
+        IsPartialDict(id=between_bounds.id),
+        IsPartialDict(id=lower_bound.id),
+    ], resp.get('error')
+
+
+def test_same_created_at_is_ordered_by_id(jsonrpc_request, user, freezer):
+    freezer.move_to(dt.datetime(2022, 5, 8, tzinfo=dt.timezone.utc))
+    responses = factories.VacancyResponseFactory.create_batch(3, vacancy__creator=user)
+
+    first_page = jsonrpc_request('get_vacancy_responses_for_manager', {'pagination_cursor': {'limit': 2}})
+    second_page = jsonrpc_request(
+        'get_vacancy_responses_for_manager',
+        {'pagination_cursor': {'limit': 2, 'cursor': first_page['result']['next_cursor']}},
+    )
+
+    assert [item['id'] for item in first_page['result']['items'] + second_page['result']['items']] == [
+        response.id for response in reversed(responses)
+    ]
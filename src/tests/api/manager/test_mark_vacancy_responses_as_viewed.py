@@ -0,0 +1,47 @@
+import pytest
+from dirty_equals import IsPartialDict
+
+from hr import factories
+from hr import models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+    pytest.mark.parametrize('user', [models.UserRole.MANAGER], indirect=True),
+]
+
+
+def test_ok(jsonrpc_request, user):
+    vacancy = factories.VacancyFactory.create(
+        creator__department=user.department,
+        responses_count=3,
+        new_responses_count=2,
+    )
+
+    resp = jsonrpc_request('mark_vacancy_responses_as_viewed', {'id': vacancy.id})
+
+    assert resp.get('result') == IsPartialDict(
+        id=vacancy.id,
+        responses_count=3,
+        new_responses_count=0,
+    ), resp.get('error')
+    vacancy.refresh_from_db()
+    assert vacancy.new_responses_count == 0
+
+
+def test_other_vacancies_are_not_affected(jsonrpc_request, user):
+    vacancy, other_vacancy = factories.VacancyFactory.create_batch(2, creator=user, new_responses_count=2)
+
+    jsonrpc_request('mark_vacancy_responses_as_viewed', {'id': vacancy.id})
+
+    other_vacancy.refresh_from_db()
+    assert other_vacancy.new_responses_count == 2
+
+
+def test_other_department_vacancy_error(jsonrpc_request, user):
+    vacancy = factories.VacancyFactory.create(new_responses_count=2)
+
+    resp = jsonrpc_request('mark_vacancy_responses_as_viewed', {'id': vacancy.id})
+
+    assert resp.get('error') == {'code': 4001, 'message': 'Vacancy not found'}
+    vacancy.refresh_from_db()
+    assert vacancy.new_responses_count == 2
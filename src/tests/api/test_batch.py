@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+import simplejson as json
+
+from hr import factories
+from hr import models
+from hr.api import errors
+from hr.api.batch import BatchEntrypointRoute
+from hr.api.batch import batch_metrics
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def batch_request(transactional_db, api_client, requests_mock, user_token):
+    requests_mock.register_uri('POST', 'http://testserver/api/v1/web/jsonrpc', real_http=True)
+
+    def request(calls: list[tuple[str, dict]]) -> list[dict]:
+        resp = api_client.post(
+            url='/api/v1/web/jsonrpc',
+            data=json.dumps([
+                {'id': index, 'jsonrpc': '2.0', 'method': method, 'params': params}
+                for index, (method, params) in enumerate(calls)
+            ]),
+            headers={'Authorization': f'bearer {user_token}'},
+        )
+        return resp.json()
+
+    return request
+
+
+@pytest.fixture()
+def metrics():
+    batch_metrics.reset()
+    yield batch_metrics
+    batch_metrics.reset()
+
+
+def test_page_load_batch(batch_request, metrics, user):
+    factories.VacancyFactory.create(published=True)
+
+    resp = batch_request([
+        ('get_current_user', {}),
+        ('get_departments', {}),
+        ('get_vacancies_for_applicant', {}),
+    ])
+
+    assert [r['id'] for r in resp] == [0, 1, 2]
+    assert resp[0]['result']['id'] == user.id, resp[0].get('error')
+    assert {'id': user.department_id, 'name': user.department.name} in resp[1]['result']
+    assert len(resp[2]['result']['items']) == 1, resp[2].get('error')
+    assert metrics.snapshot() == {'batches': 1, 'calls': 3, 'executed': 3, 'max_size': 3}
+
+
+def test_identical_read_only_calls_are_executed_once(batch_request, metrics):
+    factories.VacancyFactory.create_batch(3, published=True)
+    page = {'pagination': {'page': 1, 'per_page': 2}}
+
+    resp = batch_request([
+        ('get_vacancies_for_applicant', page),
+        ('get_departments', {}),
+        ('get_vacancies_for_applicant', page),
+        ('get_vacancies_for_applicant', {'pagination': {'page': 2, 'per_page': 2}}),
+    ])
+
+    assert [r['id'] for r in resp] == [0, 1, 2, 3]
+    assert resp[0]['result'] == resp[2]['result']
+    assert resp[0]['result'] != resp[3]['result']
+    assert metrics.snapshot()['executed'] == 3
+
+
+def test_identical_write_calls_are_not_deduped(batch_request, metrics, user):
+    vacancy = factories.VacancyFactory.create(published=True)
+    resume = factories.ResumeFactory.create(user=user, published=True)
+    params = {'vacancy_id': vacancy.id, 'resume_id': resume.id}
+
+    resp = batch_request([('respond_vacancy', params), ('respond_vacancy', params)])
+
+    assert sorted('error' in r for r in resp) == [False, True]
+    assert [r['error']['code'] for r in resp if 'error' in r] == [errors.VacancyResponseAlreadyExists.CODE]
+    assert models.VacancyResponse.objects.count() == 1
+    assert metrics.snapshot()['executed'] == 2
+
+
+def test_batch_concurrency_is_capped(batch_request, settings, monkeypatch):
+    settings.JSONRPC_BATCH_CONCURRENCY = 2
+    active = peak = 0
+    handle_req_to_resp = BatchEntrypointRoute.handle_req_to_resp
+
+    async def tracked(*args, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            await asyncio.sleep(0.01)
+            return await handle_req_to_resp(*args, **kwargs)
+        finally:
+            active -= 1
+
+    monkeypatch.setattr(BatchEntrypointRoute, 'handle_req_to_resp', tracked)
+
+    resp = batch_request([('get_vacancies_for_applicant', {'pagination': {'page': page}}) for page in range(1, 6)])
+
+    assert [r['id'] for r in resp] == [0, 1, 2, 3, 4]
+    assert peak == 2
@@ -39,3 +39,25 @@ def test_get_departments(jsonrpc_request):
         },
     ], resp.get('error')
 
+
+def test_departments_are_cached(jsonrpc_request):
+    department = factories.DepartmentFactory.create(name='Аналитика')
+
+    resp = jsonrpc_request('get_departments', use_auth=False)
+    assert resp.get('result') == [{'id': department.id, 'name': 'Аналитика'}], resp.get('error')
+
+    # update() не отправляет сигналов, поэтому справочник не сбрасывается
+    models.Department.objects.filter(id=department.id).update(name='Бизнес')
+    resp = jsonrpc_request('get_departments', use_auth=False)
+    assert resp.get('result') == [{'id': department.id, 'name': 'Аналитика'}], resp.get('error')
+
+    department.name = 'Разработка'
+    department.save()
+
+    new_department = factories.DepartmentFactory.create(name='Бизнес')
+
+    resp = jsonrpc_request('get_departments', use_auth=False)
+    assert resp.get('result') == [
+        {'id': new_department.id, 'name': 'Бизнес'},
+        {'id': department.id, 'name': 'Разработка'},
+    ], resp.get('error')
@@ -56,6 +56,9 @@ def patched_freezegun_now(cls, tz=None):
 freezegun.api.FakeDatetime.astimezone = patched_freezgun_astimezone
 freezegun.api.FakeDatetime.now = classmethod(patched_freezegun_now)
 
+# Пул процессов для хэширования паролей ждет воркеров по time.monotonic, замороженное время его вешает
+freezegun.configure(extend_ignore_list=['multiprocessing', 'concurrent.futures'])
+
 
 # Запускаем в главном потоке, а не в пуле, иначе будет требоваться transactional_db, и тесты будут выполняться долго
 async def mock_call_sync_async(call, *args, **kwargs):
@@ -72,4 +75,5 @@ fastapi_jsonrpc.call_sync_async = mock_call_sync_async
 pytest_plugins = [
     'tests.fixtures.fixtures',
     'tests.fixtures.const',
+    'tests.fixtures.query_budget',
 ]
\ No newline at end of file
@@ -71,3 +71,21 @@ def jsonrpc_request(transactional_db, api_client, requests_mock, user_token):
     requests_mock.register_uri('POST', 'http://testserver/api/v1/web/jsonrpc', real_http=True)
 
     return functools.partial(api_client.api_jsonrpc_request, url='/api/v1/web/jsonrpc', auth_token=user_token)
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    from hr import security
+    from hr.api.departments import department_directory
+    from hr.matching import matching_engine
+    from hr.sessions import session_cache
+
+    def clear():
+        session_cache.clear()
+        security.token_cache.clear()
+        department_directory.invalidate()
+        matching_engine.clear()
+
+    clear()
+    yield
+    clear()
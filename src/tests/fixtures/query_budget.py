@@ -0,0 +1,54 @@
+"""Плагин: тест из tests/api проваливается, если метод API выполнил больше запросов, чем объявлено в query_budget.
+
+Отключается опцией --no-query-budget.
+"""
+import pathlib
+
+import pytest
+
+_API_TESTS = pathlib.Path(__file__).resolve().parent.parent / 'api'
+_violations_key = pytest.StashKey[list]()
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--no-query-budget',
+        action='store_true',
+        default=False,
+        help='Не проверять бюджеты запросов методов API в tests/api',
+    )
+
+
+def _is_checked(item: pytest.Item) -> bool:
+    return not item.config.getoption('--no-query-budget') and _API_TESTS in item.path.parents
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item: pytest.Item):
+    from hr.db import detector
+
+    if _is_checked(item):
+        item.stash[_violations_key] = violations = []
+        detector.add_listener(violations.append)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_call(item: pytest.Item):
+    # Выполняется после самого теста, поэтому превышение бюджета проваливает тест, а не его teardown
+    violations = item.stash.get(_violations_key, [])
+    exceeded = [violation for violation in violations if violation.kind == 'query_budget']
+    if exceeded:
+        pytest.fail(
+            'Превышен бюджет запросов: '
+            + ', '.join(f'{violation.method} - {violation.count}' for violation in exceeded),
+            pytrace=False,
+        )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_teardown(item: pytest.Item):
+    from hr.db import detector
+
+    violations = item.stash.get(_violations_key, None)
+    if violations is not None:
+        detector.remove_listener(violations.append)
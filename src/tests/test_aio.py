@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+import psycopg2
+import pytest
+from django.db import connections
+from django.db.models import F
+
+from hr import factories
+from hr import models
+from hr.db import aio
+from hr.db.metrics import pool_metrics
+
+pytestmark = [
+    # Асинхронный пул работает на своих соединениях и видит только закоммиченные данные
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_fetch_select_related_and_annotations():
+    vacancy = factories.VacancyFactory.create()
+    query = (
+        models.Vacancy.objects
+        .select_related('creator')
+        .annotate(creator_department_id=F('creator__department_id'))
+        .order_by('-id')
+    )
+
+    [fetched] = asyncio.run(aio.fetch(query))
+
+    assert fetched == vacancy
+    assert fetched.published_at is None
+    assert fetched.created_at == vacancy.created_at
+    assert fetched.created_at.tzinfo is not None
+    assert fetched.creator.email == vacancy.creator.email
+    assert fetched.creator_department_id == vacancy.creator.department_id
+    assert fetched._state.db == 'default' and not fetched._state.adding
+
+
+def test_first_and_count():
+    vacancies = factories.VacancyFactory.create_batch(3)
+    query = models.Vacancy.objects.order_by('id')
+
+    assert asyncio.run(aio.first(query)) == vacancies[0]
+    assert asyncio.run(aio.first(query.filter(id=0))) is None
+    assert asyncio.run(aio.count(query)) == 3
+    assert asyncio.run(aio.count(query[:2])) == 2
+    assert asyncio.run(aio.count(query.none())) == 0
+
+
+def test_query_error_keeps_connection():
+    pool = aio.AsyncConnectionPool('default', max_size=1)
+
+    async def run():
+        async with pool.connection() as connection:
+            with pytest.raises(psycopg2.ProgrammingError):
+                await aio._execute(connection, 'SELECT * FROM missing_table')
+        async with pool.connection() as next_connection:
+            assert next_connection is connection
+            return (await aio._execute(next_connection, 'SELECT 1')).rows
+
+    try:
+        assert asyncio.run(run()) == [(1,)]
+    finally:
+        pool.close()
+
+
+def test_broken_idle_connection_is_replaced(monkeypatch):
+    monkeypatch.setitem(connections['default'].settings_dict, 'CONN_HEALTH_CHECK_INTERVAL', 0)
+    pool = aio.AsyncConnectionPool('default', max_size=1)
+    failures = pool_metrics.snapshot()['health_check_failures']
+
+    async def run():
+        async with pool.connection() as connection:
+            pass
+        connection.close()  # например, соединение разорвал сервер
+        async with pool.connection() as next_connection:
+            assert next_connection is not connection
+            return (await aio._execute(next_connection, 'SELECT 1')).rows
+
+    try:
+        assert asyncio.run(run()) == [(1,)]
+    finally:
+        pool.close()
+
+    assert pool_metrics.snapshot()['health_check_failures'] == failures + 1
+
+
+def test_pool_limits_concurrent_queries():
+    pool = aio.AsyncConnectionPool('default', max_size=2)
+
+    async def sleep():
+        async with pool.connection() as connection:
+            await aio._execute(connection, 'SELECT pg_sleep(0.1)')
+
+    async def run():
+        await asyncio.gather(*[sleep() for _ in range(4)])
+
+    started = time.monotonic()
+    try:
+        asyncio.run(run())
+    finally:
+        assert len(pool._idle) == 2
+        pool.close()
+
+    # 4 запроса по 0.1 с на 2 соединениях - две волны
+    assert 0.2 <= time.monotonic() - started < 0.4
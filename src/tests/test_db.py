@@ -0,0 +1,92 @@
+import gc
+import threading
+
+import pytest
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from hr import models
+from hr.app import DjangoThreadPoolExecutor
+from hr.db.metrics import pool_metrics
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def opened_connections():
+    opened = []
+
+    def on_created(connection, **_):
+        opened.append(connection)
+
+    connection_created.connect(on_created)
+    yield opened
+    connection_created.disconnect(on_created)
+
+
+@pytest.fixture()
+def idle_connection():
+    connection.ensure_connection()
+    connection.last_used_at -= connection.health_check_interval
+    return connection
+
+
+def test_idle_broken_connection_is_reopened(idle_connection, opened_connections):
+    failures = pool_metrics.snapshot()['health_check_failures']
+    idle_connection.connection.close()  # например, соединение разорвал сервер
+
+    assert models.Department.objects.count() == 0
+    assert len(opened_connections) == 1
+    assert pool_metrics.snapshot()['health_check_failures'] == failures + 1
+
+
+def test_obsolete_connection_is_reopened(idle_connection, opened_connections):
+    idle_connection.close_at = 0
+
+    models.Department.objects.count()
+
+    assert len(opened_connections) == 1
+
+
+def test_connection_is_checked_after_error(opened_connections):
+    connection.ensure_connection()
+    opened = len(opened_connections)
+    connection.errors_occurred = True
+    connection.connection.close()
+
+    assert models.Department.objects.count() == 0
+    assert len(opened_connections) == opened + 1
+    assert not connection.errors_occurred
+
+
+def test_recently_used_connection_is_not_checked(monkeypatch):
+    connection.ensure_connection()
+    monkeypatch.setattr(connection, 'is_usable', lambda: pytest.fail('Соединение проверено без простоя'))
+
+    models.Department.objects.count()
+
+
+def test_executor_reuses_connection(opened_connections):
+    waits = pool_metrics.snapshot()['wait']['count']
+    executor = DjangoThreadPoolExecutor(max_workers=1)
+    try:
+        for _ in range(5):
+            executor.submit(models.Department.objects.count).result()
+        executor.submit(lambda: connection.close()).result()
+    finally:
+        executor.shutdown()
+
+    assert len(opened_connections) == 1
+    assert pool_metrics.snapshot()['wait']['count'] == waits + 6
+
+
+def test_connection_is_closed_on_thread_exit(opened_connections):
+    thread = threading.Thread(target=models.Department.objects.count)
+    thread.start()
+    thread.join()
+    gc.collect()
+
+    [wrapper] = opened_connections
+    assert wrapper.connection.closed
@@ -0,0 +1,72 @@
+import logging
+
+import pytest
+
+from hr import factories
+from hr import models
+from hr.db import detector
+from hr.db.metrics import QueryStats
+from hr.db.metrics import collect_query_stats
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def violations():
+    violations = []
+    detector.add_listener(violations.append)
+    yield violations
+    detector.remove_listener(violations.append)
+
+
+def test_fingerprint_ignores_values():
+    assert detector.fingerprint('SELECT * FROM t WHERE id IN (%s, %s) AND name = %s') == detector.fingerprint(
+        "SELECT * FROM t WHERE id IN (1, 2, 3)   AND name = 'it''s'",
+    )
+    assert detector.fingerprint('SELECT * FROM t WHERE id = %s') != detector.fingerprint(
+        'SELECT * FROM t WHERE parent_id = %s',
+    )
+
+
+def test_n_plus_one_is_logged(settings, caplog, violations):
+    settings.DB_N_PLUS_ONE_THRESHOLD = 3
+    vacancies = factories.VacancyFactory.create_batch(3)
+
+    with collect_query_stats(QueryStats('get_vacancies')) as stats:
+        for vacancy in models.Vacancy.objects.all():
+            assert vacancy.creator.id  # запрос на каждую вакансию
+    detector.check_call('get_vacancies', stats.queries, stats.db_time, stats.shapes.values(), budget=None)
+
+    assert stats.queries == len(vacancies) + 1
+    [violation] = violations
+    assert violation.kind == 'n_plus_one'
+    assert violation.count == len(vacancies)
+    assert '"hr_user"' in violation.sql and '%s' not in violation.sql
+
+    [record] = [record for record in caplog.records if record.name == 'hr.db.detector']
+    assert record.levelno == logging.WARNING
+    assert (record.method, record.fingerprint, record.count) == ('get_vacancies', violation.fingerprint, 3)
+
+
+def test_slow_query_is_logged(settings, violations):
+    settings.DB_SLOW_QUERY_THRESHOLD = 0
+
+    with collect_query_stats(QueryStats('get_departments')):
+        list(models.Department.objects.all())
+
+    assert [(v.kind, v.method, v.count) for v in violations] == [('slow_query', 'get_departments', 1)]
+    assert violations[0].sql.startswith('SELECT')
+
+
+def test_query_budget_is_checked(jsonrpc_request, violations, monkeypatch):
+    from hr.api.jsonrpc import get_current_user
+
+    monkeypatch.setattr(get_current_user, 'query_budget', 1)
+
+    resp = jsonrpc_request('get_current_user')
+
+    assert 'result' in resp
+    assert [(v.kind, v.method) for v in violations] == [('query_budget', 'get_current_user')]
+    assert violations[0].count > 1
@@ -0,0 +1,63 @@
+import datetime as dt
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from hr import factories
+from hr import models
+from hr.api import schemas
+from hr.api.departments import department_directory
+from hr.api.encoding import Fragment
+from hr.api.encoding import encode
+from hr.api.pagination import PaginatedResponse
+
+
+def _vacancy(department: schemas.DepartmentSchema) -> schemas.VacancyForManagerSchema:
+    return schemas.VacancyForManagerSchema(
+        id=1,
+        state=models.VacancyState.PUBLISHED,
+        creator=schemas.UserSchema(
+            id=2,
+            email='manager@example.com',
+            first_name='Иван',
+            last_name='Иванов',
+            patronymic=None,
+            department=department,
+            role=models.UserRole.MANAGER,
+        ),
+        position='Разработчик',
+        experience=None,
+        description='"Кавычки" и \\ слэш',
+        published_at=dt.datetime(2022, 5, 10, 12, 30, 15, 123000, tzinfo=dt.timezone.utc),
+    )
+
+
+def test_encode_matches_jsonable_encoder():
+    response = PaginatedResponse[schemas.VacancyForManagerSchema](
+        items=[_vacancy(schemas.DepartmentSchema(id=3, name='Разработка'))],
+        has_next=False,
+        total_size=1,
+        total_size_is_exact=True,
+    )
+
+    assert json.loads(encode({'jsonrpc': '2.0', 'result': response})) == jsonable_encoder(
+        {'jsonrpc': '2.0', 'result': response},
+    )
+
+
+def test_fragments_are_spliced():
+    data = encode({'cached': Fragment(b'{"id":1}'), 'list': [Fragment(b'[]'), 'text'], 'fake': '\0fake:0'})
+
+    assert json.loads(data) == {'cached': {'id': 1}, 'list': [[], 'text'], 'fake': '\0fake:0'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_department_from_directory_is_encoded_once():
+    department = factories.DepartmentFactory.create(name='Разработка')
+    cached = schemas.DepartmentSchema.from_id(department.id)
+    copy = schemas.DepartmentSchema(id=department.id, name='Разработка')
+
+    assert department_directory.get_fragment(cached).data == f'{{"id":{department.id},"name":"Разработка"}}'.encode()
+    assert department_directory.get_fragment(copy) is None
+    assert json.loads(encode(_vacancy(cached))) == json.loads(encode(_vacancy(copy)))
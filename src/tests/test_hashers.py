@@ -0,0 +1,20 @@
+import asyncio
+
+from django.contrib.auth.hashers import make_password
+
+from hr import hashers
+
+
+def test_make_and_check_password_in_process_pool():
+    encoded = asyncio.run(hashers.make_password('password'))
+
+    assert asyncio.run(hashers.check_password('password', encoded))
+    assert not asyncio.run(hashers.check_password('wrong_password', encoded))
+
+
+def test_must_update():
+    encoded = make_password('password', hasher='pbkdf2_sha1')
+    assert hashers.must_update(encoded)
+
+    encoded = make_password('password')
+    assert not hashers.must_update(encoded)
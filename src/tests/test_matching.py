@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from hr import factories
+from hr import matching
+
+
+def _features():
+    return matching.ResumeFeatures.from_rows([
+        (3, 30, 'Повар', None, None, []),
+        (1, 10, 'Разработчик', 'Python разработчик', 5, [10, 20]),
+        (2, 20, 'Разработчик', None, 1, [20]),
+    ])
+
+
+def _profiles(*rows):
+    """:param rows: (id, position, experience, skill_ids)"""
+    pairs = [(index, skill_id) for index, row in enumerate(rows) for skill_id in row[3]]
+    return matching.VacancyProfiles(
+        ids=np.array([row[0] for row in rows]),
+        positions=matching.position_vectors([row[1] for row in rows]),
+        experience=np.array([row[2] or np.nan for row in rows], dtype=np.float64),
+        skill_vacancy_indexes=np.array([index for index, _ in pairs], dtype=np.int64),
+        skill_ids=np.array([skill_id for _, skill_id in pairs], dtype=np.int64),
+    )
+
+
+def test_score_components():
+    profiles = _profiles((1, 'Python разработчик', 2, [10, 20]))
+    features = _features()
+
+    scores = dict(zip(features.ids.tolist(), matching.score(profiles, features)[0].tolist()))
+
+    assert scores[1] == pytest.approx(1.0)
+    # Опыт 1 из 2 лет и один навык из двух
+    assert scores[2] < scores[1]
+    assert scores[3] < scores[2]
+
+
+def test_score_matrix_matches_single_rows():
+    profiles = _profiles(
+        (1, 'Python разработчик', 2, [10, 20]),
+        (2, 'Повар', None, []),
+        (3, 'Разработчик', 1, [20, 30]),
+    )
+    features = _features()
+
+    matrix = matching.score(profiles, features)
+
+    assert matrix.shape == (3, 3)
+    for index in range(len(profiles)):
+        single = _profiles(
+            (
+                int(profiles.ids[index]),
+                ['Python разработчик', 'Повар', 'Разработчик'][index],
+                [2, None, 1][index],
+                [[10, 20], [], [20, 30]][index],
+            ),
+        )
+        assert np.allclose(matrix[index], matching.score(single, features)[0])
+
+
+def test_incremental_updates_match_full_rebuild():
+    profiles = _profiles((1, 'Разработчик', None, [20]))
+    features = _features()
+    ranking = matching.Ranking.build(features.ids, matching.score(profiles, features)[0])
+
+    new = matching.ResumeFeatures.from_rows([(4, 40, 'Разработчик', None, 2, [20])])
+    features = features.insert(new).without(1)
+    ranking = ranking.insert(4, matching.score(profiles, new)[0, 0]).without(1)
+
+    expected = matching.Ranking.build(features.ids, matching.score(profiles, features)[0])
+    assert ranking.ids.tolist() == expected.ids.tolist()
+    assert np.allclose(ranking.scores, expected.scores)
+    assert features.ids.tolist() == [2, 3, 4]
+    assert features.user_ids.tolist() == [20, 30, 40]
+    assert ranking.index_after(float(ranking.scores[0]), int(ranking.ids[0])) == 1
+
+
+@pytest.mark.django_db
+def test_vacancy_skills_ignore_case_and_match_several_words():
+    skills = {
+        name: factories.SkillFactory.create(name=name).id
+        for name in ('Python', 'PostgreSQL', 'Machine Learning', 'Node.js', 'Computer Vision', 'Java')
+    }
+    vacancy = factories.VacancyFactory.build(
+        id=1,
+        position='PYTHON разработчик',
+        description='Опыт с postgresql и machine   learning, знание NODE.JS. Vision не нужен',
+    )
+
+    profiles = matching.VacancyProfiles.from_models([vacancy])
+
+    assert profiles.skill_vacancy_indexes.tolist() == [0] * 4
+    assert sorted(profiles.skill_ids.tolist()) == sorted(
+        skills[name] for name in ('Python', 'PostgreSQL', 'Machine Learning', 'Node.js')
+    )
@@ -0,0 +1,86 @@
+import pytest
+import simplejson as json
+
+from hr import factories
+from hr.api.metrics import method_metrics
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def metrics():
+    method_metrics.reset()
+    yield method_metrics
+    method_metrics.reset()
+
+
+@pytest.fixture()
+def call(transactional_db, api_client, requests_mock, user_token):
+    requests_mock.register_uri('POST', 'http://testserver/api/v1/web/jsonrpc', real_http=True)
+
+    def call(body):
+        return api_client.post(
+            url='/api/v1/web/jsonrpc',
+            data=json.dumps(body),
+            headers={'Authorization': f'bearer {user_token}'},
+        )
+
+    return call
+
+
+def _request(method: str, index: int = 0) -> dict:
+    return {'id': index, 'jsonrpc': '2.0', 'method': method, 'params': {}}
+
+
+@pytest.mark.parametrize('method', ['get_current_user', 'get_vacancies_for_applicant'])
+def test_call_is_measured(call, metrics, method):
+    factories.VacancyFactory.create(published=True)
+
+    resp = call(_request(method))
+
+    assert 'result' in resp.json(), resp.json()
+    stats = metrics.snapshot()[method]
+    assert stats['errors'] == 0
+    assert stats['duration']['count'] == 1
+    assert stats['queries']['total'] > 0
+    assert 0 < stats['db']['total'] <= stats['duration']['total']
+    assert stats['serialize']['total'] > 0
+    assert f'desc="{stats["queries"]["total"]:.0f} queries"' in resp.headers['Server-Timing']
+
+
+def test_server_timing_sums_batch_calls(call, metrics):
+    resp = call([_request('get_current_user', 0), _request('get_departments', 1), _request('unknown', 2)])
+
+    assert [r['id'] for r in resp.json()] == [0, 1, 2]
+    snapshot = metrics.snapshot()
+    assert set(snapshot) == {'get_current_user', 'get_departments'}
+    queries = sum(stats['queries']['total'] for stats in snapshot.values())
+    assert f'desc="{queries:.0f} queries"' in resp.headers['Server-Timing']
+    assert 'desc="2 calls"' in resp.headers['Server-Timing']
+
+
+def test_errors_are_counted(call, metrics):
+    resp = call({**_request('get_vacancy_for_applicant'), 'params': {'id': 0}})
+
+    assert 'error' in resp.json()
+    assert metrics.snapshot()['get_vacancy_for_applicant']['errors'] == 1
+
+
+def test_prometheus_endpoint(call, metrics, api_client, requests_mock, monkeypatch):
+    from django.conf import settings
+
+    requests_mock.register_uri('GET', 'http://testserver/metrics', real_http=True)
+    call(_request('get_current_user'))
+
+    assert api_client.get('/metrics').status_code == 404
+
+    monkeypatch.setattr(settings, 'METRICS_ALLOWED_HOSTS', ['testclient'])
+    resp = api_client.get('/metrics')
+
+    assert resp.status_code == 200
+    assert '# TYPE hr_jsonrpc_call_db_queries summary' in resp.text
+    assert 'hr_jsonrpc_call_seconds_count{method="get_current_user"} 1' in resp.text
+    assert 'hr_jsonrpc_batch_batches_total' in resp.text
+    assert 'hr_db_checkout_seconds_count' in resp.text
@@ -0,0 +1,199 @@
+"""Планы запросов списочных методов: ни один не должен читать большую таблицу целиком.
+
+База заполняется данными, близкими к боевым по объему и распределению (опубликована лишь
+десятая часть резюме и вакансий), запросы снимаются при прямом вызове методов и прогоняются
+через EXPLAIN. Seq Scan по небольшим справочным таблицам допустим - его планировщик выбирает честно.
+"""
+import asyncio
+import inspect
+import random
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from hr import factories
+from hr import models
+from hr import recommendations
+from hr.api import jsonrpc
+from hr.api import schemas
+from hr.api.pagination import BasePaginatedResponse
+from hr.api.pagination import PaginationCursorParams
+from hr.api.pagination import PaginationParams
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+ROWS = 5000
+#: таблицы меньше этого размера можно читать целиком
+SEQ_SCAN_MIN_ROWS = 1000
+
+PAGINATIONS = [
+    PaginationParams(per_page=10),
+    PaginationCursorParams(limit=10),
+]
+
+
+def _bulk_users(count: int, role: models.UserRole, departments: list[models.Department]) -> list[models.User]:
+    # Пользователи создаются без фабрики: хэширование паролей заняло бы большую часть времени теста
+    return models.User.objects.bulk_create([
+        models.User(
+            email=f'{role.lower()}{index}@example.com',
+            first_name=f'Имя{index}',
+            last_name=f'Фамилия{index}',
+            password='!',
+            department=departments[index % len(departments)],
+            role=role,
+        )
+        for index in range(count)
+    ])
+
+
+@pytest.fixture()
+def seeded():
+    rng = random.Random(0)
+    now = timezone.now()
+
+    manager = factories.UserFactory.create(role=models.UserRole.MANAGER)
+    applicant = factories.UserFactory.create(department=manager.department)
+    skills = models.Skill.objects.bulk_create([models.Skill(name=f'Навык {index}') for index in range(20)])
+    departments = [manager.department, *factories.DepartmentFactory.create_batch(9)]
+    managers = [manager, *_bulk_users(ROWS // 10, models.UserRole.MANAGER, departments)]
+    applicants = [applicant, *_bulk_users(ROWS, models.UserRole.APPLICANT, departments)]
+
+    resumes = models.Resume.objects.bulk_create([
+        models.Resume(
+            user=user,
+            state=models.ResumeState.PUBLISHED if index % 10 == 0 else models.ResumeState.DRAFT,
+            published_at=now if index % 10 == 0 else None,
+            current_position='Разработчик',
+            skill_ids=sorted(skill.id for skill in rng.sample(skills, 3)),
+        )
+        for index, user in enumerate(applicants)
+    ])
+    models.Resume.skills.through.objects.bulk_create([
+        models.Resume.skills.through(resume_id=resume.id, skill_id=skill_id)
+        for resume in resumes
+        for skill_id in resume.skill_ids
+    ])
+    published_resumes = resumes[::10]
+
+    vacancies = models.Vacancy.objects.bulk_create([
+        models.Vacancy(
+            creator=managers[index % len(managers)],
+            department_id=managers[index % len(managers)].department_id,
+            state=models.VacancyState.PUBLISHED if index % 10 == 0 else models.VacancyState.DRAFT,
+            published_at=now if index % 10 == 0 else None,
+            position='Разработчик',
+            description='Разработчик',
+        )
+        for index in range(ROWS)
+    ])
+    models.VacancyResponse.objects.bulk_create([
+        models.VacancyResponse(vacancy=vacancies[index % 100 * 10], resume=rng.choice(published_resumes))
+        for index in range(ROWS // 2)
+    ])
+    recommendations.refresh_user(applicant.id)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    return manager, applicant, vacancies[0], skills
+
+
+def _listings(manager, applicant, vacancy, skills):
+    """(имя метода, аргументы) для всех списков; pagination подставляется в тесте"""
+    return [
+        ('get_vacancies_for_applicant', {'_': applicant, 'filters': None}),
+        ('get_vacancies_for_applicant', {
+            '_': applicant,
+            'filters': schemas.VacancyFiltersForApplicant(department_ids=[manager.department_id]),
+        }),
+        ('get_recommended_vacancies_for_applicant', {'user': applicant}),
+        ('get_vacancies_for_manager', {'user': manager, 'filters': None}),
+        ('get_applicants_for_manager', {'_': manager, 'filterer': None}),
+        ('get_applicants_for_manager', {
+            '_': manager,
+            'filterer': schemas.ApplicantFilters(full_name=applicant.first_name),
+        }),
+        ('get_resumes_for_manager', {'_': manager, 'filterer': None}),
+        ('get_resumes_for_manager', {
+            '_': manager,
+            'filterer': schemas.ResumeFiltersForManager(skills_any=[skills[0].name]),
+        }),
+        ('get_matching_resumes_for_vacancy', {'user': manager, 'vacancy_id': vacancy.id}),
+        ('get_vacancy_responses_for_manager', {'user': manager, 'filters': None}),
+        ('get_vacancy_responses_for_manager', {
+            'user': manager,
+            'filters': schemas.VacancyResponseFiltersForManager(vacancy_id=vacancy.id),
+        }),
+    ]
+
+
+def _seq_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan['Node Type'] == 'Seq Scan':
+        scans.append(plan['Relation Name'])
+
+    for subplan in plan.get('Plans', []):
+        scans += _seq_scans(subplan)
+
+    return scans
+
+
+def _large_seq_scans(sql: str) -> list[str]:
+    """Большие таблицы, которые запрос читает целиком"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        scans = _seq_scans(cursor.fetchone()[0][0]['Plan'])
+        if not scans:
+            return []
+
+        cursor.execute(
+            'SELECT relname FROM pg_class WHERE relname = ANY(%s) AND reltuples >= %s',
+            [scans, SEQ_SCAN_MIN_ROWS],
+        )
+        return [relname for relname, in cursor.fetchall()]
+
+
+def _call(method, **kwargs):
+    if inspect.iscoroutinefunction(method):
+        # Асинхронные методы пишут запросы в queries_log того же соединения (см. hr.db.aio.execute)
+        return asyncio.run(method(**kwargs))
+
+    return method(**kwargs)
+
+
+def test_all_listings_are_checked(seeded):
+    listed = {name for name, _ in _listings(*seeded)}
+    paginated = set()
+    for route in jsonrpc.api_v1.routes:
+        returns = inspect.signature(route.func).return_annotation if hasattr(route, 'func') else None
+        if inspect.isclass(returns) and issubclass(returns, BasePaginatedResponse):
+            paginated.add(route.name)
+
+    assert paginated == listed
+
+
+@pytest.mark.parametrize('pagination', PAGINATIONS, ids=['page', 'cursor'])
+def test_listings_do_not_seq_scan(seeded, pagination):
+    for name, kwargs in _listings(*seeded):
+        method = getattr(jsonrpc, name)
+        # Первый вызов прогревает справочники и кэши; если есть следующая страница, проверяем ее запросы
+        first_page = _call(method, any_pagination=pagination, **kwargs)
+        assert first_page.items, name
+        if not first_page.has_next:
+            next_page = pagination
+        elif isinstance(pagination, PaginationCursorParams):
+            next_page = pagination.copy(update={'cursor': first_page.next_cursor})
+        else:
+            next_page = pagination.copy(update={'page': 2})
+
+        with CaptureQueriesContext(connection) as captured:
+            _call(method, any_pagination=next_page, **kwargs)
+
+        for query in captured.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                assert _large_seq_scans(query['sql']) == [], f'{name}: {query["sql"]}'
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pytest
+from django.db import connection
+from django.db import transaction
+
+from hr import factories
+from hr import models
+from hr import recommendations
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def _wait_for_lock_waiter(timeout: float = 5):
+    """Дождаться, пока другое соединение встанет в ожидание блокировки"""
+    deadline = time.monotonic() + timeout
+    with connection.cursor() as cursor:
+        while time.monotonic() < deadline:
+            cursor.execute(
+                "SELECT 1 FROM pg_stat_activity WHERE wait_event_type = 'Lock' AND datname = current_database()",
+            )
+            if cursor.fetchone() is not None:
+                return
+            time.sleep(0.01)
+
+    pytest.fail('Пересчет ленты не дошел до конфликтующей вставки')
+
+
+def test_overlapping_refreshes(settings):
+    settings.RECOMMENDATION_MIN_SCORE = 0
+    resume = factories.ResumeFactory.create(published=True)
+    vacancy = factories.VacancyFactory.create(published=True)
+    models.VacancyRecommendation.objects.all().delete()
+
+    inserted, release = threading.Event(), threading.Event()
+    errors = []
+
+    def run(func):
+        def target():
+            try:
+                func()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def refresh_vacancy():
+        # Транзакция пересчета вакансии остается открытой, пока пересчет ленты не упрется в ту же пару
+        with transaction.atomic():
+            recommendations.refresh_vacancy(vacancy)
+            inserted.set()
+            release.wait(5)
+
+    vacancy_thread = run(refresh_vacancy)
+    assert inserted.wait(5)
+    user_thread = run(lambda: recommendations.refresh_user(resume.user_id))
+    try:
+        _wait_for_lock_waiter()
+    finally:
+        release.set()
+        vacancy_thread.join()
+        user_thread.join()
+
+    assert errors == []
+    assert list(models.VacancyRecommendation.objects.values_list('user_id', 'vacancy_id')) == [
+        (resume.user_id, vacancy.id),
+    ]
@@ -0,0 +1,51 @@
+import pytest
+
+from hr import factories
+from hr import models
+from hr.api import schemas
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def rows():
+    response = factories.VacancyResponseFactory.create()
+    response.resume.skills.set([factories.SkillFactory.create(name='python')])
+    # Пару мог уже записать пересчет ленты после публикации резюме и вакансии (см. hr.signals)
+    recommendation, _ = models.VacancyRecommendation.objects.update_or_create(
+        user=response.resume.user, vacancy=response.vacancy, defaults={'score': 0.5},
+    )
+    # Объекты перечитываются из БД, как в методах API
+    response = models.VacancyResponse.objects.get(id=response.id)
+    return {
+        schemas.UserSchema: response.resume.user,
+        schemas.ShortApplicantSchema: response.resume.user,
+        schemas.ResumeForApplicantSchema: response.resume,
+        schemas.ResumeForManagerSchema: response.resume,
+        schemas.ShortVacancyForManagerSchema: response.vacancy,
+        schemas.VacancyForManagerSchema: response.vacancy,
+        schemas.ShortVacancyForApplicantSchema: response.vacancy,
+        schemas.VacancyForApplicantSchema: response.vacancy,
+        schemas.RecommendedVacancySchema: models.VacancyRecommendation.objects.get(id=recommendation.id),
+        schemas.VacancyResponseSchema: response,
+    }
+
+
+def test_trusted_schemas_pass_validation(rows):
+    for schema, obj in rows.items():
+        trusted = schema.from_model(obj)
+
+        assert set(trusted.__dict__) == set(schema.__fields__), schema
+        assert schema(**trusted.dict()) == trusted, schema
+
+
+def test_projected_rows_match_models(rows):
+    for schema, obj in rows.items():
+        if not hasattr(schema, 'projection'):
+            continue
+
+        row = type(obj).objects.filter(id=obj.id).values_list(*schema.projection).get()
+
+        assert schema.from_row(row) == schema.from_model(obj), schema
@@ -0,0 +1,51 @@
+import pytest
+
+from hr import factories
+from hr import models
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_ilike_contains_compiles_to_ilike():
+    sql = str(models.Vacancy.objects.filter(position__ilike_contains='разраб').query)
+
+    assert '"hr_vacancy"."position" ILIKE' in sql
+    assert 'UPPER' not in sql
+
+
+def test_ilike_contains_is_case_insensitive():
+    vacancy = factories.VacancyFactory.create(position='Ведущий Разработчик')
+    factories.VacancyFactory.create(position='Аналитик')
+
+    found = models.Vacancy.objects.filter(position__ilike_contains='разРАБ')
+    assert list(found) == [vacancy]
+
+
+def test_ilike_contains_escapes_wildcards():
+    user = factories.UserFactory.create(email='john_doe@example.com')
+    factories.UserFactory.create(email='johnXdoe@example.com')
+
+    assert list(models.User.objects.filter(email__ilike_contains='n_d')) == [user]
+    assert not models.User.objects.filter(email__ilike_contains='%').exists()
+
+
+def test_full_name_vector_is_kept_current_by_trigger():
+    user = factories.UserFactory.create(first_name='Иван', last_name='Петров', patronymic=None)
+    assert models.User.objects.filter(full_name_vector='Петров').get() == user
+
+    user.last_name = 'Сидоров'
+    user.save()
+
+    assert not models.User.objects.filter(full_name_vector='Петров').exists()
+    assert models.User.objects.filter(full_name_vector='Сидоров').get() == user
+
+
+def test_full_name_vector_is_not_rebuilt_on_other_updates():
+    user = factories.UserFactory.create(first_name='Иван', last_name='Петров', patronymic=None)
+    models.User.objects.filter(id=user.id).update(full_name_vector=None)
+
+    user.save(update_fields=('last_login', 'password'))
+
+    assert models.User.objects.get(id=user.id).full_name_vector is None
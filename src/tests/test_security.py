@@ -0,0 +1,42 @@
+import datetime as dt
+
+import pytest
+
+from hr import factories
+from hr import security
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_decode_jwt_is_cached(user):
+    token = security.encode_jwt(user)
+
+    first = security.decode_jwt(token)
+    second = security.decode_jwt(token)
+
+    assert first == second
+    assert first.user_id == user.id
+    assert (security.token_cache.hits, security.token_cache.misses) == (1, 1)
+
+
+def test_cached_token_expires(freezer, settings, user):
+    token = security.encode_jwt(user)
+    security.decode_jwt(token)
+
+    freezer.move_to(dt.datetime.now() + settings.JWT_EXPIRATION_INTERVAL + dt.timedelta(minutes=1))
+
+    with pytest.raises(security.TokenExpiredError):
+        security.decode_jwt(token)
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(security.token_cache, 'max_size', 2)
+    tokens = [security.encode_jwt(user) for user in factories.UserFactory.create_batch(3)]
+
+    for token in tokens:
+        security.decode_jwt(token)
+
+    security.decode_jwt(tokens[0])
+    assert (security.token_cache.hits, security.token_cache.misses) == (0, 4)
@@ -0,0 +1,80 @@
+import fnmatch
+
+import pytest
+
+from hr import factories
+from hr import sessions
+
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.data if fnmatch.fnmatch(key, match)]
+
+
+def test_local_tier_evicts_least_recently_used():
+    tier = sessions.LocalSessionTier(ttl=60, max_size=2)
+    tier.set(1, {'user': {}})
+    tier.set(2, {'user': {}})
+
+    assert tier.get(1) is not None
+    tier.set(3, {'user': {}})
+
+    assert tier.get(1) is not None
+    assert tier.get(2) is None
+    assert tier.get(3) is not None
+
+
+def test_local_tier_expires(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(sessions.time, 'monotonic', lambda: now)
+
+    tier = sessions.LocalSessionTier(ttl=60, max_size=10)
+    tier.set(1, {'user': {}})
+    assert tier.get(1) is not None
+
+    now += 61
+    assert tier.get(1) is None
+
+
+def test_redis_tier_serves_other_processes():
+    user = factories.UserFactory.create()
+    redis = FakeRedis()
+
+    first = sessions.SessionCache(
+        sessions.LocalSessionTier(ttl=60, max_size=10),
+        sessions.RedisSessionTier(redis, ttl=60),
+    )
+    assert first.get_user(user.id).email == user.email
+    assert redis.get(f'hr:session:user:{user.id}') is not None
+
+    # Другой процесс с пустым локальным кэшем получает сессию из Redis
+    user.__class__.objects.filter(id=user.id).update(email='changed@example.com')
+    second = sessions.SessionCache(
+        sessions.LocalSessionTier(ttl=60, max_size=10),
+        sessions.RedisSessionTier(redis, ttl=60),
+    )
+    cached_user = second.get_user(user.id)
+    assert cached_user.email == user.email
+    assert cached_user.department.name == user.department.name
+    assert cached_user.last_login == user.last_login
+
+    second.invalidate(user.id)
+    assert redis.get(f'hr:session:user:{user.id}') is None
+    assert second.get_user(user.id).email == 'changed@example.com'